@@ -0,0 +1,35 @@
+"""Benchmark the vector store ingestion pipeline offline with the fake embedding backend."""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.embeddings import CachedEmbeddings, LocalFakeEmbeddings
+from src.vector_store import get_vectorstore
+
+ROW_COUNT = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+LATENCY = 0.05  # simulated API round trip per batch
+
+with tempfile.TemporaryDirectory() as tmp:
+    os.chdir(tmp)
+    with open("ledger.csv", "w") as f:
+        f.write("Islem ID,Cari Adi,Aciklama,Tutar\n")
+        for i in range(1, ROW_COUNT + 1):
+            f.write(f"{i},Firma {i % 97} A.Ş.,Aciklama {i % 1000},{i * 1.5:.2f}\n")
+
+    embeddings = CachedEmbeddings(LocalFakeEmbeddings(size=256, latency=LATENCY), cache_path="cache.sqlite")
+
+    start = time.perf_counter()
+    get_vectorstore("ledger.csv", embeddings, persist_dir="chroma_db")
+    print(f"Cold ingest of {ROW_COUNT} rows: {time.perf_counter() - start:.2f}s "
+          f"(hits={embeddings.hits}, misses={embeddings.misses})")
+
+    with open("ledger.csv", "a") as f:
+        f.write(f"{ROW_COUNT + 1},Yeni Firma A.Ş.,Yeni satir,1.00\n")
+    start = time.perf_counter()
+    get_vectorstore("ledger.csv", embeddings, persist_dir="chroma_db")
+    print(f"Incremental ingest after 1 appended row: {time.perf_counter() - start:.2f}s "
+          f"(hits={embeddings.hits}, misses={embeddings.misses})")
@@ -0,0 +1,50 @@
+"""Load-test the multi-session agent server offline with the stub LLM and fake embeddings."""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.agent import SharedResources
+from src.server import AgentServer
+from src.stub_llm import StubChatModel
+
+SESSIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+TURNS = 3
+CONCURRENCY = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+LATENCY = 0.2  # simulated LLM round trip per call
+
+
+async def session(server, name, latencies):
+    for turn in range(TURNS):
+        start = time.perf_counter()
+        response = await server.handle({"session": name, "input": f"soru {turn}"})
+        if "error" in response:
+            print(f"{name}: {response['error']}")
+        latencies.append(time.perf_counter() - start)
+
+
+async def main():
+    resources = SharedResources("ledger.csv", embedding_backend="fake")
+    resources.wait_until_warm()
+    server = AgentServer(resources, StubChatModel(latency=LATENCY), max_concurrency=CONCURRENCY)
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(session(server, f"s{i}", latencies) for i in range(SESSIONS)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    print(f"{SESSIONS} sessions x {TURNS} turns, concurrency {CONCURRENCY}: {elapsed:.2f}s, "
+          f"{len(latencies) / elapsed:.1f} turns/s, p50 {latencies[len(latencies) // 2]:.2f}s, "
+          f"p95 {latencies[int(len(latencies) * 0.95)]:.2f}s")
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    os.chdir(tmp)
+    with open("ledger.csv", "w") as f:
+        f.write("Islem ID,Cari Kodu,Cari Adi,Tutar,Para Birimi,Aciklama\n")
+        for i in range(1, 20001):
+            f.write(f"{i},C-{i % 97},Firma {i % 97} A.Ş.,{i * 1.5:.2f},{['TRY', 'USD', 'EUR'][i % 3]},Aciklama {i % 1000}\n")
+    asyncio.run(main())
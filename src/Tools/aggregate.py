@@ -1,71 +1,187 @@
+import json
+
 import pandas as pd
-from pydantic import Field
-from langchain.tools import BaseTool
-from typing import List, Any, Optional
+from pydantic import Field, PrivateAttr
+from typing import Callable, List, Any, Optional, Union
+
+from src.Tools.base import WorkspaceTool
+from src.cache import LRUCache
+from src.chunked import ChunkedWorkspace
+from src.parallel_agg import parallel_aggregate, widen_floats
+from src.rollup import MONTH_COLUMN, RollupCube, groupers
+from src.serialize import serialize_frame, serialize_value
+from src.constants import MAX_ROWS, AGGREGATION_CACHE_MAX_BYTES, TOOL_OUTPUT_TOKEN_BUDGET
 
-from src.utils import check_shrink_df
-from src.constants import MAX_ROWS
+# Aggregation results shared by every tool instance, keyed by
+# (dataset version, view key, group_by columns, aggregation spec).
+AGGREGATION_CACHE = LRUCache(AGGREGATION_CACHE_MAX_BYTES)
 
 
-class DataFrameAggregateTool(BaseTool):
+class DataFrameAggregateTool(WorkspaceTool):
     name: str = "dataframe_aggregator"
     description: str = """Useful for grouping and aggregating DataFrame data. 
     Input should be a JSON string with two keys: 
     'action' -the function to run ('apply_aggregation'), 
-    and 'params' (dictionary with 'group_by' and 'aggregation').
-    'group_by' should be a list of column names to group by,
-    aggregation should be a string like "min", "sum", etc.)"""
-    df: pd.DataFrame = Field(..., description="The pandas DataFrame to aggregate")
+    and 'params' (dictionary with 'group_by', 'aggregation' and optional 'view').
+    'group_by' should be a list of column names to group by; 'Belge Ayi' groups by month of 'Belge Tarihi',
+    aggregation should be a string like "min", "sum", etc.)
+    Sums, counts, min, max, mean, var and std of 'Tutar'/'Bakiye' by 'Cari Kodu', 'Cari Tipi',
+    'Para Birimi', 'Odeme Durumu', 'Islem Turu' and 'Belge Ayi' over the full dataset are precomputed.
+    Works on the active view (the last filter result) unless 'view' names another one;
+    use 'base' for the full dataset. The result is saved as a named table.
+    Results are returned as CSV; optional 'max_tokens' limits the size of the output."""
     grouped_data: Optional[Any] = Field(None, description="Stores grouped data for aggregation")
+    cube: Optional[Union[RollupCube, Callable[[], RollupCube]]] = Field(None, description="Precomputed rollup of the base dataset, or a function building it on first use")
+    _grouped_key: Optional[tuple] = PrivateAttr(default=None)
+    _grouping_reuses: int = PrivateAttr(default=0)
+    _max_tokens: int = PrivateAttr(default=TOOL_OUTPUT_TOKEN_BUDGET)
 
     def _run(self, tool_input: str) -> str:
         """Main execution method required by BaseTool"""
         try:
-            import json
             data = json.loads(tool_input)
             action = data['action']
             params = data['params']
+            view = self._view_name(params)
+            function = params['aggregation']
+            self._max_tokens = self._budget(params)
+
+            streaming = isinstance(self.workspace, ChunkedWorkspace)
 
             if not params['group_by']:
                 try:
-                    result = self.df.agg(params['aggregation'])
-                    return f"Aggregation result (no group): \n {result.to_string()}"
+                    if streaming:
+                        compute = lambda: self.workspace.aggregate([], function, view)
+                    else:
+                        compute = lambda: self._aggregate_all(function, view)
+                    key = self._cache_key((), function, view)
+                    result = AGGREGATION_CACHE.get(key)
+                    if result is None:
+                        result = self._store(key, compute)
+                    return f"Aggregation result (no group):\n{serialize_value(result, self._max_tokens)}"
                 except Exception as e:
                     return f"Aggregation failed: {str(e)}"
             if action == "apply_aggregation":
-                self._group_by([col.strip() for col in params['group_by']])
-                return self._apply_aggregation(params['aggregation'])
+                columns = [col.strip() for col in params['group_by']]
+                error = self._check_columns(columns, view)
+                if error is not None:
+                    return error
+                try:
+                    result_df = self._aggregate(columns, function, view)
+                except Exception as e:
+                    return f"Aggregation failed: {str(e)}"
+                return self._format_result(result_df, function, view)
             return "Invalid action. Use 'apply_aggregation'"
         except Exception as e:
             return f"Error processing input: {str(e)}"
-            
-    def _group_by(self, columns: List[str]) -> str:        
+
+    def _cache_key(self, columns, function, view: str = None) -> tuple:
+        return (
+            self.workspace.version,
+            self.workspace.view_key(view),
+            tuple(columns),
+            json.dumps(function, sort_keys=True, default=str),
+        )
+
+    def _store(self, key: tuple, compute):
+        """Compute a result that missed the cache and keep it under key."""
+        result = compute()
+        AGGREGATION_CACHE.put(key, result)
+        return result
+
+    def cache_stats(self) -> dict:
+        """Hit/miss counters of the shared result cache and grouping reuse of this tool."""
+        return {**AGGREGATION_CACHE.stats(), "grouping_reuses": self._grouping_reuses}
+
+    def aggregate_view(self, group_by: List[str], function: str, view: str = None) -> str:
         """
-        Group the data by given columns.
-        This can be used to group large amounts of data and compute operations on these groups.
+        Aggregate a view by group_by and keep the result as a workspace table.
+        Returns the table name; raises ValueError for unknown columns or an empty view.
         """
-        if self.df.empty:
-            return "DataFrame is empty. Please load valid data first."  
+        columns = [col.strip() for col in group_by]
+        error = self._check_columns(columns, view)
+        if error is not None:
+            raise ValueError(error)
+        return self._save_table(self._aggregate(columns, function, view), function, view)
 
-        missing_cols = [col for col in columns if col not in self.df.columns]
+    def _check_columns(self, columns: List[str], view: str = None) -> Optional[str]:
+        """Why the view cannot be grouped by columns, or None."""
+        available = self.workspace.columns(view)
+        missing_cols = [col for col in columns if col not in available and col != MONTH_COLUMN]
         if missing_cols:
-            return f"Columns {missing_cols} not found. Available columns: {list(self.df.columns)}"
+            return f"Columns {missing_cols} not found. Available columns: {available}"
+        # a streaming view has no row count without a pass over the ledger
+        if not isinstance(self.workspace, ChunkedWorkspace) and self.workspace.size(view) == 0:
+            return "DataFrame is empty. Please load valid data first."
+        return None
+
+    def _aggregate(self, columns: List[str], function, view: str = None):
+        """Grouped result from the cache, or computed by the streaming pass, the rollup cube or a groupby."""
+        key = self._cache_key(columns, function, view)
+        result_df = AGGREGATION_CACHE.get(key)
+        if result_df is not None:
+            return result_df
+        # a miss is computed and stored below without a second lookup
+        if isinstance(self.workspace, ChunkedWorkspace):
+            # out-of-core mode: one chunked pass over the ledger instead of an in-memory groupby
+            return self._store(key, lambda: self.workspace.aggregate(columns, function, view))
+        if self._cube_covers(columns, function, view):
+            return self._store(key, lambda: self.cube.rollup(columns, function))
+        self._group_by(columns, view)
+        return self._store(key, lambda: self._aggregate_grouped(function))
+
+    def _group_by(self, columns: List[str], view: str = None) -> None:
+        """
+        Group the view by the given columns, or keep the grouping of the last
+        call if it was for the same view and columns.
+        """
+        grouped_key = (self.workspace.version, self.workspace.view_key(view), tuple(columns))
+        if self._grouped_key == grouped_key and self.grouped_data is not None:
+            # same grouping as the last call: reuse its group codes and indexer
+            self._grouping_reuses += 1
+            return
+        df = widen_floats(self.workspace.frame(view))
+        self.grouped_data = df.groupby(groupers(df, columns), observed=True)
+        self._grouped_key = grouped_key
+
+    def _get_cube(self) -> Optional[RollupCube]:
+        if callable(self.cube):
+            self.cube = self.cube()
+        return self.cube
 
-        self.grouped_data = self.df.groupby(columns)
+    def _cube_covers(self, columns: List[str], function, view: str = None) -> bool:
+        """The cube answers only plain group-bys of the untouched base dataset."""
+        view = view or self.workspace.active
+        return (
+            self._get_cube() is not None
+            and self.cube.version == self.workspace.version
+            and self.workspace.rows(view) is None
+            and self.cube.covers(columns, function)
+        )
 
-        preview_df = self.grouped_data.size().reset_index(name='Count')
-        _, info = check_shrink_df(preview_df, MAX_ROWS, f"grouped by {columns}")
+    def _save_table(self, result_df, function, view: str = None) -> str:
+        return self.workspace.add_table(result_df, f"{function} of view '{view or self.workspace.active}'")
 
-        return f"Successfully grouped by {columns}.\nGroup sizes preview:\n{info}\nNow apply an aggregation function."
+    def _format_result(self, result_df, function, view: str = None) -> str:
+        name = self._save_table(result_df, function, view)
+        shown = result_df.to_frame() if isinstance(result_df, pd.Series) else result_df
+        shown = serialize_frame(shown.head(MAX_ROWS), self._max_tokens, total_rows=len(result_df))
+        return f"Aggregation result ({function}), saved as table '{name}':\n{shown}"
 
-    def _apply_aggregation(self, function: str) -> str:
-        """Apply aggregation to previously grouped data."""
-        if self.grouped_data is None:
-            return "Error: You must group data first using 'group_by'."
+    def _aggregate_grouped(self, function):
+        result = parallel_aggregate(self.grouped_data, list(self._grouped_key[2]), function)
+        if result is not None:
+            return result
         try:
-            result_df = self.grouped_data.agg(function)
-            check_shrink_df(result_df, MAX_ROWS)
+            return self.grouped_data.agg(function)
+        except TypeError:
+            # categorical/text columns cannot be summed; aggregate the numeric ones
+            return self.grouped_data.agg(function, numeric_only=True)
 
-            return f"Aggregation result ({function}): \n {result_df.to_string()}"
-        except Exception as e:
-            return f"Aggregation failed: {str(e)}"
+    def _aggregate_all(self, function, view: str = None):
+        frame = widen_floats(self.workspace.frame(view))
+        try:
+            return frame.agg(function)
+        except TypeError:
+            # categorical/text columns cannot be summed; aggregate the numeric ones
+            return frame.agg(function, numeric_only=True)
@@ -1,17 +1,60 @@
+from collections import OrderedDict
+import threading
+
+import numpy as np
 import pandas as pd
-from pydantic import Field
-from langchain.tools import BaseTool
+from typing import Callable, Optional
+
+from pydantic import Field, PrivateAttr
 from langchain_chroma import Chroma
 
+from src.Tools.base import WorkspaceTool
+from src.chunked import ChunkedWorkspace
+from src.lexical_index import LexicalIndex, reciprocal_rank_fusion
+from src.utils import dataset_version
+from src.vector_store import DATE_METADATA_COLUMNS, ID_COLUMN, METADATA_COLUMNS, IndexWarming
+
+
+MAX_INDEXES = 4
+_INDEXES = OrderedDict()
+_INDEX_LOCK = threading.Lock()
+
 
-class DataFrameAnalysisTool(BaseTool):
+def get_shared_index(df: pd.DataFrame) -> tuple:
+    """(LexicalIndex, Islem ID -> row position) of a dataset version, built once per process."""
+    key = (dataset_version(df), len(df))
+    with _INDEX_LOCK:
+        entry = _INDEXES.get(key)
+        if entry is None:
+            ids = df[ID_COLUMN].astype(str) if ID_COLUMN in df.columns else df.index.astype(str)
+            entry = (LexicalIndex(df), {row_id: pos for pos, row_id in enumerate(ids)})
+            _INDEXES[key] = entry
+            if len(_INDEXES) > MAX_INDEXES:
+                _INDEXES.popitem(last=False)
+        else:
+            _INDEXES.move_to_end(key)
+    return entry
+
+
+class DataFrameAnalysisTool(WorkspaceTool):
     name: str = "dataframe_analyzer"
-    description: str = """Useful for semantically analyzing DataFrame. 
-    Input should be a JSON string with two keys: 
-    'action' ('similarity_search'), 
-    and 'params' (dictionary of parameters)."""
-    df: pd.DataFrame = Field(..., description="The pandas DataFrame to analyze")
-    vectorstore: Chroma = Field(..., description="The vectorstore to analyze")
+    description: str = """Useful for semantically analyzing DataFrame.
+    Input should be a JSON string with two keys:
+    'action' ('similarity_search'),
+    and 'params' (dictionary with 'query', optional 'k', optional 'filters' and optional 'mode').
+    'Cari Adi', 'Aciklama' and 'Belge No' are searched by keyword; 'Cari Adi' and 'Aciklama' also semantically.
+    'mode' is 'auto' (default: exact keyword hits are returned directly, otherwise keyword and
+    semantic results are merged), 'lexical', 'vector' or 'hybrid'.
+    'filters' narrows the search by exact values of 'Cari Kodu', 'Cari Tipi', 'Islem Turu',
+    'Para Birimi', 'Odeme Durumu' (a value or a list of values) and by date ranges of
+    'Belge Tarihi' / 'Vade Tarihi' ({"from": "YYYY-MM-DD", "to": "YYYY-MM-DD"}).
+    Example: {"action": "similarity_search", "params": {"query": "kira", "filters": {"Para Birimi": "USD"}}}"""
+    vectorstore: Optional[Chroma] = Field(None, description="The vectorstore to analyze")
+    vectorstore_loader: Optional[Callable[[], Chroma]] = Field(
+        None, description="Returns the vectorstore once it is ready; raises IndexWarming while it is built in the background"
+    )
+    _index: LexicalIndex = PrivateAttr(default=None)
+    _id_positions: dict = PrivateAttr(default=None)
 
     def _run(self, tool_input: str) -> str:
         """Main execution method required by BaseTool"""
@@ -22,16 +65,132 @@ class DataFrameAnalysisTool(BaseTool):
             params = data['params']
 
             if action == "similarity_search":
-                return self._similarity_search(params['columns'].strip())
+                if isinstance(self.workspace, ChunkedWorkspace):
+                    return ("similarity_search is not available in streaming mode: the ledger is too large to index. "
+                            "Use the dataframe_filter tool with a 'contains' condition instead.")
+                query = params.get('query', params.get('columns', ''))
+                return self._similarity_search(
+                    query.strip(), params.get('k', 3), params.get('filters'), params.get('mode', 'auto')
+                )
             return "Invalid action. Use either 'group_by' or 'apply_aggregation'"
         except Exception as e:
             return f"Error processing input: {str(e)}"
 
-    def _similarity_search(self, query: str, k: int = 3):
-        """Perform a similarity search on the vector store for a given query."""
-        if self.vectorstore is None:
-            return "Vectorstore not set. Please load the data first."
+    def _build_where(self, filters: dict) -> dict:
+        """Translate the tool's filters into a Chroma metadata `where` clause."""
+        clauses = []
+        for column, value in filters.items():
+            if column not in METADATA_COLUMNS:
+                raise ValueError(f"Cannot filter on '{column}'. Filterable columns: {METADATA_COLUMNS}")
+            if column in DATE_METADATA_COLUMNS:
+                bounds = value if isinstance(value, dict) else {"from": value, "to": value}
+                if bounds.get("from"):
+                    clauses.append({column: {"$gte": int(pd.Timestamp(bounds["from"]).strftime("%Y%m%d"))}})
+                if bounds.get("to"):
+                    clauses.append({column: {"$lte": int(pd.Timestamp(bounds["to"]).strftime("%Y%m%d"))}})
+            elif isinstance(value, list):
+                clauses.append({column: {"$in": [str(v) for v in value]}})
+            else:
+                clauses.append({column: str(value)})
+        if len(clauses) == 1:
+            return clauses[0]
+        return {"$and": clauses}
+
+    @property
+    def _base(self) -> pd.DataFrame:
+        """Search always covers the full dataset, not the active view."""
+        return self.workspace.base
+
+    def _get_index(self) -> LexicalIndex:
+        """Keyword index of the dataset, built on first use and shared by every session."""
+        if self._index is None:
+            self._index, self._id_positions = get_shared_index(self._base)
+        return self._index
+
+    def _filter_mask(self, filters: dict) -> np.ndarray:
+        """Same filters as _build_where, evaluated on the DataFrame for keyword search."""
+        mask = np.ones(len(self._base), dtype=bool)
+        for column, value in filters.items():
+            if column not in METADATA_COLUMNS:
+                raise ValueError(f"Cannot filter on '{column}'. Filterable columns: {METADATA_COLUMNS}")
+            if column not in self._base.columns:
+                continue
+            if column in DATE_METADATA_COLUMNS:
+                bounds = value if isinstance(value, dict) else {"from": value, "to": value}
+                dates = pd.to_datetime(self._base[column], errors="coerce").dt.normalize()
+                if bounds.get("from"):
+                    mask &= (dates >= pd.Timestamp(bounds["from"]).normalize()).to_numpy()
+                if bounds.get("to"):
+                    mask &= (dates <= pd.Timestamp(bounds["to"]).normalize()).to_numpy()
+            else:
+                values = value if isinstance(value, list) else [value]
+                mask &= self._base[column].astype(str).isin([str(v) for v in values]).to_numpy()
+        return mask
+
+    def _format_row(self, row_id: str, docs: dict) -> str:
+        pos = self._id_positions.get(row_id)
+        if pos is None:
+            doc = docs[row_id]
+            return doc.page_content + "\n" + "\n".join(
+                f"{key}: {value}" for key, value in doc.metadata.items() if key not in ("source", "row_hash")
+            )
+        row = self._base.iloc[pos]
+        return "\n".join(f"{col}: {value}" for col, value in row.items())
+
+    def _similarity_search(self, query: str, k: int = 3, filters: dict = None, mode: str = "auto"):
+        """
+        Search the ledger for a query.
+        Exact keyword hits (every query token present) are answered from the keyword index
+        without embedding the query; otherwise keyword and vector rankings are merged with
+        reciprocal-rank fusion.
+        """
         if k > 10:
             k = 10
-        results = self.vectorstore.similarity_search(query, k=k)
-        return "\n".join([doc.page_content for doc in results])
+        index = self._get_index()
+        candidates = self._filter_mask(filters) if filters else None
+
+        lexical_ids = []
+        if mode != "vector":
+            if mode == "auto":
+                exact = index.match_all(query)
+                exact_mask = np.zeros(index.doc_count, dtype=bool)
+                exact_mask[exact] = True
+                if candidates is not None:
+                    exact_mask &= candidates
+                if exact_mask.any():
+                    hits = index.search(query, k=k, candidates=exact_mask)
+                    return "\n\n".join(self._format_row(self._id_of(pos), {}) for pos, _ in hits)
+            lexical_ids = [self._id_of(pos) for pos, _ in index.search(query, k=k * 2, candidates=candidates)]
+            if mode == "lexical":
+                lexical_ids = lexical_ids[:k]
+                if not lexical_ids:
+                    return "No matching rows found."
+                return "\n\n".join(self._format_row(row_id, {}) for row_id in lexical_ids)
+
+        try:
+            vectorstore = self._get_vectorstore()
+        except IndexWarming as e:
+            if lexical_ids:
+                rows = "\n\n".join(self._format_row(row_id, {}) for row_id in lexical_ids[:k])
+                return f"Semantic index warming ({e}); showing keyword results only.\n\n{rows}"
+            return f"Semantic index warming ({e}). Retry shortly or use mode 'lexical'."
+        if vectorstore is None:
+            return "Vectorstore not set. Please load the data first."
+        where = self._build_where(filters) if filters else None
+        results = vectorstore.similarity_search(query, k=k * 2 if lexical_ids else k, filter=where)
+        docs = {doc.metadata.get(ID_COLUMN, doc.page_content): doc for doc in results}
+
+        ranked = reciprocal_rank_fusion([lexical_ids, list(docs)])[:k]
+        if not ranked:
+            return "No matching rows found."
+        return "\n\n".join(self._format_row(row_id, docs) for row_id in ranked)
+
+    def _get_vectorstore(self) -> Optional[Chroma]:
+        if self.vectorstore is None and self.vectorstore_loader is not None:
+            self.vectorstore = self.vectorstore_loader()
+        return self.vectorstore
+
+    def _id_of(self, pos: int) -> str:
+        if ID_COLUMN in self._base.columns:
+            return str(self._base[ID_COLUMN].iloc[pos])
+        return str(self._base.index[pos])
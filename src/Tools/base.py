@@ -0,0 +1,60 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Optional
+
+import pandas as pd
+from pydantic import Field
+from langchain.tools import BaseTool
+from langchain_core.runnables.config import run_in_executor
+
+from src.workspace import Workspace
+from src.constants import TOOL_THREADS, TOOL_OUTPUT_TOKEN_BUDGET
+
+# Bounded pool for the blocking DataFrame work of tools called from async agents
+TOOL_EXECUTOR = ThreadPoolExecutor(max_workers=TOOL_THREADS, thread_name_prefix="tool")
+
+
+async def run_in_tool_pool(func, *args, **kwargs):
+    """Run a blocking call in TOOL_EXECUTOR without blocking the event loop."""
+    return await run_in_executor(TOOL_EXECUTOR, func, *args, **kwargs)
+
+
+class WorkspaceTool(BaseTool):
+    """
+    Base for tools that work on the session Workspace.
+    Tools can still be built with df=...; they then get a private workspace over it.
+    `df` reads the active view of the workspace.
+    """
+    workspace: Optional[Workspace] = Field(default=None, description="Session workspace shared by all tools")
+    token_budget: int = Field(default=TOOL_OUTPUT_TOKEN_BUDGET, description="Max prompt tokens of one tool output")
+
+    def __init__(self, df: Optional[pd.DataFrame] = None, **kwargs):
+        super().__init__(**kwargs)
+        if self.workspace is None and df is not None:
+            self.workspace = Workspace(df)
+
+    @property
+    def df(self) -> Optional[pd.DataFrame]:
+        if self.workspace is None:
+            return None
+        return self.workspace.frame()
+
+    def _locked_run(self, *args, **kwargs):
+        """_run holding the workspace lock, so tools of one session never interleave on its views."""
+        with self.workspace.lock if self.workspace is not None else nullcontext():
+            return self._run(*args, **kwargs)
+
+    async def _arun(self, *args, **kwargs):
+        """
+        Async entry point used by AgentExecutor.ainvoke: the pandas work runs in the
+        bounded tool pool, so the event loop keeps serving other sessions meanwhile.
+        """
+        return await run_in_tool_pool(self._locked_run, *args, **kwargs)
+
+    def _budget(self, params: dict) -> int:
+        """Token budget of a call: params['max_tokens'] if given, else the tool's token_budget."""
+        return int(params.get('max_tokens') or self.token_budget)
+
+    def _view_name(self, params: dict) -> str:
+        """View a call works on: params['view'] if given, else the active view."""
+        return params.get('view') or self.workspace.active
@@ -1,31 +1,53 @@
 from enum import Enum
-from typing import Optional
-import json
-
-from langchain.tools import BaseTool
+from typing import Optional, Union
 
+from src.Tools.base import WorkspaceTool, run_in_tool_pool
+from src.chunked import ChunkedWorkspace
 from pydantic import Field, BaseModel
-from dotenv import load_dotenv
-from datetime import datetime
-import requests
-import os, getpass
+import numpy as np
 import pandas as pd
 
-from src.utils import check_shrink_df
-from src.constants import request_date
+from src.fx_history import RateHistory, get_rate_history
+from src.fx_rates import RateProvider, get_rate_provider
+from src.serialize import serialize_frame, serialize_value
 
 class CurrencyEnum(str, Enum):
     EUR = "EUR"
     USD = "USD"
     TRY = "TRY"
 
+CURRENCIES = [e.value for e in CurrencyEnum]
+
+
+def rate_matrix(quotes: dict, currencies: list = CURRENCIES) -> np.ndarray:
+    """
+    M[i, j] = units of currencies[j] per 1 unit of currencies[i], from one
+    base currency's quotes (units per 1 base). One row of NaN is appended, so
+    index -1 (an unknown currency) converts to NaN.
+    """
+    r = np.array([quotes.get(code, np.nan) for code in currencies], dtype="float64")
+    return np.vstack([r[None, :] / r[:, None], np.full(len(currencies), np.nan)])
+
+
+def currency_positions(codes: pd.Series, currencies: list = CURRENCIES) -> np.ndarray:
+    """Position of each row's currency code in currencies, -1 if unknown or missing; one lookup per category."""
+    codes = codes.astype("category") if not isinstance(codes.dtype, pd.CategoricalDtype) else codes
+    lookup = np.array([currencies.index(str(code)) if str(code) in currencies else -1
+                       for code in codes.cat.categories] + [-1], dtype=np.int64)
+    # code -1 (missing) picks the trailing -1
+    return lookup[codes.cat.codes.to_numpy()]
+
+
 class CurrencyToolInput(BaseModel):
     action: str = Field(description="The action to perform, either 'get_currency_data' or 'merge_currencies'.")
     base_currency: CurrencyEnum = Field(description="The base currency to use for conversions. Required for both 'get_currency_data' and 'merge_currencies'.")
-    currency_column: Optional[str] = Field(default=None, description="The name of the column containing currency codes. Required for 'merge_currencies'.")
+    currency_column: Optional[Union[str, list[str]]] = Field(default=None, description="The name of the column containing currency codes (e.g. 'Para Birimi'), or one per money column. Required for 'merge_currencies'.")
     money_columns: Optional[list[str]] = Field(default=None, description="A list of column names containing monetary values to be converted. Required for 'merge_currencies'.")
+    view: Optional[str] = Field(default=None, description="The workspace view to convert. Defaults to the active view (the last filter result).")
+    date_column: Optional[str] = Field(default=None, description="Column with document dates, e.g. 'Belge Tarihi'. If given, each row is converted at the rate of its own date instead of today's rate.")
+    target_currencies: Optional[list[CurrencyEnum]] = Field(default=None, description="Currencies to convert every money column into, in one call. Defaults to [base_currency].")
 
-class CurrencyTool(BaseTool):
+class CurrencyTool(WorkspaceTool):
     args_schema = CurrencyToolInput
     name: str = "currency_tool"
     description: str = """A tool for currency conversion and merging.
@@ -33,64 +55,52 @@ class CurrencyTool(BaseTool):
     Actions:
     - 'get_currency_data': Fetches currency exchange rates. Requires 'base_currency'.
     - 'merge_currencies': Merges currencies in a DataFrame. Requires 'base_currency', 'currency_column', and 'money_columns' and 'row_count'.
+      Pass 'date_column' (e.g. 'Belge Tarihi') to convert every row at the historical rate of its date,
+      and 'target_currencies' (e.g. ['EUR', 'USD', 'TRY']) to get every money column in all of them at once.
     
-    Before merging, you must first run 'get_currency_data' to fetch the necessary exchange rates.
+    Exchange rates are fetched when needed and reused for several hours.
     """
     base_currency: Optional[CurrencyEnum] = Field(default=None, description="The main currency which others will be merged into")
-    df: Optional[pd.DataFrame] = Field(default=None, description="The dataframe which's currencies will be merged")
-    api_data: Optional[dict] = Field(default=None, description="The api data that is fetched with get_currency_data")
-    last_request: Optional[datetime] = Field(default=None, description="The last time currency data was requested")
+    api_data: Optional[dict] = Field(default=None, description="Fixed rates to use instead of the rate provider, e.g. in tests")
+    rate_provider: Optional[RateProvider] = Field(default=None, description="Rate source; the process-wide provider if not set")
+    rate_history: Optional[RateHistory] = Field(default=None, description="Daily rates for date_column; the process-wide history if not set")
+
+    def _rates(self, base_currency) -> dict:
+        if self.api_data is not None:
+            return self.api_data
+        return (self.rate_provider or get_rate_provider()).get_rates(base_currency)
 
-    def _run(self, action: str, base_currency: CurrencyEnum, currency_column: Optional[str] = None, money_columns: Optional[list[str]] = None):
+    def _run(self, action: str, base_currency: CurrencyEnum, currency_column: Optional[str] = None, money_columns: Optional[list[str]] = None, view: Optional[str] = None, date_column: Optional[str] = None, target_currencies: Optional[list[CurrencyEnum]] = None):
         """Main execution method required by BaseTool."""
         print("CurrencyTool: Running...")
         try:
-            print("CurrencyTool: Loading last request...")
-            self.load_last_request(filepath=request_date)
-            print("CurrencyTool: Last request loaded...")
-
             if action == "get_currency_data":
-                if self.check_last_request() and self.api_data:
-                    return self.api_data
-                data = self._get_currency_data(base_currency)
-                if data and isinstance(data, requests.Response):
-                    self.api_data = data.json()
-                    self.write_last_request(filepath=request_date, data=self.api_data)
-                    return self.api_data
-                elif isinstance(data, dict):
-                    self.api_data = data
-                    self.write_last_request(filepath=request_date, data=self.api_data)
-                    return self.api_data
-                else:
-                    return data
+                return serialize_value(self._rates(base_currency), self.token_budget)
             
             elif action == "merge_currencies":
-                self.base_currency = base_currency
-                if self.api_data is None:
-                    # If api_data is not available, fetch it first
-                    print("Currency data not found, fetching...")
-                    data = self._get_currency_data(base_currency)
-                    if data and isinstance(data, requests.Response):
-                        self.api_data = data.json()
-                        self.write_last_request(filepath=request_date, data=self.api_data)
-                    elif isinstance(data, dict):
-                        self.api_data = data
-                        self.write_last_request(filepath=request_date, data=self.api_data)
-                    else:
-                        return data # Return error from fetch
-
                 if not currency_column or not money_columns:
                     return "Missing required parameters: currency_column and/or money_columns."
-                if self.df is None:
+                if self.workspace is None:
                     return "No DataFrame available. Please provide a DataFrame."
+                if isinstance(self.workspace, ChunkedWorkspace):
+                    return ("merge_currencies is not available in streaming mode: converted columns cannot be kept "
+                            "for every row. Aggregate first (e.g. sum of the money columns by 'Para Birimi') and "
+                            "convert the totals with the rates from 'get_currency_data'.")
+                # historical conversion needs no latest rates
+                api_data = None if date_column else self._rates(base_currency)
+                self.base_currency = CurrencyEnum(base_currency)
                 
                 result_df = self._merge_currencies(
-                    self.api_data, 
+                    api_data, 
                     currency_column, 
-                    money_columns
+                    money_columns,
+                    view,
+                    date_column,
+                    target_currencies
                 )
-                result_df, info = check_shrink_df(result_df, 10)
-                return result_df
+                if not isinstance(result_df, pd.DataFrame):
+                    return result_df # Return error from merge
+                return serialize_frame(result_df.head(10), self.token_budget, total_rows=len(result_df), index=False)
 
             else:
                 return f"Unknown action: {action}"
@@ -98,97 +108,82 @@ class CurrencyTool(BaseTool):
             print(f"CurrencyTool: Error: {e}")
             return f"Error processing input: {str(e)}"
 
-    def load_last_request(self, filepath):
-        with open(filepath, "r") as f:
-            data = json.load(f)
-            value = data.get("currency_api")
-            if isinstance(value, str):
-                self.last_request = datetime.fromisoformat(value)
-            else:
-                self.last_request = None
-            base_currency_str = data.get("base_currency")
-            if base_currency_str:
-                self.base_currency = CurrencyEnum(base_currency_str)
-            else:
-                self.base_currency = None
-            self.api_data = data.get("data")
-    
-    def write_last_request(self, filepath, data=None):
+    async def _arun(self, action: str, base_currency: CurrencyEnum, currency_column: Optional[str] = None, money_columns: Optional[list[str]] = None, view: Optional[str] = None, date_column: Optional[str] = None, target_currencies: Optional[list[CurrencyEnum]] = None):
         """
-        Write the last request date and optional data to the given file as JSON, with indent=2 for readability.
+        Async execution: missing rates are fetched on the event loop (joining a
+        fetch already in flight), the DataFrame work then runs in the tool pool
+        where _run finds the rates in the provider's cache. Historical rates
+        are backfilled inside _run, in the pool.
         """
-        payload = {
-            "currency_api": self.last_request.isoformat() if self.last_request else None,
-            "base_currency": self.base_currency.value if self.base_currency else None,
-            "data": data if data is not None else {}
-        }
-        with open(filepath, "w") as f:
-            json.dump(payload, f, indent=2)
-
-    def check_last_request(self):
+        latest = action == "get_currency_data" or (action == "merge_currencies" and not date_column)
+        if latest and self.api_data is None:
+            try:
+                await (self.rate_provider or get_rate_provider()).aget_rates(base_currency)
+            except Exception as e:
+                print(f"CurrencyTool: Error: {e}")
+                return f"Error processing input: {str(e)}"
+        return await run_in_tool_pool(self._locked_run, action, base_currency, currency_column, money_columns, view, date_column, target_currencies)
+
+    def _merge_currencies(self, api_data, currency_column, money_columns, view=None, date_column=None, target_currencies=None):
         """
-        Check if the last request was made today. Returns False if last_request is not set.
-        """
-        print("CurrencyTool: Checking last request...")
-        if not hasattr(self, 'last_request') or self.last_request is None:
-            return True  # Allow if never requested
-        return self.last_request.date() == datetime.today().date()
-
-    def _get_currency_data(self, base_currency):
-        """
-        Get the relative currency rates from the base_currency's perspective
-        """
-        print("Fetching currency rates (may take a few seconds)...")
-        load_dotenv()
-        # Ensure base_currency is a CurrencyEnum
-        if isinstance(base_currency, str):
-            base_currency = CurrencyEnum(base_currency)
-        self.base_currency = base_currency
-        try:
-            api_key = os.getenv('FREE_CURRENCY_API_KEY')
-            if not api_key:
-                api_key = getpass.getpass("Please enter your api key for freecurrencyapi")
-
-            currencies = "%2C".join([e.value for e in CurrencyEnum])
-
-            url = (
-                f"https://api.freecurrencyapi.com/v1/latest"
-                f"?apikey={api_key}&currencies={currencies}&base_currency={self.base_currency.value}"
-            )
-
-            response = requests.get(url=url)
-            if response.status_code != 200:
-                return f"API error: {response.status_code} - {response.text}"
-            self.last_request = datetime.today()
-            return response
-
-        except Exception as e:
-            print(f"CurrencyTool: Error initializing currency api: {e}")
-            return f"Error initializing currency api: {e}"
-
-    def _merge_currencies(self, api_data, currency_column, money_columns):
-        """
-        Adds a 'rate' column to the DataFrame by mapping currency codes to rates,
-        and converts all specified money columns to the base currency.
+        Converts every money column into every target currency in one pass and
+        adds the results as '<column>_in_<currency>' columns of the view.
+        A currency x currency rate matrix is built once (per row date with
+        date_column), the currency codes become integer positions in it, and a
+        single gather-multiply gives all (money column x target) results.
+        The new columns are derived columns of the workspace view; the base DataFrame is not modified.
         Parameters:
-            api_data: dict, API response with rates under 'data'
-            currency_column: str or list, name(s) of the column(s) in self.df with currency codes
-            money_columns: list of str, columns to convert to base currency
+            api_data: dict, API response with rates under 'data' (unused with date_column)
+            currency_column: str, column of currency codes, or a list with one per money column
+            money_columns: list of str, columns to convert
+            view: str, workspace view to convert (defaults to the active view)
+            date_column: str, column of dates; rows are converted at the rates of their date (as-of join)
+            target_currencies: list, currencies to convert into (defaults to the base currency)
+        Returns the currency, money and converted columns of the view.
         """
         print("CurrencyTool: Merging currencies...")
-        if self.df is None:
+        if self.workspace is None:
             return "DataFrame is not set."
-        if api_data is None or "data" not in api_data:
+        if date_column is None and (api_data is None or "data" not in api_data):
             return "API data is missing or invalid."
-        rates = api_data["data"]
-        # Support both string and list for currency_column
-        if isinstance(currency_column, list):
-            for col in currency_column:
-                self.df["rate"] = self.df[col].map(rates)
-        else:
-            self.df["rate"] = self.df[currency_column].map(rates)
         if not isinstance(money_columns, list):
             money_columns = [money_columns]
-        for col in money_columns:
-            self.df[f"{col}_in_{self.base_currency.value if self.base_currency else 'BASE'}"] = self.df[col] * self.df["rate"]
-        return self.df
\ No newline at end of file
+        currency_columns = currency_column if isinstance(currency_column, list) else [currency_column] * len(money_columns)
+        if len(currency_columns) != len(money_columns):
+            return "currency_column must be one column or one column per money column."
+        base = self.base_currency.value if self.base_currency else "USD"
+        targets = [getattr(code, "value", code) for code in (target_currencies or [base])]
+        unknown = [code for code in targets if code not in CURRENCIES]
+        if unknown:
+            return f"Unknown target currencies: {unknown}. Available: {CURRENCIES}"
+        target_positions = np.array([CURRENCIES.index(code) for code in targets])
+
+        # (rows x targets) factors per currency column: amount in row currency -> target
+        factors = {}
+        if date_column:
+            history = self.rate_history or get_rate_history()
+            quotes = history.quotes(base, CURRENCIES, self.workspace.column(date_column, view))
+            quotes = np.column_stack([quotes, np.full(len(quotes), np.nan)])
+            rows = np.arange(len(quotes))
+            for col in dict.fromkeys(currency_columns):
+                positions = currency_positions(self.workspace.column(col, view))
+                factors[col] = quotes[:, target_positions] / quotes[rows, positions][:, None]
+        else:
+            matrix = rate_matrix(api_data["data"])
+            for col in dict.fromkeys(currency_columns):
+                positions = currency_positions(self.workspace.column(col, view))
+                factors[col] = matrix[positions][:, target_positions]
+
+        # (rows x money columns x targets) in one vectorized multiply
+        amounts = np.column_stack([self.workspace.column(col, view).to_numpy(dtype="float64") for col in money_columns])
+        per_column = np.stack([factors[col] for col in currency_columns], axis=1)
+        converted = amounts[:, :, None] * per_column
+
+        new_columns = []
+        for i, col in enumerate(money_columns):
+            for j, code in enumerate(targets):
+                name = f"{col}_in_{code}"
+                self.workspace.add_column(name, converted[:, i, j], view)
+                new_columns.append(name)
+        shown = list(dict.fromkeys(currency_columns + money_columns + new_columns))
+        return self.workspace.frame(view, columns=shown)
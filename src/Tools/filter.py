@@ -1,28 +1,69 @@
-import pandas as pd
+import numpy as np
 import re
-from pydantic import Field, PrivateAttr
-from langchain.tools import BaseTool
+from pydantic import PrivateAttr
 
-from src.utils import check_shrink_df
-from src.constants import MAX_ROWS
+from src.Tools.base import WorkspaceTool
+from src.cache import LRUCache
+from src.chunked import ChunkedWorkspace
+from src.filter_engine import evaluate_condition, get_engine
+from src.utils import dataset_version, preview_view
+from src.workspace import BASE_VIEW
+from src.constants import MAX_ROWS, FILTER_CACHE_MAX_BYTES, TOOL_OUTPUT_TOKEN_BUDGET
 
+# Filter results shared by every tool instance, keyed by
+# (dataset version, row count, standardized condition).
+FILTER_CACHE = LRUCache(FILTER_CACHE_MAX_BYTES)
 
-class DataFrameFilterTool(BaseTool):
+_LITERAL_RE = re.compile(r"('(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"|`[^`]*`)")
+
+
+def standardize_condition(condition: str, columns) -> str:
+    """
+    Normalize a query condition: collapse whitespace and enclose every column
+    name in backticks. String literals and already backticked names are kept as is.
+    """
+    names = sorted((str(col) for col in columns), key=len, reverse=True)
+    pattern = re.compile(r"(?<![\w`.])(" + "|".join(re.escape(name) for name in names) + r")(?![\w`])") if names else None
+    parts = _LITERAL_RE.split(condition.strip())
+    for i in range(0, len(parts), 2):
+        code = re.sub(r"\s+", " ", parts[i])
+        if pattern is not None:
+            code = pattern.sub(lambda m: f"`{m.group(1)}`", code)
+        parts[i] = code
+    return "".join(parts).strip()
+
+
+def _encode_rows(mask: np.ndarray):
+    """Store a filter result as row positions or a packed bitmap, whichever is smaller."""
+    rows = np.flatnonzero(mask)
+    if len(rows) * 4 < len(mask) / 8:
+        return rows.astype(np.int32 if len(mask) < 2**31 else np.int64)
+    return np.packbits(mask)
+
+
+def _decode_rows(encoded: np.ndarray, row_count: int) -> np.ndarray:
+    if encoded.dtype == np.uint8:
+        return np.flatnonzero(np.unpackbits(encoded, count=row_count))
+    return encoded
+
+
+class DataFrameFilterTool(WorkspaceTool):
     name: str = "dataframe_transformer"
     description: str = """Useful for transforming and filtering DataFrame data. 
     Input should be a JSON string with two keys: 
     'action' ('filter_data'), 
-    and 'params' ('columns' for select_columns, 'condition' for filter_data).
-    Prioritize filtering with the `contains()` function.
-    DO NOT use direct equality checks for floating-point numbers due to precision issues.
-    For example, instead of `Col == 123.45`, use `Col >= 123.45 and Col < 123.46`."""
-
-    df: pd.DataFrame = Field(..., description="The pandas DataFrame to filter")
-    _original_df: pd.DataFrame = PrivateAttr()
+    and 'params' ('condition', optional 'view', optional 'name' and optional 'max_tokens').
+    The condition is applied to the full dataset, or within 'view' to refine an earlier filter.
+    The result is saved as a named view (optionally called 'name') that becomes the active
+    view for the other tools.
+    Prioritize filtering with the `contains()` function, e.g. `Col.str.contains('text', case=False)`
+    or `Col contains 'text'` (case-insensitive, Turkish letters folded).
+    Comparisons (==, !=, <, <=, >, >=, in, between) on numeric and date columns, equality on
+    text columns and plain-text contains() are answered from indexes; other expressions are slower.
+    Equality on floating-point numbers tolerates rounding noise, but prefer ranges,
+    e.g. `Col >= 123.45 and Col < 123.46`."""
 
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        self._original_df = self.df.copy()
+    _standardized: dict = PrivateAttr(default_factory=dict)
 
     def _run(self, tool_input: str) -> str:
         """Main execution method required by BaseTool"""
@@ -33,33 +74,78 @@ class DataFrameFilterTool(BaseTool):
             params = data['params']
 
             if action == "filter_data":
-                return self._filter_data(params['condition'].strip())
+                return self._filter_data(params['condition'].strip(), params.get('view'), params.get('name'), self._budget(params))
             return "Invalid action. Use either 'group_by' or 'apply_aggregation'"
         except Exception as e:
             error_message = f"Error processing input: {str(e)}"
             return error_message
 
-    def _filter_data(self, condition: str):
+    def _filter_rows(self, std_condition: str) -> np.ndarray:
+        """Row positions matching a standardized condition, served from the cache when possible."""
+        base = self.workspace.base
+        key = (dataset_version(base), len(base), std_condition)
+        encoded = FILTER_CACHE.get(key)
+        if encoded is None:
+            mask = evaluate_condition(base, std_condition, get_engine(base))
+            encoded = _encode_rows(mask)
+            FILTER_CACHE.put(key, encoded)
+        return _decode_rows(encoded, len(base))
+
+    def _filter_view_rows(self, std_condition: str, view: str) -> np.ndarray:
         """
-        Standardize and filter the data.
+        Base row positions of a view matching a condition on its derived columns,
+        which exist only on that view: evaluated on the view's own rows, not cached.
         """
-        if self._original_df is None:
+        used = [col for col in self.workspace.columns(view) if f"`{col}`" in std_condition]
+        mask = evaluate_condition(self.workspace.frame(view, columns=used), std_condition)
+        positions = np.flatnonzero(mask)
+        parent_rows = self.workspace.rows(view)
+        return positions if parent_rows is None else parent_rows[positions]
+
+    def _standardize(self, condition: str, view: str) -> str:
+        """The condition standardized against the base columns and the view's derived columns."""
+        derived = self.workspace.derived_columns(view)
+        std_condition = self._standardized.get((condition, tuple(derived)))
+        if std_condition is None:
+            std_condition = standardize_condition(condition, self.workspace.columns(BASE_VIEW) + derived)
+            self._standardized[(condition, tuple(derived))] = std_condition
+        return std_condition
+
+    def filter_view(self, condition: str, view: str = None, name: str = None) -> str:
+        """
+        Filter a view (the full dataset by default) into a new, active workspace view.
+        Returns the view name; raises if the condition cannot be evaluated.
+        """
+        if self.workspace is None:
+            raise ValueError("DataFrame not set. Please load the data first.")
+        parent = view or BASE_VIEW
+        derived = self.workspace.derived_columns(parent)
+        std_condition = self._standardize(condition, parent)
+
+        if isinstance(self.workspace, ChunkedWorkspace):
+            # out-of-core mode: the condition is applied to each chunk when the view is read
+            return self.workspace.add_view(std_condition, parent=parent, description=std_condition, name=name)
+
+        if any(f"`{col}`" in std_condition for col in derived):
+            rows = self._filter_view_rows(std_condition, parent)
+        else:
+            rows = self._filter_rows(std_condition)
+            parent_rows = self.workspace.rows(parent)
+            if parent_rows is not None:
+                rows = np.intersect1d(parent_rows, rows, assume_unique=True)
+        return self.workspace.add_view(rows, parent=parent, description=std_condition, name=name)
+
+    def _filter_data(self, condition: str, view: str = None, name: str = None, max_tokens: int = TOOL_OUTPUT_TOKEN_BUDGET):
+        """
+        Standardize and filter the data into a new workspace view.
+        Rows are kept as base row positions; only the preview text is truncated.
+        """
+        if self.workspace is None:
             raise ValueError("DataFrame not set. Please load the data first.")
         try:
-            # Enclose column names with spaces in backticks
-            for col in self._original_df.columns:
-                if ' ' in col and f'`{col}`' not in condition:
-                    condition = condition.replace(col, f'`{col}`')
-
-            filtered = self._original_df.query(condition)
-            std_condition = condition
-
-            if std_condition:
-                filtered, info = check_shrink_df(filtered, MAX_ROWS, std_condition)
-            else:
-                filtered, info = check_shrink_df(filtered, MAX_ROWS)
-            self.df = filtered
-            return info
+            std_condition = self._standardize(condition, view or BASE_VIEW)
+            name = self.filter_view(condition, view, name)
+            header = f"DataFrame filtered by standardized condition '{std_condition}'.\nSaved as view '{name}'."
+            return preview_view(self.workspace, name, MAX_ROWS, header, max_tokens)
         except Exception as e:
             return f"Error filtering data with condition '{condition}': {str(e)}"
-
@@ -1,16 +1,20 @@
-from pydantic import Field
-from langchain.tools import BaseTool
-import pandas as pd
 import io
 
-class DataFrameInspectTool(BaseTool):
+from src.Tools.base import WorkspaceTool
+from src.chunked import ChunkedWorkspace
+from src.serialize import serialize_frame, serialize_value
+from src.constants import TOOL_OUTPUT_TOKEN_BUDGET
+
+class DataFrameInspectTool(WorkspaceTool):
     """Tools for inspecting DataFrame structure"""
     name: str = "dataframe_inspector"
     description: str = """Useful for inspecting the DataFrame and it's structure. 
     Input should be a JSON string with two keys: 
-    'action' (either 'get_column_names', 'get_head', 'get_info', 'describe_column' or 'get_value_counts'), 
-    and 'params' (dictionary of parameters)."""   
-    df: pd.DataFrame = Field(..., description="The pandas DataFrame to inspect")
+    'action' (either 'get_column_names', 'get_head', 'get_info', 'describe_column', 'get_value_counts' or 'list_views'), 
+    and 'params' (dictionary of parameters).
+    Inspects the active view (the last filter result) unless params has 'view'; use 'base' for the full dataset.
+    Tables are returned as CSV; repeated texts are replaced by numbers listed in '#column:' lines.
+    Optional 'max_tokens' limits the size of the output."""   
 
     def _run(self, tool_input: str):
         """Main execution method required by BaseTool"""
@@ -18,61 +22,74 @@ class DataFrameInspectTool(BaseTool):
             import json
             data = json.loads(tool_input)
             action = data['action']
-            params = data['params']
+            params = data.get('params') or {}
+            view = self._view_name(params)
+            budget = self._budget(params)
 
             if action == "get_column_names":
-                return self._get_column_names()
+                return self._get_column_names(view, budget)
             elif action == "get_head":
-                return self._get_head(params['n'])
+                return self._get_head(params['n'], view, budget)
             elif action == "get_info":
-                return self._get_info()
+                return self._get_info(view, budget)
             elif action == "describe_column":
-                return self._describe_column(params['column'].strip())
+                return self._describe_column(params['column'].strip(), view, budget)
             elif action == "get_value_counts":
-                return self._get_value_counts(params['column'].strip())
+                return self._get_value_counts(params['column'].strip(), view=view, max_tokens=budget)
+            elif action == "list_views":
+                return serialize_value(self.workspace.describe(), budget)
             return "Invalid action. Use either 'group_by' or 'apply_aggregation'"
         except Exception as e:
             return f"Error processing input: {str(e)}"
 
-    def _get_column_names(self):
+    def _get_column_names(self, view=None, max_tokens=TOOL_OUTPUT_TOKEN_BUDGET):
         """Get the names of all the columns from the dataframe."""
-        if self.df is None:
+        if self.workspace is None:
             return "DataFrame not set. Please load the data first."
-        return list(self.df.columns.values)
+        return serialize_value(self.workspace.columns(view), max_tokens)
 
-    def _get_head(self, column_count: int = 5):
+    def _get_head(self, column_count: int = 5, view=None, max_tokens=TOOL_OUTPUT_TOKEN_BUDGET):
         """Get the first {column_count} rows of the dataframe. Returns the rows as a string."""
-        if self.df is None:
+        if self.workspace is None:
             return "DataFrame not set. Please load the data first."
         max_rows = 20
         column_count = min(column_count, max_rows)
-        return self.df.head(column_count).to_string()
+        return serialize_frame(self.workspace.frame(view, limit=column_count), max_tokens, index=False)
 
-    def _get_info(self):
+    def _get_info(self, view=None, max_tokens=TOOL_OUTPUT_TOKEN_BUDGET):
         """Get a concise summary of the dataframe, including the index dtype and columns, non-null values, and memory usage."""
-        if self.df is None:
+        if self.workspace is None:
             return "DataFrame not set. Please load the data first."
+        if isinstance(self.workspace, ChunkedWorkspace):
+            return ("get_info is not available in streaming mode: the ledger is too large to load whole. "
+                    "Use 'get_column_names', 'get_head' or 'get_value_counts' instead.")
         buffer = io.StringIO()
-        self.df.info(buf=buffer)
-        return buffer.getvalue()
+        self.workspace.frame(view).info(buf=buffer)
+        return serialize_value(buffer.getvalue(), max_tokens)
 
-    def _describe_column(self, column: str):
+    def _describe_column(self, column: str, view=None, max_tokens=TOOL_OUTPUT_TOKEN_BUDGET):
         """Get descriptive statistics for a specific numeric column (count, mean, std, min, max, etc.)"""
-        if self.df is None:
+        if self.workspace is None:
             return "DataFrame not set. Please load the data first."
-        if column not in self.df.columns:
-            return f"Column '{column} not found. Available columns: {list(self.df.columns)}"
-        return self.df[column].describe().to_string()
+        if column not in self.workspace.columns(view):
+            return f"Column '{column} not found. Available columns: {self.workspace.columns(view)}"
+        if isinstance(self.workspace, ChunkedWorkspace):
+            return ("describe_column is not available in streaming mode: the ledger is too large to load whole. "
+                    "Use the dataframe_aggregator with 'count', 'mean', 'min' or 'max' and an empty 'group_by' instead.")
+        return serialize_value(self.workspace.column(column, view).describe(), max_tokens)
 
-    def _get_value_counts(self, column: str, normalize=False):
+    def _get_value_counts(self, column: str, normalize=False, view=None, max_tokens=TOOL_OUTPUT_TOKEN_BUDGET):
         """Get frequency counts of unique values in a column. Useful to know what values are present in a column and how many times they occur."""
-        if self.df is None:
+        if self.workspace is None:
             return "DataFrame not set. Please load the data first."   
-        if column not in self.df.columns:
-            return f"Column '{column} not found. Available columns: {list(self.df.columns)}"
-        value_counts = self.df[column].value_counts(normalize=normalize)
+        if column not in self.workspace.columns(view):
+            return f"Column '{column} not found. Available columns: {self.workspace.columns(view)}"
+        if isinstance(self.workspace, ChunkedWorkspace):
+            value_counts = self.workspace.value_counts(column, view, normalize=normalize)
+        else:
+            value_counts = self.workspace.column(column, view).value_counts(normalize=normalize)
+        value_counts = value_counts[value_counts > 0]
         if len(value_counts) > 20:
-            value_counts = value_counts.head(20)
-            return f"The dataframe was too big, it's shrunk to 20 rows. {value_counts.to_string()}"
-        return value_counts.to_string()
+            return f"The dataframe was too big, it's shrunk to 20 rows. {serialize_frame(value_counts.head(20).to_frame(), max_tokens, total_rows=len(value_counts))}"
+        return serialize_frame(value_counts.to_frame(), max_tokens)
     
\ No newline at end of file
@@ -1,33 +1,71 @@
-from langchain.tools import BaseTool
 import pandas as pd
-from pydantic import Field, BaseModel
+from pydantic import Field, BaseModel, field_validator
 from typing import Dict, List, Optional, Any, Union
 from datetime import datetime
+import itertools
 import json
+import os
+import re
+
+from src.Tools.base import WorkspaceTool
+from src.serialize import format_column, serialize_value
+from src.constants import REPORT_DIR
 
 class ReportConfig(BaseModel):
     """Configuration for report generation with validation"""
     title: str = Field(..., description="The main title of the report")
     summary: str = Field(..., description="Executive summary of the report")
     metrics: Dict[str, Union[int, float, str]] = Field(default_factory=dict, description="Key performance metrics")
-    data_sample: Optional[List[Dict[str, Any]]] = Field(default=None, description="Sample data as list of dictionaries")
+    tables: List[str] = Field(default_factory=list, description="Names of workspace views or tables (e.g. 'view_1', 'table_2') to include; their rows are read by the tool")
+    data_sample: Optional[List[Dict[str, Any]]] = Field(default=None, description="Sample data as list of dictionaries; prefer 'tables'")
     recommendations: List[str] = Field(default_factory=list, description="List of actionable recommendations")
     insights: List[str] = Field(default_factory=list, description="Key insights and findings")
     context: Optional[str] = Field(default=None, description="Additional context or background information")
     output_format: str = Field(default="comprehensive", description="Report format: 'executive', 'comprehensive', 'dashboard'")
-    max_table_rows: int = Field(default=10, description="Maximum rows to show in data tables")
+    max_table_rows: int = Field(default=10, description="Maximum rows to show in data tables; 0 for all rows")
+    file_name: Optional[str] = Field(default=None, description="Name of the report file in the report directory; a new name if not set")
+
+    @field_validator("file_name")
+    @classmethod
+    def _plain_file_name(cls, value):
+        # the name comes from the model: no directories, so the report stays in report_dir
+        if value is not None and (value in ("", ".", "..") or value != os.path.basename(value.replace("\\", "/"))):
+            raise ValueError(f"file_name must be a plain file name without directories, not {value!r}")
+        return value
+
+
+class _ReportWriter:
+    """Writes report text to a file as it is produced, keeping the first preview_chars characters for the reply."""
+
+    def __init__(self, f, preview_chars: int):
+        self.f = f
+        self.preview_chars = preview_chars
+        self.preview = []
+        self._kept = 0
+
+    def write(self, text: str) -> None:
+        self.f.write(text)
+        if self._kept < self.preview_chars:
+            self.preview.append(text[:self.preview_chars - self._kept])
+            self._kept += len(self.preview[-1])
+
+
+def _markdown_row(cells) -> str:
+    return "| " + " | ".join(str(cell).replace("|", "\\|").replace("\n", " ") for cell in cells) + " |\n"
+
 
-class ReportGeneratorTool(BaseTool):
+class ReportGeneratorTool(WorkspaceTool):
     name: str = "report_generator"
     description: str = """
     Advanced report generator for creating professional markdown reports with multiple format options.
+    The report is written to a file; the reply gives its path and the beginning of the report.
     
     Input should be a JSON string with the following structure:
     {
         "title": "Report Title",
         "summary": "Executive summary text",
         "metrics": {"Key Metric": "Value", "Another Metric": 123},
-        "data_sample": [{"col1": "value1", "col2": "value2"}, ...],
+        "tables": ["view_1", "table_2"],
         "recommendations": ["Recommendation 1", "Recommendation 2"],
         "insights": ["Key insight 1", "Key insight 2"],
         "context": "Additional background information",
@@ -35,41 +73,78 @@ class ReportGeneratorTool(BaseTool):
         "max_table_rows": 10
     }
     
+    'tables' names workspace views (filter results) and tables (aggregation results);
+    the tool reads their rows itself, so never copy data rows into the input.
+    Set 'max_table_rows' to 0 to include every row.
+    
     Output formats:
     - 'executive': Concise summary with key metrics only
     - 'comprehensive': Full detailed report with all sections
     - 'dashboard': Metrics-focused with minimal narrative
     """
-    
-    df: pd.DataFrame = Field(..., description="The current DataFrame being analyzed")
+    report_dir: str = Field(default=REPORT_DIR, description="Directory the report files are written to")
     
     def _run(self, tool_input: str) -> str:
         try:
             # Parse and validate input
             data = json.loads(tool_input)
             config = ReportConfig(**data)
-            
-            # Generate report based on format
-            if config.output_format == "executive":
-                return self._generate_executive_report(config)
-            elif config.output_format == "dashboard":
-                return self._generate_dashboard_report(config)
-            else:
-                return self._generate_comprehensive_report(config)
+            error = self._check_tables(config)
+            if error is not None:
+                return f"❌ **Error**: {error}"
+            path, preview = self._write_report(config)
+            return f"Report saved to '{path}'.\n\n{serialize_value(preview, self.token_budget)}"
                 
         except json.JSONDecodeError as e:
             return f"❌ **Error**: Invalid JSON input - {str(e)}"
         except Exception as e:
             return f"❌ **Error**: Report generation failed - {str(e)}"
+
+    def write_report(self, config: ReportConfig) -> str:
+        """Write the report file and return its path; raises ValueError for unknown views/tables."""
+        error = self._check_tables(config)
+        if error is not None:
+            raise ValueError(error)
+        return self._write_report(config)[0]
+
+    def _check_tables(self, config: ReportConfig) -> Optional[str]:
+        """Why the views/tables of the config cannot be read, or None."""
+        missing = [name for name in config.tables if self.workspace is None
+                   or not (self.workspace.has_view(name) or self.workspace.has_table(name))]
+        if missing:
+            available = self.workspace.describe() if self.workspace is not None else "no workspace"
+            return f"Unknown views/tables {missing}.\n{available}"
+        return None
+
+    def _report_path(self, config: ReportConfig) -> str:
+        if config.file_name:
+            return os.path.join(self.report_dir, config.file_name)
+        slug = re.sub(r"[^\w]+", "_", config.title.lower()).strip("_")[:40] or "report"
+        return os.path.join(self.report_dir, f"{slug}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.md")
+
+    def _write_report(self, config: ReportConfig):
+        """Stream the sections of the chosen format to the report file; returns the path and the first token_budget * 4 characters."""
+        if config.output_format == "executive":
+            sections = self._generate_executive_report(config)
+        elif config.output_format == "dashboard":
+            sections = self._generate_dashboard_report(config)
+        else:
+            sections = self._generate_comprehensive_report(config)
+        path = self._report_path(config)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            writer = _ReportWriter(f, preview_chars=self.token_budget * 4)
+            for text in sections:
+                writer.write(text)
+            size = f.tell()
+        print(f"ReportGeneratorTool: Wrote {size} bytes to {path}")
+        return path, "".join(writer.preview).strip()
     
-    async def _arun(self, tool_input: str):
-        raise NotImplementedError("This tool does not support async execution.")
-    
-    def _generate_executive_report(self, config: ReportConfig) -> str:
+    def _generate_executive_report(self, config: ReportConfig):
         """Generate concise executive summary report"""
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
         
-        report = f"""# 📊 {config.title}
+        yield f"""# 📊 {config.title}
 *Generated on {timestamp}*
 
 ## Executive Summary
@@ -84,13 +159,12 @@ class ReportGeneratorTool(BaseTool):
 ---
 *Executive Summary Format - For detailed analysis, request comprehensive report*
 """
-        return report.strip()
     
-    def _generate_dashboard_report(self, config: ReportConfig) -> str:
+    def _generate_dashboard_report(self, config: ReportConfig):
         """Generate metrics-focused dashboard report"""
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
         
-        report = f"""# 📈 {config.title} - Dashboard
+        yield f"""# 📈 {config.title} - Dashboard
 *Updated: {timestamp}*
 
 ## Performance Metrics
@@ -100,21 +174,21 @@ class ReportGeneratorTool(BaseTool):
 {config.summary}
 
 ## Data Sample
-{self._format_data_table(config.data_sample, config.max_table_rows)}
-
+"""
+        yield from self._format_data_tables(config)
+        yield f"""
 ## Action Items
 {self._format_recommendations_numbered(config.recommendations)}
 
 ---
 *Dashboard View - Refresh for latest metrics*
 """
-        return report.strip()
     
-    def _generate_comprehensive_report(self, config: ReportConfig) -> str:
+    def _generate_comprehensive_report(self, config: ReportConfig):
         """Generate full detailed report"""
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
         
-        report = f"""# 📋 {config.title}
+        yield f"""# 📋 {config.title}
 *Generated on {timestamp}*
 
 ## 1. Executive Summary
@@ -124,8 +198,9 @@ class ReportGeneratorTool(BaseTool):
 {self._format_metrics_table(config.metrics)}
 
 ## 3. Data Analysis
-{self._format_data_section(config.data_sample, config.max_table_rows)}
-
+"""
+        yield from self._format_data_section(config)
+        yield f"""
 ## 4. Key Insights
 {self._format_insights(config.insights)}
 
@@ -137,7 +212,6 @@ class ReportGeneratorTool(BaseTool):
 ---
 *Comprehensive Report - All sections included*
 """
-        return report.strip()
     
     def _format_metrics_table(self, metrics: Dict[str, Any]) -> str:
         """Format metrics as a clean table"""
@@ -170,41 +244,70 @@ class ReportGeneratorTool(BaseTool):
         
         return cards
     
-    def _format_data_table(self, data_sample: Optional[List[Dict]], max_rows: int) -> str:
-        """Format data sample as markdown table"""
-        if not data_sample:
-            return "*No data sample available*"
-        
-        try:
-            df = pd.DataFrame(data_sample)
-            if len(df) > max_rows:
-                df = df.head(max_rows)
-                truncated_note = f"\n*Showing first {max_rows} rows of {len(data_sample)} total records*"
-            else:
-                truncated_note = ""
-            
-            return df.to_markdown(index=False) + truncated_note
-        except Exception as e:
-            return f"*Error formatting data table: {str(e)}*"
-    
-    def _format_data_section(self, data_sample: Optional[List[Dict]], max_rows: int) -> str:
+    def _sources(self, config: ReportConfig):
+        """(title, total rows, frames) of every table of the report; frames come in chunks, cut at max_table_rows."""
+        limit = config.max_table_rows or None
+        for name in config.tables:
+            total = len(self.workspace.table(name)) if self.workspace.has_table(name) else self.workspace.size(name)
+            yield f"`{name}`", total, self._limited(self.workspace.iter_frame(name), limit)
+        if config.data_sample:
+            # built once, for both the overview and the table
+            df = pd.DataFrame(config.data_sample)
+            yield "Sample", len(df), self._limited(iter([df]), limit)
+
+    @staticmethod
+    def _limited(frames, limit: Optional[int]):
+        shown = 0
+        for frame in frames:
+            if limit is not None:
+                frame = frame.head(limit - shown)
+            if frame.empty:
+                break
+            shown += len(frame)
+            yield frame
+            if limit is not None and shown >= limit:
+                break
+
+    def _format_data_table(self, total: int, frames):
+        """Markdown table of the frames, written chunk by chunk"""
+        shown = 0
+        for frame in frames:
+            if shown == 0:
+                yield _markdown_row(frame.columns)
+                yield "|" + "---|" * len(frame.columns) + "\n"
+            cells = [format_column(frame.iloc[:, i]).tolist() for i in range(frame.shape[1])]
+            yield "".join(_markdown_row(row) for row in zip(*cells))
+            shown += len(frame)
+        if shown == 0:
+            yield "*No rows*\n"
+        elif shown < total:
+            yield f"\n*Showing first {shown} rows of {total} total records*\n"
+
+    def _format_data_tables(self, config: ReportConfig):
+        """Every table of the report, or a note if there are none"""
+        found = False
+        for title, total, frames in self._sources(config):
+            found = True
+            yield f"\n**{title}**\n\n"
+            yield from self._format_data_table(total, frames)
+        if not found:
+            yield "*No data sample available*\n"
+
+    def _format_data_section(self, config: ReportConfig):
         """Format comprehensive data analysis section"""
-        if not data_sample:
-            return "*No data available for analysis*"
-        
-        try:
-            df = pd.DataFrame(data_sample)
-            
-            section = f"**Dataset Overview:**\n"
-            section += f"- Total Records: {len(data_sample)}\n"
-            section += f"- Columns: {len(df.columns)}\n\n"
-            
-            section += "**Sample Data:**\n"
-            section += self._format_data_table(data_sample, max_rows)
-            
-            return section
-        except Exception as e:
-            return f"*Error in data analysis: {str(e)}*"
+        found = False
+        for title, total, frames in self._sources(config):
+            found = True
+            frames = iter(frames)
+            first = next(frames, None)
+            columns = len(first.columns) if first is not None else 0
+            yield f"\n**Dataset Overview ({title}):**\n"
+            yield f"- Total Records: {total}\n"
+            yield f"- Columns: {columns}\n\n"
+            yield "**Sample Data:**\n"
+            yield from self._format_data_table(total, itertools.chain([first] if first is not None else [], frames))
+        if not found:
+            yield "*No data available for analysis*\n"
     
     def _format_insights(self, insights: List[str]) -> str:
         """Format insights as bullet points"""
@@ -265,10 +368,7 @@ def example_usage():
             "Customer Count": 1250,
             "Avg Order Value": 100.0
         },
-        "data_sample": [
-            {"Product": "Widget A", "Sales": 5000, "Profit": 1500},
-            {"Product": "Widget B", "Sales": 3000, "Profit": 900}
-        ],
+        "tables": ["table_1"],
         "recommendations": [
             "Increase marketing spend in high-performing segments",
             "Implement customer loyalty program",
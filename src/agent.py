@@ -1,10 +1,14 @@
-from langchain.agents import AgentExecutor, create_openai_tools_agent
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-from langchain.chains.conversation.memory import ConversationBufferMemory
+from concurrent.futures import Future
+import os
+import threading
+import time
 
 import pandas as pd
 
+from langchain.agents import AgentExecutor, create_openai_tools_agent
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_openai import ChatOpenAI
+
 from src.Tools.analyze import DataFrameAnalysisTool
 from src.Tools.filter import DataFrameFilterTool
 from src.Tools.inspect import DataFrameInspectTool
@@ -12,40 +16,27 @@ from src.Tools.aggregate import DataFrameAggregateTool
 from src.Tools.output import ReportGeneratorTool
 from src.Tools.currency import CurrencyTool
 
-from src.vector_store import get_vectorstore
-from src.constants import DATA_FILE_PATH, AI_MODEL
+from src.vector_store import IndexWarming, get_vectorstore
+from src.embeddings import get_embeddings
+from src.ledger import load_shared_ledger
+from src.workspace import Workspace
+from src.chunked import ChunkedWorkspace
+from src.rollup import RollupCube
+from src.stub_llm import StubChatModel
+from src.llm_cache import LLMResponseCache
+from src.memory import BoundedSummaryMemory
+from src.constants import DATA_FILE_PATH, AI_MODEL, STREAMING_FILE_BYTES, LLM_BACKEND, EMBEDDING_BACKEND
 
 from dotenv import load_dotenv
 load_dotenv()
 
-# --- Data and Tool Setup ---
-file_path = DATA_FILE_PATH
-
-# 1. Initialize Vector Store
-embeddings = OpenAIEmbeddings()
-vectorstore = get_vectorstore(file_path, embeddings)
-df = pd.read_csv(file_path, encoding="utf-8")
-print("Agent: DataFrame head after loading CSV:")
-print(df.head())
-
-# 3. Initialize LLM and Tools
-llm = ChatOpenAI(
-    model=AI_MODEL,
-    max_retries=3,
-    streaming=False,
-    )
-
-conversational_memory = ConversationBufferMemory(
-    memory_key="chat_history",
-    return_messages=True
-)
-
 # --- Agent Setup ---
 prompt = ChatPromptTemplate.from_messages([
     ("system", """
     You are a data-agent who works on financial data.
     Generate a comprehensive markdown report summarizing your findings, including a data sample
-    and recommendations.
+    and recommendations. Pass the names of the views/tables holding the data to the report tool
+    in 'tables'; never copy data rows into its input.
     Use iterative refinement. Start small, build the data after understanding the smaller parts.
     Always inspect unique values before filtering.
     You MUST handle all grouping / filtering operations before doing any conversions, printing, currency ops. etc.
@@ -57,20 +48,129 @@ prompt = ChatPromptTemplate.from_messages([
 ])
 
 
-tools = [
-    DataFrameAnalysisTool(df=df, vectorstore=vectorstore),
-    DataFrameInspectTool(df=df),
-    DataFrameFilterTool(df=df), 
-    DataFrameAggregateTool(df=df), # type: ignore
-    ReportGeneratorTool(df=df),
-    CurrencyTool(df=df)
-    ]
+# --- Data and Tool Setup ---
+class SharedResources:
+    """
+    Read-only data shared by every session: the ledger, its rollup cube and the
+    vector store. Nothing is loaded when this is created, so the server comes up
+    at once: the ledger and cube load on first use, and the vector store is built
+    or loaded in a background thread started by warm_up(). Ledgers larger than
+    STREAMING_FILE_BYTES are never loaded; the tools then stream them chunk by
+    chunk (out-of-core mode).
+    """
+
+    def __init__(self, file_path: str = DATA_FILE_PATH, embedding_backend: str = EMBEDDING_BACKEND):
+        self.file_path = file_path
+        self.embedding_backend = embedding_backend
+        self.streaming = os.path.getsize(file_path) > STREAMING_FILE_BYTES
+        self._lock = threading.Lock()
+        self._ledger_lock = threading.Lock()
+        self._df = None
+        self._cube = None
+        self._vectorstore = None
+
+    def ledger(self) -> pd.DataFrame:
+        with self._ledger_lock:
+            if self._df is None:
+                self._df = load_shared_ledger(self.file_path)
+                print("Agent: DataFrame head after loading ledger:")
+                print(self._df.head())
+            return self._df
+
+    def cube(self) -> RollupCube:
+        df = self.ledger()
+        with self._lock:
+            if self._cube is None:
+                self._cube = RollupCube(df)
+            return self._cube
 
+    def _build_vectorstore(self):
+        embeddings = get_embeddings(self.embedding_backend)
+        return get_vectorstore(self.file_path, embeddings)
 
-agent = create_openai_tools_agent(llm=llm, tools=tools, prompt=prompt)
-agent_executor = AgentExecutor(
-                            agent=agent, 
-                            tools=tools,
-                            verbose=True, 
-                            memory=conversational_memory,
-                            )
+    def warm_up(self) -> None:
+        """Start building/loading the vector store in a background thread."""
+        with self._lock:
+            if self._vectorstore is not None or self.streaming:
+                return
+            self._vectorstore = future = Future()
+
+        def build():
+            start = time.perf_counter()
+            try:
+                future.set_result(self._build_vectorstore())
+                print(f"Agent: Vector store ready after {time.perf_counter() - start:.2f}s")
+            except Exception as e:
+                print(f"Agent: Vector store failed to load: {e}")
+                future.set_exception(e)
+
+        threading.Thread(target=build, name="vectorstore-warmup", daemon=True).start()
+
+    def vectorstore(self):
+        """The vector store if it is ready; raises IndexWarming while it is being built."""
+        self.warm_up()
+        if not self._vectorstore.done():
+            raise IndexWarming("the vector store is still loading")
+        return self._vectorstore.result()
+
+    def wait_until_warm(self, timeout: float = None):
+        self.warm_up()
+        return self._vectorstore.result(timeout=timeout)
+
+
+def create_tools(resources: SharedResources) -> list:
+    """
+    Fresh tools over a new workspace. One workspace is shared by the tools of a
+    session (filters create views that the others read); sessions never share one.
+    """
+    if resources.streaming:
+        # same tools over the out-of-core workspace; actions that need the whole
+        # ledger in memory (search, get_info, row-level conversion) say so when called
+        workspace = ChunkedWorkspace(resources.file_path)
+        return [
+            DataFrameAnalysisTool(workspace=workspace),
+            DataFrameInspectTool(workspace=workspace),
+            DataFrameFilterTool(workspace=workspace),
+            DataFrameAggregateTool(workspace=workspace), # type: ignore
+            ReportGeneratorTool(workspace=workspace),
+            CurrencyTool(workspace=workspace)
+        ]
+
+    workspace = Workspace(resources.ledger)
+    return [
+        DataFrameAnalysisTool(workspace=workspace, vectorstore_loader=resources.vectorstore),
+        DataFrameInspectTool(workspace=workspace),
+        DataFrameFilterTool(workspace=workspace),
+        DataFrameAggregateTool(workspace=workspace, cube=resources.cube), # type: ignore
+        ReportGeneratorTool(workspace=workspace),
+        CurrencyTool(workspace=workspace)
+        ]
+
+
+def create_llm(backend: str = LLM_BACKEND, cache: LLMResponseCache = None):
+    """ChatOpenAI, or the offline StubChatModel for load tests ('stub'); responses go through `cache` if given."""
+    if backend == "stub":
+        return StubChatModel(cache=cache)
+    return ChatOpenAI(
+        model=AI_MODEL,
+        max_retries=3,
+        streaming=False,
+        cache=cache,
+        )
+
+
+def create_agent_executor(resources: SharedResources, llm, verbose: bool = True) -> AgentExecutor:
+    """Agent of one session: its own tools, workspace and conversation memory."""
+    tools = create_tools(resources)
+    conversational_memory = BoundedSummaryMemory(
+        memory_key="chat_history",
+        return_messages=True,
+        workspace=tools[0].workspace,
+    )
+    agent = create_openai_tools_agent(llm=llm, tools=tools, prompt=prompt)
+    return AgentExecutor(
+                        agent=agent,
+                        tools=tools,
+                        verbose=verbose,
+                        memory=conversational_memory,
+                        )
@@ -1,24 +1,43 @@
-from src.agent import agent_executor
+import time
 
-# --- Main Application Loop ---
-chat_history = []
-while True:
-    query = input(">>> ")
-    
-    if query.lower() == 'q':
-        break
+STARTED = time.perf_counter()
 
-    if query.lower() == 'h':
-        for message in chat_history:
-            print(message)
-        continue
+import argparse
+import asyncio
 
-    print("App: Agent invoke start...")
-    result = agent_executor.invoke({
-        "input": query,
-        "chat_history": chat_history,
-    })
+from src.agent import SharedResources, create_llm
+from src.llm_cache import LLMResponseCache
+from src.server import AgentServer
+from src.vector_store import get_file_hash
+from src.constants import DATA_FILE_PATH, EMBEDDING_BACKEND, LLM_BACKEND, LLM_CACHE_MODE, SERVER_HOST, SERVER_PORT, SERVER_MAX_CONCURRENCY
 
-    print("App: Agent invoke end...")
-    print("App: Agent output:")
-    print(result["output"])
+
+async def main(args):
+    resources = SharedResources(args.file, embedding_backend=args.embeddings)
+    # the vector store loads in the background; the ledger loads on the first tool call
+    resources.warm_up()
+    cache = None
+    if args.llm_cache != "off":
+        # cached answers are only reused for the same version of the ledger
+        cache = LLMResponseCache(dataset_version=get_file_hash(args.file), replay=args.llm_cache == "replay")
+    llm = create_llm("stub" if args.stub else LLM_BACKEND, cache=cache)
+    agent_server = AgentServer(resources, llm, max_concurrency=args.max_concurrency, verbose=args.verbose)
+    server = await agent_server.start(args.host, args.port)
+    print(f"App: Ready for the first prompt after {time.perf_counter() - STARTED:.2f}s")
+    async with server:
+        await server.serve_forever()
+
+
+# --- Main Application ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Multi-session agent server (JSON lines over TCP).")
+    parser.add_argument("--file", default=DATA_FILE_PATH)
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--max-concurrency", type=int, default=SERVER_MAX_CONCURRENCY)
+    parser.add_argument("--stub", action="store_true", help="use the offline stub LLM")
+    parser.add_argument("--embeddings", default=EMBEDDING_BACKEND, choices=["openai", "fake"])
+    parser.add_argument("--llm-cache", default=LLM_CACHE_MODE, choices=["off", "on", "replay"],
+                        help="'replay' serves recorded responses only and fails on anything else")
+    parser.add_argument("--verbose", action="store_true")
+    asyncio.run(main(parser.parse_args()))
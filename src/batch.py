@@ -0,0 +1,264 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+import hashlib
+import json
+import os
+import re
+import time
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel, Field
+
+from src.Tools.aggregate import DataFrameAggregateTool
+from src.Tools.currency import CurrencyEnum, CurrencyTool
+from src.Tools.filter import DataFrameFilterTool
+from src.Tools.output import ReportConfig, ReportGeneratorTool
+from src.fx_history import RateHistory, get_rate_history
+from src.fx_rates import RateProvider, get_rate_provider
+from src.ledger import get_shared_ledger_path, load_shared_ledger, map_shared_ledger
+from src.vector_store import get_file_hash
+from src.workspace import Workspace
+from src.constants import (DATA_FILE_PATH, BATCH_PARTITION_KEY, BATCH_WORKERS, BATCH_OUTPUT_DIR,
+                           BATCH_PROGRESS_FILE)
+
+class CurrencySpec(BaseModel):
+    """Arguments of the currency_tool 'merge_currencies' step."""
+    base_currency: CurrencyEnum = Field(..., description="Currency the rates are quoted against")
+    currency_column: str = Field(default="Para Birimi", description="Column with the currency code of each row")
+    money_columns: List[str] = Field(default_factory=lambda: ["Tutar", "Bakiye"], description="Columns to convert")
+    date_column: Optional[str] = Field(default=None, description="Convert at the rate of each row's date, e.g. 'Belge Tarihi'")
+    target_currencies: Optional[List[CurrencyEnum]] = Field(default=None, description="Currencies to convert into; [base_currency] if not set")
+
+
+class BatchSpec(BaseModel):
+    """
+    Report spec of a batch run, read from a JSON file. '{partition}' in the
+    title and summary is replaced by the partition value.
+    """
+    title: str = Field(..., description="Report title, e.g. 'Cari Ekstresi - {partition}'")
+    summary: str = Field(default="", description="Executive summary")
+    filter: Optional[str] = Field(default=None, description="Extra filter condition applied inside every partition")
+    group_by: List[str] = Field(default_factory=lambda: ["Para Birimi"], description="Columns of the aggregation table")
+    aggregation: str = Field(default="sum", description="Aggregation function of the table")
+    currency: Optional[CurrencySpec] = Field(default=None, description="Currency conversion before the aggregation; skipped if not set")
+    output_format: str = Field(default="comprehensive", description="'executive', 'comprehensive' or 'dashboard'")
+    max_table_rows: int = Field(default=0, description="Rows of each table in the report; 0 for all rows")
+    insights: List[str] = Field(default_factory=list)
+    recommendations: List[str] = Field(default_factory=list)
+
+    @property
+    def digest(self) -> str:
+        return hashlib.blake2b(json.dumps(self.model_dump(mode="json"), sort_keys=True).encode(), digest_size=8).hexdigest()
+
+
+def partition_slug(value: str) -> str:
+    """File name stem of a partition; values changed by the cleanup get a hash suffix so names stay unique."""
+    slug = re.sub(r"[^\w.-]+", "_", value).strip("._") or "partition"
+    if slug != value:
+        slug = f"{slug}-{hashlib.blake2b(value.encode(), digest_size=4).hexdigest()}"
+    return slug
+
+
+# --- progress log ---
+
+def read_progress(path: str) -> dict:
+    """Last record of every partition in the JSON lines log; a line cut off by a crash is ignored."""
+    records = {}
+    if not os.path.exists(path):
+        return records
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            records[record["partition"]] = record
+    return records
+
+
+def _append_progress(f, record: dict) -> None:
+    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def _is_done(record: Optional[dict], version: str, spec_digest: str) -> bool:
+    """Finished for the same ledger version and spec, and the report (if any) is still on disk."""
+    return (
+        record is not None
+        and record.get("version") == version
+        and record.get("spec") == spec_digest
+        and (record.get("status") == "empty"
+             or record.get("status") == "done" and os.path.exists(record.get("path", "")))
+    )
+
+
+# --- worker process ---
+
+_worker = {}
+
+
+def _init_worker(arrow_path: str, file_path: str, version: str, key: str, spec: dict, rates: Optional[dict],
+                 history: Optional[tuple]) -> None:
+    """
+    Runs once per worker process: maps the shared Arrow ledger, whose pages are
+    shared with every other worker. The rows of each partition come with its task.
+    """
+    if os.path.exists(arrow_path):
+        ledger = map_shared_ledger(arrow_path, version)
+    else:
+        ledger = load_shared_ledger(file_path)
+    _worker.update(
+        ledger=ledger,
+        key=key,
+        spec=BatchSpec(**spec),
+        rates=rates,
+        # rates were backfilled by the parent; the worker only reads the stored days
+        history=RateHistory(history[0], history_url=history[1]) if history else None,
+    )
+
+
+def _render_partition(value: str, rows: np.ndarray, output_path: str) -> dict:
+    """Filter -> currency -> aggregate -> report for one partition; returns the timing of every step."""
+    spec, key = _worker["spec"], _worker["key"]
+    stages = {}
+    started = time.perf_counter()
+    workspace = Workspace(_worker["ledger"])
+    view = workspace.add_view(rows, description=f"`{key}` == '{value}'")
+    if spec.filter:
+        view = DataFrameFilterTool(workspace=workspace).filter_view(spec.filter, view=view)
+    stages["filter"] = time.perf_counter() - started
+    if workspace.size(view) == 0:
+        # nothing to report, e.g. no open items; recorded so reruns skip it too
+        seconds = round(stages["filter"], 4)
+        return {"status": "empty", "rows": 0, "seconds": seconds, "stages": {"filter": seconds}}
+
+    if spec.currency is not None:
+        step = time.perf_counter()
+        currency = spec.currency
+        tool = CurrencyTool(workspace=workspace, base_currency=currency.base_currency, api_data=_worker["rates"],
+                            rate_history=_worker["history"])
+        result = tool._merge_currencies(None if currency.date_column else _worker["rates"], currency.currency_column,
+                                        currency.money_columns, view, currency.date_column, currency.target_currencies)
+        if not isinstance(result, pd.DataFrame):
+            raise RuntimeError(result)
+        stages["currency"] = time.perf_counter() - step
+
+    step = time.perf_counter()
+    table = DataFrameAggregateTool(workspace=workspace).aggregate_view(spec.group_by, spec.aggregation, view)
+    stages["aggregate"] = time.perf_counter() - step
+
+    step = time.perf_counter()
+    count = workspace.size(view)
+    ReportGeneratorTool(workspace=workspace, report_dir=os.path.dirname(output_path)).write_report(ReportConfig(
+        title=spec.title.replace("{partition}", value),
+        summary=spec.summary.replace("{partition}", value),
+        metrics={key: value, "Records": count},
+        tables=[view, table],
+        insights=spec.insights,
+        recommendations=spec.recommendations,
+        output_format=spec.output_format,
+        max_table_rows=spec.max_table_rows,
+        file_name=os.path.basename(output_path),
+    ))
+    stages["report"] = time.perf_counter() - step
+    return {"status": "done", "rows": count, "seconds": round(time.perf_counter() - started, 4),
+            "stages": {name: round(seconds, 4) for name, seconds in stages.items()}}
+
+
+def _run_partition(value: str, rows: np.ndarray, output_path: str) -> dict:
+    try:
+        return _render_partition(value, rows, output_path)
+    except Exception as e:
+        return {"status": "failed", "error": str(e)}
+
+
+# --- parent process ---
+
+def _prepare_rates(spec: BatchSpec, ledger: pd.DataFrame, rate_provider: RateProvider = None,
+                   rate_history: RateHistory = None):
+    """
+    Fetch the rates once before the workers start: latest rates are handed to
+    every worker, historical ones are backfilled for the ledger's whole date
+    range and read by the workers from the history file.
+    """
+    currency = spec.currency
+    if currency is None:
+        return None, None
+    if currency.date_column:
+        history = rate_history or get_rate_history()
+        dates = pd.to_datetime(ledger[currency.date_column]).dropna()
+        if len(dates):
+            history.backfill(currency.base_currency, dates.min(), dates.max())
+        return None, (history.path, history.history_url)
+    return (rate_provider or get_rate_provider()).get_rates(currency.base_currency.value), None
+
+
+def run_batch(file_path: str, spec: BatchSpec, key: str = BATCH_PARTITION_KEY, out_dir: str = BATCH_OUTPUT_DIR,
+              workers: int = BATCH_WORKERS, progress_path: str = None, rate_provider: RateProvider = None,
+              rate_history: RateHistory = None) -> dict:
+    """
+    Write one report per value of `key` to out_dir in a process pool. The
+    ledger is loaded once into the shared Arrow copy that every worker maps.
+    Each finished partition is appended to the progress log with its timings;
+    partitions already done for the same ledger version and spec are skipped.
+    """
+    started = time.perf_counter()
+    os.makedirs(out_dir, exist_ok=True)
+    progress_path = progress_path or os.path.join(out_dir, BATCH_PROGRESS_FILE)
+
+    ledger = load_shared_ledger(file_path)
+    if key not in ledger.columns:
+        raise ValueError(f"Partition key '{key}' not found. Available columns: {list(ledger.columns)}")
+    version = get_file_hash(file_path)
+    # base rows of every partition, found once here; each task is sent only its own rows
+    partitions = {str(value): rows for value, rows in ledger.groupby(key, observed=True).indices.items()}
+    values = sorted(partitions)
+
+    progress = read_progress(progress_path)
+    pending = [value for value in values if not _is_done(progress.get(value), version, spec.digest)]
+    summary = {"partitions": len(values), "skipped": len(values) - len(pending), "done": 0, "empty": 0, "failed": 0}
+    print(f"Batch: {len(values)} partitions by '{key}', {summary['skipped']} already done, {len(pending)} to render")
+    if pending:
+        rates, history = _prepare_rates(spec, ledger, rate_provider, rate_history)
+        initargs = (get_shared_ledger_path(file_path), file_path, version, key, spec.model_dump(mode="json"), rates, history)
+        paths = {value: os.path.join(out_dir, f"{partition_slug(value)}.md") for value in pending}
+        with ProcessPoolExecutor(max_workers=max(1, min(workers, len(pending))), initializer=_init_worker,
+                                 initargs=initargs) as pool, open(progress_path, "a", encoding="utf-8") as log:
+            futures = {pool.submit(_run_partition, value, partitions[value], paths[value]): value for value in pending}
+            for future in as_completed(futures):
+                value = futures[future]
+                record = {"partition": value, "path": paths[value], "version": version, "spec": spec.digest,
+                          **future.result(), "finished_at": datetime.now().isoformat(timespec="seconds")}
+                _append_progress(log, record)
+                summary[record["status"]] += 1
+                if record["status"] == "done":
+                    print(f"Batch: {value}: {record['rows']} rows in {record['seconds']:.2f}s -> {record['path']}")
+                elif record["status"] == "empty":
+                    print(f"Batch: {value}: no rows, no report")
+                else:
+                    print(f"Batch: {value}: failed: {record['error']}")
+
+    summary["seconds"] = round(time.perf_counter() - started, 2)
+    print(f"Batch: {summary['done']} written, {summary['empty']} empty, {summary['skipped']} skipped, {summary['failed']} failed "
+          f"in {summary['seconds']:.2f}s; progress in {progress_path}")
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write one report per partition of the ledger (headless batch mode).")
+    parser.add_argument("--spec", required=True, help="JSON report spec (see BatchSpec)")
+    parser.add_argument("--file", default=DATA_FILE_PATH)
+    parser.add_argument("--by", default=BATCH_PARTITION_KEY, help="partition key, e.g. 'Cari Kodu' or 'Cari Tipi'")
+    parser.add_argument("--out-dir", default=BATCH_OUTPUT_DIR)
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS)
+    parser.add_argument("--progress", default=None, help=f"progress log; <out-dir>/{BATCH_PROGRESS_FILE} if not set")
+    args = parser.parse_args()
+    with open(args.spec, encoding="utf-8") as f:
+        batch_spec = BatchSpec(**json.load(f))
+    result = run_batch(args.file, batch_spec, key=args.by, out_dir=args.out_dir, workers=args.workers,
+                       progress_path=args.progress)
+    raise SystemExit(1 if result["failed"] else 0)
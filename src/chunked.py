@@ -0,0 +1,143 @@
+import hashlib
+import threading
+
+import numpy as np
+import pandas as pd
+
+from src.filter_engine import evaluate_condition
+from src.ledger import iter_ledger_chunks
+from src.parallel_agg import PARALLEL_FUNCTIONS, finalize_partial, measure_columns, merge_partials, partial_aggregate
+from src.rollup import groupers
+from src.vector_store import get_file_hash
+from src.workspace import BASE_VIEW, Workspace
+from src.constants import STREAM_CHUNK_ROWS
+
+
+class ChunkedWorkspace(Workspace):
+    """
+    Out-of-core Workspace for ledgers that do not fit in memory.
+    Nothing is loaded up front: a view is the chain of standardized filter
+    conditions leading to it, and every operation streams the ledger chunk by
+    chunk (Parquet row groups or CSV chunks), applying the conditions and
+    folding the rows into mergeable aggregate state. Memory stays bounded by
+    one chunk plus that state.
+    """
+
+    def __init__(self, file_path: str, chunk_size: int = STREAM_CHUNK_ROWS):
+        self.file_path = file_path
+        self.chunk_size = chunk_size
+        self._base = None
+        self._load_base = None
+        self.active = BASE_VIEW
+        self._version = get_file_hash(file_path)
+        self._views = {BASE_VIEW: {"conditions": [], "parent": None, "description": "full dataset", "columns": {}, "key": BASE_VIEW}}
+        self._tables = {}
+        self._counter = 0
+        self.lock = threading.RLock()
+        sample = next(iter_ledger_chunks(file_path, 1), None)
+        self._columns = [] if sample is None else list(sample.columns)
+        print(f"ChunkedWorkspace: Streaming {file_path} in chunks of {chunk_size} rows")
+
+    @property
+    def version(self) -> str:
+        return self._version
+
+    def chunks(self, name: str = None):
+        """Rows of a view, one filtered chunk at a time."""
+        conditions = self._view(name)["conditions"]
+        for chunk in iter_ledger_chunks(self.file_path, self.chunk_size):
+            for condition in conditions:
+                if chunk.empty:
+                    break
+                chunk = chunk[evaluate_condition(chunk, condition)]
+            yield chunk
+
+    def add_view(self, condition: str, parent: str = BASE_VIEW, description: str = "", name: str = None) -> str:
+        """Register a filter condition on top of the parent view's conditions and make it active."""
+        conditions = self._view(parent)["conditions"] + [condition]
+        name = name or self._next_name("view")
+        key = hashlib.blake2b("\n".join(conditions).encode(), digest_size=16).hexdigest()
+        self._views[name] = {"conditions": conditions, "parent": parent, "description": description, "columns": {}, "key": key}
+        self.active = name
+        return name
+
+    def rows(self, name: str = None):
+        raise ValueError("Streaming views keep no row positions.")
+
+    def size(self, name: str = None) -> int:
+        view = self._view(name)
+        if "size" not in view:
+            view["size"] = sum(len(chunk) for chunk in self.chunks(name))
+        return view["size"]
+
+    def columns(self, name: str = None) -> list:
+        return list(self._columns)
+
+    def column(self, col: str, name: str = None) -> pd.Series:
+        raise ValueError("Streaming mode cannot gather a whole column; aggregate it instead.")
+
+    def add_column(self, col: str, values, name: str = None) -> None:
+        raise ValueError("Streaming mode does not support derived columns.")
+
+    def frame(self, name: str = None, columns: list = None, limit: int = None) -> pd.DataFrame:
+        """First `limit` rows of a view; a streaming view is never materialized whole."""
+        if limit is None:
+            raise ValueError("Streaming mode keeps no full frame in memory; aggregate the view or preview it with a row limit.")
+        parts, count = [], 0
+        for chunk in self.chunks(name):
+            parts.append(chunk.head(limit - count))
+            count += len(parts[-1])
+            if count >= limit:
+                break
+        result = pd.concat(parts) if parts else pd.DataFrame(columns=self._columns)
+        return result if columns is None else result[columns]
+
+    def iter_frame(self, name: str = None, columns: list = None, chunk_rows: int = None):
+        """Tables as in Workspace; a streaming view comes in its filtered ledger chunks."""
+        if name in self._tables:
+            yield from super().iter_frame(name, columns, chunk_rows or self.chunk_size)
+            return
+        for chunk in self.chunks(name):
+            if not chunk.empty:
+                yield chunk if columns is None else chunk[columns]
+
+    def value_counts(self, col: str, name: str = None, normalize: bool = False) -> pd.Series:
+        """Frequency of every value of a column in a view, summed chunk by chunk, most frequent first."""
+        if col not in self._columns:
+            raise KeyError(f"Column '{col}' not found. Available columns: {self._columns}")
+        counts = None
+        for chunk in self.chunks(name):
+            part = chunk[col].value_counts()
+            counts = part if counts is None else counts.add(part, fill_value=0)
+        if counts is None:
+            return pd.Series(dtype="int64", name="count")
+        counts = counts.astype("int64").sort_values(ascending=False)
+        return counts / counts.sum() if normalize else counts
+
+    def aggregate(self, group_by: list, function: str, name: str = None):
+        """
+        group_by + aggregation of a view in one pass over the chunks.
+        Each chunk is reduced to partials (sum, count, min, max; mean as sum/count)
+        that are merged into the running state. Without group_by the result is a
+        Series per column, like DataFrame.agg.
+        """
+        if not isinstance(function, str) or function not in PARALLEL_FUNCTIONS:
+            raise ValueError(f"Streaming mode supports the aggregations {PARALLEL_FUNCTIONS}, not {function!r}.")
+        state = None
+        for chunk in self.chunks(name):
+            if chunk.empty:
+                continue
+            columns = measure_columns(chunk, group_by, function)
+            if columns is None:
+                raise ValueError(f"'{function}' over non-numeric columns is not supported in streaming mode.")
+            keys = groupers(chunk, group_by) if group_by else np.zeros(len(chunk), dtype=np.int8)
+            values = chunk[columns]
+            if function in ("sum", "mean"):
+                # float32 money columns are summed in float64 across chunks
+                values = values.astype({col: "float64" for col in columns if values[col].dtype.kind == "f"})
+            part = partial_aggregate(values.groupby(keys, observed=True), function)
+            state = part if state is None else merge_partials([state, part], function)
+        if state is None:
+            return pd.DataFrame()
+        result = finalize_partial(state, function)
+        return result if group_by else result.iloc[0]
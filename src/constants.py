@@ -1,3 +1,5 @@
+import os
+
 # AI_MODEL = "gpt-4.1-nano"
 AI_MODEL = "o4-mini"
 request_date = "data/api_req_date.json"
@@ -5,4 +7,94 @@ request_date = "data/api_req_date.json"
 DATA_FILE_PATH = "data/cari_hesap_hareketleri.csv"
 
 # max rows to send to agent if df too big (utils.check_shrink_df)
-MAX_ROWS = 10 
\ No newline at end of file
+MAX_ROWS = 10 
+
+# typed columnar copy of the ledger, one file per source hash (ledger.load_ledger)
+LEDGER_CACHE_PREFIX = "./ledger_cache_"
+
+# size/mtime/hash of tracked files, lets get_file_hash skip unchanged files
+FILE_MANIFEST_PATH = "./file_manifest.json"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# single persistent Chroma store, updated row by row (vector_store.get_vectorstore)
+VECTOR_STORE_DIR = "./chroma_db"
+# rows written to the store between progress checkpoints
+SYNC_CHECKPOINT_SIZE = 4000
+
+# embedding pipeline (embeddings.CachedEmbeddings); EMBEDDING_BACKEND is "openai" or "fake"
+EMBEDDING_BACKEND = "openai"
+EMBEDDING_CACHE_PATH = "./embedding_cache.sqlite"
+EMBED_BATCH_SIZE = 256
+EMBED_CONCURRENCY = 4
+EMBED_MAX_RETRIES = 3
+
+# memory bound of the shared filter result cache (Tools/filter.py)
+FILTER_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# memory bound of the shared aggregation result cache (Tools/aggregate.py)
+AGGREGATION_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# parallel partitioned group-by (parallel_agg.py): frames below the threshold stay serial
+PARALLEL_AGG_MIN_ROWS = 2_000_000
+PARALLEL_AGG_WORKERS = os.cpu_count() or 1
+
+# out-of-core mode (chunked.ChunkedWorkspace): ledgers larger than STREAMING_FILE_BYTES
+# are read in chunks of STREAM_CHUNK_ROWS rows instead of being loaded whole
+STREAMING_FILE_BYTES = 4 * 1024 ** 3
+STREAM_CHUNK_ROWS = 500_000
+
+# chat model: "openai" or the offline "stub" (stub_llm.StubChatModel)
+LLM_BACKEND = "openai"
+
+# chat model response cache (llm_cache.LLMResponseCache); LLM_CACHE_MODE is "off", "on" or "replay"
+LLM_CACHE_MODE = "on"
+LLM_CACHE_PATH = "./llm_cache.sqlite"
+LLM_CACHE_TTL = 30 * 24 * 3600
+LLM_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# conversation memory (memory.BoundedSummaryMemory): tokens of verbatim recent turns,
+# of the running summary of older turns, and of one stored message before its tables
+# are replaced by references to workspace views
+MEMORY_TOKEN_BUDGET = 3000
+MEMORY_SUMMARY_TOKENS = 600
+MEMORY_MAX_MESSAGE_TOKENS = 400
+
+# multi-session agent server (server.py)
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8765
+# agent turns running at the same time; further requests wait
+SERVER_MAX_CONCURRENCY = 8
+# sessions kept; the least recently used one is dropped beyond this
+SERVER_MAX_SESSIONS = 100
+
+# threads running blocking tool work for async agents (Tools/base.py)
+TOOL_THREADS = 8
+# timeout in seconds of the currency API request
+CURRENCY_API_TIMEOUT = 10
+
+# exchange rates (fx_rates.RateProvider): rates are reused for FX_RATE_TTL seconds and
+# stored in request_date as a fallback; failed requests are retried with backoff
+FX_API_URL = "https://api.freecurrencyapi.com/v1/latest"
+FX_CURRENCIES = ["EUR", "USD", "TRY"]
+FX_RATE_TTL = 12 * 3600
+FX_MAX_RETRIES = 3
+# daily rates for conversion at document dates (fx_history.RateHistory), fetched in
+# range requests of at most FX_HISTORY_MAX_DAYS days
+FX_HISTORY_URL = "https://api.freecurrencyapi.com/v1/historical"
+FX_HISTORY_PATH = "./fx_history.parquet"
+FX_HISTORY_MAX_DAYS = 365
+
+# report files (Tools/output.py); view rows are rendered REPORT_CHUNK_ROWS at a time
+REPORT_DIR = "./reports"
+REPORT_CHUNK_ROWS = 10_000
+# headless batch reports (batch.py): one report per value of BATCH_PARTITION_KEY, rendered
+# in BATCH_WORKERS processes; finished partitions are logged in BATCH_PROGRESS_FILE in the
+# output directory so a rerun skips them
+BATCH_PARTITION_KEY = "Cari Kodu"
+BATCH_WORKERS = os.cpu_count() or 1
+BATCH_OUTPUT_DIR = "./reports/batch"
+BATCH_PROGRESS_FILE = "progress.jsonl"
+
+# prompt tokens allowed per tool output (serialize.py); tools take 'max_tokens' per call
+TOOL_OUTPUT_TOKEN_BUDGET = 1500
+TOKENIZER_ENCODING = "o200k_base"
@@ -0,0 +1,129 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from array import array
+import hashlib
+import sqlite3
+import threading
+import time
+
+from langchain_core.embeddings import DeterministicFakeEmbedding, Embeddings
+from langchain_openai import OpenAIEmbeddings
+
+from src.constants import (
+    EMBEDDING_BACKEND,
+    EMBEDDING_CACHE_PATH,
+    EMBED_BATCH_SIZE,
+    EMBED_CONCURRENCY,
+    EMBED_MAX_RETRIES,
+)
+
+
+class LocalFakeEmbeddings(DeterministicFakeEmbedding):
+    """Deterministic offline embeddings; latency simulates an API round trip per call."""
+    latency: float = 0.0
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        if self.latency:
+            time.sleep(self.latency)
+        return super().embed_documents(texts)
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that batches, parallelizes and caches calls to an underlying model.
+    Vectors are stored in SQLite by text hash, so identical texts and re-runs are never
+    embedded twice. Each finished batch is written immediately, so an interrupted run
+    resumes from the cache.
+    """
+
+    def __init__(self, underlying: Embeddings, cache_path: str = EMBEDDING_CACHE_PATH,
+                 batch_size: int = EMBED_BATCH_SIZE, max_concurrency: int = EMBED_CONCURRENCY,
+                 max_retries: int = EMBED_MAX_RETRIES):
+        self.underlying = underlying
+        self.namespace = getattr(underlying, "model", None) or type(underlying).__name__
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(cache_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "namespace TEXT, text_hash TEXT, vector BLOB, PRIMARY KEY (namespace, text_hash))"
+        )
+        self._conn.commit()
+
+    def _lookup(self, hashes: list[str]) -> dict[str, list[float]]:
+        found = {}
+        with self._lock:
+            for start in range(0, len(hashes), 500):
+                part = hashes[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE namespace = ? "
+                    f"AND text_hash IN ({','.join('?' * len(part))})",
+                    [self.namespace, *part],
+                ).fetchall()
+                for text_hash, blob in rows:
+                    found[text_hash] = array("f", blob).tolist()
+        return found
+
+    def _store(self, hashes: list[str], vectors: list[list[float]]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)",
+                [(self.namespace, h, array("f", v).tobytes()) for h, v in zip(hashes, vectors)],
+            )
+            self._conn.commit()
+
+    def _embed_batch(self, texts: list[str]) -> list[list[float]]:
+        """Embed one batch, retrying with exponential backoff."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self.underlying.embed_documents(texts)
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = 2 ** attempt
+                print(f"Embeddings: Batch failed ({e}), retrying in {delay}s...")
+                time.sleep(delay)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        hashes = [_text_hash(text) for text in texts]
+        vectors = self._lookup(list(dict.fromkeys(hashes)))
+        self.hits += sum(1 for h in hashes if h in vectors)
+
+        missing = {}
+        for h, text in zip(hashes, texts):
+            if h not in vectors:
+                missing.setdefault(h, text)
+        self.misses += len(missing)
+
+        pending = list(missing.items())
+        batches = [pending[i:i + self.batch_size] for i in range(0, len(pending), self.batch_size)]
+        if batches:
+            print(f"Embeddings: Embedding {len(pending)} texts in {len(batches)} batches "
+                  f"({len(texts) - len(pending)} cached)")
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            futures = {pool.submit(self._embed_batch, [text for _, text in batch]): batch for batch in batches}
+            for done, future in enumerate(as_completed(futures), 1):
+                batch_hashes = [h for h, _ in futures[future]]
+                batch_vectors = future.result()
+                self._store(batch_hashes, batch_vectors)
+                vectors.update(zip(batch_hashes, batch_vectors))
+                print(f"Embeddings: {done}/{len(batches)} batches done")
+
+        return [vectors[h] for h in hashes]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+
+def get_embeddings(backend: str = EMBEDDING_BACKEND) -> CachedEmbeddings:
+    """Build the cached embedding pipeline for 'openai' or the offline 'fake' backend."""
+    if backend == "fake":
+        return CachedEmbeddings(LocalFakeEmbeddings(size=1536))
+    return CachedEmbeddings(OpenAIEmbeddings())
@@ -0,0 +1,324 @@
+from collections import OrderedDict
+import ast
+import operator
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+from src.lexical_index import turkish_fold
+from src.utils import dataset_version
+
+# Engines (and their indexes) kept alive per dataset version.
+MAX_ENGINES = 4
+_ENGINES = OrderedDict()
+_ENGINE_LOCK = threading.Lock()
+
+_LITERAL_RE = re.compile(r"('(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\")")
+_BACKTICK_RE = re.compile(r"`([^`]*)`")
+_REGEX_CHARS = re.compile(r"[.^$*+?{}\[\]\\|()]")
+
+_FLIPPED = {ast.Lt: ast.Gt, ast.LtE: ast.GtE, ast.Gt: ast.Lt, ast.GtE: ast.LtE, ast.Eq: ast.Eq, ast.NotEq: ast.NotEq}
+
+
+class UnsupportedCondition(Exception):
+    """The condition uses syntax the engine does not index; the caller falls back to DataFrame.query."""
+
+
+class SortedIndex:
+    """Row positions ordered by value, for binary-searched range predicates on numbers and dates."""
+
+    def __init__(self, series: pd.Series):
+        self.is_datetime = pd.api.types.is_datetime64_any_dtype(series)
+        if self.is_datetime:
+            values = series.to_numpy(dtype="datetime64[ns]")
+            valid = ~np.isnat(values)
+            values = values.view("i8")
+        else:
+            values = series.to_numpy()
+            valid = ~pd.isna(values)
+        self.dtype = values.dtype
+        self.is_float = np.issubdtype(self.dtype, np.floating)
+        positions = np.flatnonzero(valid)
+        order = np.argsort(values[positions], kind="stable")
+        self.positions = positions[order]
+        self.values = values[positions][order]
+
+    def _key(self, value):
+        if self.is_datetime:
+            return pd.Timestamp(value).value
+        if isinstance(value, str) or isinstance(value, bool):
+            raise UnsupportedCondition(f"Cannot compare a numeric column with {value!r}")
+        return np.asarray(value).astype(self.dtype) if self.is_float else value
+
+    def _slice(self, lo: int, hi: int) -> np.ndarray:
+        return self.positions[lo:hi]
+
+    def compare(self, op, value) -> np.ndarray:
+        key = self._key(value)
+        if op is ast.Eq:
+            if self.is_float:
+                tol = abs(float(key)) * np.finfo(self.dtype).eps * 8
+                return self._slice(np.searchsorted(self.values, key - tol, "left"),
+                                   np.searchsorted(self.values, key + tol, "right"))
+            return self._slice(np.searchsorted(self.values, key, "left"), np.searchsorted(self.values, key, "right"))
+        if op is ast.Lt:
+            return self._slice(0, np.searchsorted(self.values, key, "left"))
+        if op is ast.LtE:
+            return self._slice(0, np.searchsorted(self.values, key, "right"))
+        if op is ast.Gt:
+            return self._slice(np.searchsorted(self.values, key, "right"), len(self.values))
+        if op is ast.GtE:
+            return self._slice(np.searchsorted(self.values, key, "left"), len(self.values))
+        raise UnsupportedCondition(f"Unsupported operator {op.__name__}")
+
+
+class CategoryIndex:
+    """Hash index from each distinct value to its row positions, plus case-folded values for contains()."""
+
+    def __init__(self, series: pd.Series):
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            self.codes = series.cat.codes.to_numpy()
+            self.uniques = np.asarray(series.cat.categories.astype(str), dtype=object)
+        else:
+            codes, uniques = pd.factorize(series)
+            self.codes = codes
+            self.uniques = np.asarray(pd.Index(uniques).astype(str), dtype=object)
+        self.lookup = {value: code for code, value in enumerate(self.uniques)}
+        order = np.argsort(self.codes, kind="stable")
+        counts = np.bincount(self.codes[order][self.codes[order] >= 0], minlength=len(self.uniques))
+        start = np.searchsorted(self.codes[order], 0, "left")
+        self.order = order
+        self.bounds = start + np.concatenate([[0], np.cumsum(counts)])
+        self._folded = None
+
+    @property
+    def folded(self) -> np.ndarray:
+        if self._folded is None:
+            self._folded = np.array([turkish_fold(value) for value in self.uniques], dtype=object)
+        return self._folded
+
+    def rows_for_codes(self, codes) -> np.ndarray:
+        parts = [self.order[self.bounds[code]:self.bounds[code + 1]] for code in codes]
+        return np.concatenate(parts) if parts else np.array([], dtype=np.int64)
+
+    def equals(self, values) -> np.ndarray:
+        return self.rows_for_codes([self.lookup[str(v)] for v in values if str(v) in self.lookup])
+
+    def contains(self, pattern: str, case: bool = True) -> np.ndarray:
+        if case:
+            matches = [code for code, value in enumerate(self.uniques) if pattern in value]
+        else:
+            folded = turkish_fold(pattern)
+            matches = [code for code, value in enumerate(self.folded) if folded in value]
+        return self.rows_for_codes(matches)
+
+    def startswith(self, pattern: str) -> np.ndarray:
+        return self.rows_for_codes([code for code, value in enumerate(self.uniques) if value.startswith(pattern)])
+
+
+class FilterEngine:
+    """
+    Evaluates filter conditions against per-column indexes built on first use.
+    Comparisons on numbers/dates use SortedIndex, equality and contains() on text or
+    categorical columns use CategoryIndex; predicates are combined as boolean masks.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.row_count = len(df)
+        self._sorted = {}
+        self._categories = {}
+
+    def _sorted_index(self, column: str) -> SortedIndex:
+        if column not in self._sorted:
+            self._sorted[column] = SortedIndex(self.df[column])
+        return self._sorted[column]
+
+    def _category_index(self, column: str) -> CategoryIndex:
+        if column not in self._categories:
+            self._categories[column] = CategoryIndex(self.df[column])
+        return self._categories[column]
+
+    def _is_ordered(self, column: str) -> bool:
+        dtype = self.df[column].dtype
+        return (pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)) \
+            or pd.api.types.is_datetime64_any_dtype(dtype)
+
+    def _mask(self, rows: np.ndarray) -> np.ndarray:
+        mask = np.zeros(self.row_count, dtype=bool)
+        mask[rows] = True
+        return mask
+
+    def parse(self, condition: str) -> tuple[ast.expr, list[str]]:
+        """Parse a standardized condition into a Python AST with columns replaced by placeholders."""
+        columns = []
+
+        def placeholder(match):
+            name = match.group(1)
+            if name not in self.df.columns:
+                raise UnsupportedCondition(f"Unknown column {name!r}")
+            columns.append(name)
+            return f"__col{len(columns) - 1}"
+
+        parts = _LITERAL_RE.split(condition)
+        close_contains = False
+        for i in range(0, len(parts), 2):
+            code = _BACKTICK_RE.sub(placeholder, parts[i])
+            code = re.sub(r"(?<![\w.])([A-Za-z_]\w*)\b", lambda m: self._bare_column(m, columns), code)
+            if close_contains:
+                code = ")" + code
+            # infix form `Col contains 'text'` -> __contains__(Col, 'text')
+            code, close_contains = re.subn(r"(__col\d+)\s+contains\s*$", r"__contains__(\1, ", code)
+            parts[i] = code
+        try:
+            tree = ast.parse("".join(parts), mode="eval")
+        except SyntaxError as e:
+            raise UnsupportedCondition(str(e))
+        return tree.body, columns
+
+    def _bare_column(self, match, columns) -> str:
+        name = match.group(1)
+        if name.startswith("__col") or name not in self.df.columns:
+            return name
+        columns.append(name)
+        return f"__col{len(columns) - 1}"
+
+    def evaluate(self, condition: str) -> np.ndarray:
+        """Boolean mask of the rows matching the condition."""
+        node, columns = self.parse(condition)
+        return self._eval(node, columns)
+
+    def _column(self, node, columns) -> str:
+        if isinstance(node, ast.Name) and node.id.startswith("__col"):
+            return columns[int(node.id[5:])]
+        raise UnsupportedCondition("Expected a column")
+
+    def _literal(self, node):
+        try:
+            return ast.literal_eval(node)
+        except ValueError:
+            raise UnsupportedCondition("Expected a literal value")
+
+    def _eval(self, node, columns) -> np.ndarray:
+        if isinstance(node, ast.BoolOp):
+            combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+            masks = [self._eval(value, columns) for value in node.values]
+            result = masks[0]
+            for mask in masks[1:]:
+                result = combine(result, mask)
+            return result
+        if isinstance(node, ast.BinOp) and isinstance(node.op, (ast.BitAnd, ast.BitOr)):
+            combine = operator.and_ if isinstance(node.op, ast.BitAnd) else operator.or_
+            return combine(self._eval(node.left, columns), self._eval(node.right, columns))
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.Not, ast.Invert)):
+            return ~self._eval(node.operand, columns)
+        if isinstance(node, ast.Compare):
+            return self._eval_compare(node, columns)
+        if isinstance(node, ast.Call):
+            return self._eval_call(node, columns)
+        raise UnsupportedCondition(f"Unsupported expression {type(node).__name__}")
+
+    def _eval_compare(self, node, columns) -> np.ndarray:
+        result = None
+        left = node.left
+        for op, right in zip(node.ops, node.comparators):
+            if isinstance(left, ast.Name):
+                column, value, op_type = self._column(left, columns), self._literal(right), type(op)
+            elif isinstance(right, ast.Name):
+                column, value = self._column(right, columns), self._literal(left)
+                if type(op) not in _FLIPPED:
+                    raise UnsupportedCondition("Unsupported comparison")
+                op_type = _FLIPPED[type(op)]
+            else:
+                raise UnsupportedCondition("Comparison without a column")
+            mask = self._compare(column, op_type, value)
+            result = mask if result is None else result & mask
+            left = right
+        return result
+
+    def _compare(self, column: str, op, value) -> np.ndarray:
+        if op in (ast.In, ast.NotIn):
+            if not isinstance(value, (list, tuple, set)):
+                raise UnsupportedCondition("'in' needs a list")
+            mask = self._isin(column, list(value))
+            return ~mask if op is ast.NotIn else mask
+        if self._is_ordered(column):
+            if op is ast.NotEq:
+                return ~self._mask(self._sorted_index(column).compare(ast.Eq, value))
+            return self._mask(self._sorted_index(column).compare(op, value))
+        if op in (ast.Eq, ast.NotEq):
+            mask = self._mask(self._category_index(column).equals([value]))
+            return ~mask if op is ast.NotEq else mask
+        raise UnsupportedCondition(f"Unsupported operator on text column {column!r}")
+
+    def _isin(self, column: str, values: list) -> np.ndarray:
+        if self._is_ordered(column):
+            index = self._sorted_index(column)
+            return self._mask(np.concatenate([index.compare(ast.Eq, v) for v in values] or [np.array([], dtype=np.int64)]))
+        return self._mask(self._category_index(column).equals(values))
+
+    def _eval_call(self, node, columns) -> np.ndarray:
+        kwargs = {kw.arg: self._literal(kw.value) for kw in node.keywords}
+
+        if isinstance(node.func, ast.Name) and node.func.id == "__contains__":
+            column = self._column(node.args[0], columns)
+            return self._contains(column, str(self._literal(node.args[1])), case=False, regex=False)
+
+        func = node.func
+        if not isinstance(func, ast.Attribute):
+            raise UnsupportedCondition("Unsupported function call")
+        args = [self._literal(arg) for arg in node.args]
+
+        if func.attr == "isin":
+            return self._isin(self._column(func.value, columns), list(args[0]))
+        if func.attr == "between":
+            column = self._column(func.value, columns)
+            if kwargs.get("inclusive", "both") != "both":
+                raise UnsupportedCondition("Only inclusive='both' is indexed")
+            return self._compare(column, ast.GtE, args[0]) & self._compare(column, ast.LtE, args[1])
+        if isinstance(func.value, ast.Attribute) and func.value.attr == "str":
+            column = self._column(func.value.value, columns)
+            if func.attr == "contains":
+                case = args[1] if len(args) > 1 else kwargs.get("case", True)
+                regex = args[3] if len(args) > 3 else kwargs.get("regex", True)
+                return self._contains(column, str(args[0]), case=case, regex=regex)
+            if func.attr == "startswith" and not self._is_ordered(column):
+                return self._mask(self._category_index(column).startswith(str(args[0])))
+        raise UnsupportedCondition(f"Unsupported method {func.attr!r}")
+
+    def _contains(self, column: str, pattern: str, case: bool, regex: bool) -> np.ndarray:
+        if self._is_ordered(column) or (regex and _REGEX_CHARS.search(pattern)):
+            raise UnsupportedCondition("contains() needs a plain text pattern on a text column")
+        return self._mask(self._category_index(column).contains(pattern, case=case))
+
+
+def get_engine(df: pd.DataFrame) -> FilterEngine:
+    """Shared engine for a dataset version, so its indexes are built once."""
+    key = (dataset_version(df), len(df))
+    with _ENGINE_LOCK:
+        engine = _ENGINES.get(key)
+        if engine is None:
+            engine = FilterEngine(df)
+            _ENGINES[key] = engine
+            if len(_ENGINES) > MAX_ENGINES:
+                _ENGINES.popitem(last=False)
+        else:
+            _ENGINES.move_to_end(key)
+    return engine
+
+
+def evaluate_condition(df: pd.DataFrame, condition: str, engine: FilterEngine = None) -> np.ndarray:
+    """
+    Boolean mask of a standardized condition over df: answered by the index
+    engine when it understands the condition, otherwise by DataFrame.eval.
+    """
+    try:
+        return (engine or FilterEngine(df)).evaluate(condition)
+    except (UnsupportedCondition, TypeError, ValueError) as e:
+        print(f"FilterEngine: Index engine cannot evaluate condition ({e}), using DataFrame.query")
+        mask = df.eval(condition)
+        if not isinstance(mask, pd.Series) or not pd.api.types.is_bool_dtype(mask):
+            raise ValueError("Condition must evaluate to True/False for every row.")
+        return mask.to_numpy(dtype=bool, na_value=False)
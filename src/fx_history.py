@@ -0,0 +1,163 @@
+from datetime import date, timedelta
+import os
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+
+from src.fx_rates import RateProvider, get_rate_provider
+from src.constants import FX_HISTORY_PATH, FX_HISTORY_URL, FX_HISTORY_MAX_DAYS
+
+
+def _missing_ranges(needed: pd.DatetimeIndex, stored: pd.DatetimeIndex, max_days: int) -> list:
+    """Runs of consecutive missing days as (first, last) pairs of at most max_days days."""
+    missing = needed.difference(stored)
+    if missing.empty:
+        return []
+    breaks = np.flatnonzero(np.diff(missing.asi8) != pd.Timedelta(days=1).value) + 1
+    ranges = []
+    for run in np.split(missing, breaks):
+        for start in range(0, len(run), max_days):
+            part = run[start:start + max_days]
+            ranges.append((part[0], part[-1]))
+    return ranges
+
+
+class RateHistory:
+    """
+    Daily exchange rates per (base, quote) pair, kept in a Parquet file with
+    columns date, base, quote and rate, so each day is requested only once.
+
+    rates() converts whole columns with an as-of join: for every currency the
+    row dates are looked up in that pair's sorted dates with np.searchsorted,
+    so a row gets the rate of its day, or of the last earlier day with a rate
+    (weekends, today). Days missing from the table are fetched first in bulk
+    range requests of at most `max_days` days through the provider's pooled,
+    retrying session.
+    """
+
+    def __init__(self, path: str = FX_HISTORY_PATH, provider: RateProvider = None,
+                 history_url: str = FX_HISTORY_URL, max_days: int = FX_HISTORY_MAX_DAYS):
+        self.path = path
+        self.provider = provider
+        self.history_url = history_url
+        self.max_days = max_days
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._pairs = {}  # (base, quote) -> (sorted dates as int64 ns, rates)
+        if os.path.exists(path):
+            table = pd.read_parquet(path)
+            self._index(table)
+            print(f"RateHistory: Loaded {len(table)} daily rates from {path}")
+        else:
+            self._table = pd.DataFrame({"date": pd.Series(dtype="datetime64[ns]"), "base": pd.Series(dtype="category"),
+                                        "quote": pd.Series(dtype="category"), "rate": pd.Series(dtype="float64")})
+
+    def _index(self, table: pd.DataFrame) -> None:
+        table = table.sort_values(["base", "quote", "date"], ignore_index=True)
+        self._table = table
+        self._pairs = {
+            (str(base), str(quote)): (group["date"].to_numpy("datetime64[ns]").astype(np.int64), group["rate"].to_numpy())
+            for (base, quote), group in table.groupby(["base", "quote"], observed=True)
+        }
+
+    def _write(self) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".fx_history_", suffix=".parquet")
+        os.close(fd)
+        try:
+            self._table.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    def _provider(self) -> RateProvider:
+        return self.provider or get_rate_provider()
+
+    def _fetch_range(self, base: str, first: pd.Timestamp, last: pd.Timestamp) -> pd.DataFrame:
+        """
+        Rates of every day from first to last; days the API skips take the
+        previous day's rates. The request starts a week early so a range
+        beginning on such a day has a day to carry rates over from.
+        """
+        provider = self._provider()
+        seed = first - pd.Timedelta(days=7)
+        response = provider.request(self.history_url, provider.query(
+            base, date_from=seed.strftime("%Y-%m-%d"), date_to=last.strftime("%Y-%m-%d")))
+        self.requests += 1
+        wide = pd.DataFrame.from_dict(response["data"], orient="index", dtype="float64")
+        wide.index = pd.to_datetime(wide.index).normalize()
+        wide = wide.sort_index().reindex(pd.date_range(seed, last, freq="D")).ffill().loc[first:].dropna(how="all")
+        long = wide.rename_axis("date").reset_index().melt(id_vars="date", var_name="quote", value_name="rate").dropna()
+        long["base"] = base
+        return long[["date", "base", "quote", "rate"]]
+
+    def backfill(self, base: str, start, end) -> int:
+        """Fetch the days from start to end (capped at yesterday) that are not stored yet; returns the days added."""
+        base = getattr(base, "value", base)
+        last_day = pd.Timestamp(date.today() - timedelta(days=1))
+        # rows dated today or later take the last published day
+        needed = pd.date_range(min(pd.Timestamp(start).normalize(), last_day),
+                               min(pd.Timestamp(end).normalize(), last_day), freq="D")
+        with self._lock:
+            stored = pd.DatetimeIndex(self._table.loc[self._table["base"] == base, "date"].unique())
+            ranges = _missing_ranges(needed, stored, self.max_days)
+            if not ranges:
+                return 0
+            print(f"RateHistory: Fetching {base} rates for {len(needed.difference(stored))} days in {len(ranges)} requests")
+            parts = [self._fetch_range(base, first, last) for first, last in ranges]
+            table = pd.concat([self._table.astype({"base": str, "quote": str}), *parts], ignore_index=True)
+            table = table.drop_duplicates(["date", "base", "quote"], keep="last").astype({"base": "category", "quote": "category"})
+            self._index(table)
+            try:
+                self._write()
+            except Exception as e:
+                print(f"RateHistory: Could not store rates in {self.path}: {e}")
+            return sum(len(part["date"].unique()) for part in parts)
+
+    def quotes(self, base: str, currencies: list, dates: pd.Series) -> np.ndarray:
+        """
+        (rows x currencies) matrix of rates (units per 1 base) on each row's
+        date, as of the last earlier day with a rate; NaN for missing dates,
+        unknown currencies or dates before the first stored day.
+        """
+        base = getattr(base, "value", base)
+        dates = pd.to_datetime(dates)
+        present = dates.notna().to_numpy()
+        if present.any():
+            self.backfill(base, dates[present].min(), dates[present].max())
+        day_ns = dates.dt.normalize().to_numpy("datetime64[ns]").astype(np.int64)[present]
+        result = np.full((len(dates), len(currencies)), np.nan)
+        for column, code in enumerate(currencies):
+            pair = self._pairs.get((base, str(code)))
+            if pair is None:
+                continue
+            pair_dates, pair_rates = pair
+            positions = np.searchsorted(pair_dates, day_ns, side="right") - 1
+            found = positions >= 0
+            rows = np.flatnonzero(present)[found]
+            result[rows, column] = pair_rates[positions[found]]
+        return result
+
+    def rates(self, base: str, codes: pd.Series, dates: pd.Series) -> np.ndarray:
+        """Rate of each row's own currency (units per 1 base) on the row's date; see quotes()."""
+        codes = codes.astype("category") if not isinstance(codes.dtype, pd.CategoricalDtype) else codes
+        currencies = [str(code) for code in codes.cat.categories]
+        quotes = np.column_stack([self.quotes(base, currencies, dates), np.full(len(codes), np.nan)])
+        # code -1 (missing) picks the NaN column
+        return quotes[np.arange(len(codes)), codes.cat.codes.to_numpy()]
+
+
+_history = None
+_history_lock = threading.Lock()
+
+
+def get_rate_history() -> RateHistory:
+    """The process-wide rate history shared by all currency tools."""
+    global _history
+    with _history_lock:
+        if _history is None:
+            _history = RateHistory()
+        return _history
@@ -0,0 +1,252 @@
+from concurrent.futures import Future
+from datetime import datetime
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+import weakref
+
+from dotenv import load_dotenv
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.constants import (
+    request_date,
+    CURRENCY_API_TIMEOUT,
+    FX_API_URL,
+    FX_CURRENCIES,
+    FX_RATE_TTL,
+    FX_MAX_RETRIES,
+    TOOL_THREADS,
+)
+
+load_dotenv()
+
+# statuses worth retrying; other errors (e.g. a bad api key) fail at once
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class RateFetchError(RuntimeError):
+    """The rates could not be fetched and no stored copy exists."""
+
+
+class _Retryable(Exception):
+    pass
+
+
+class RateProvider:
+    """
+    Exchange rates per base currency for every session of the process.
+
+    Rates are kept in memory for `ttl` seconds and written atomically to
+    `fallback_path`, so a restart reuses fresh rates and a failed fetch falls
+    back to the last stored ones. Fetches go through a pooled requests.Session
+    (or a pooled httpx.AsyncClient per event loop) with a timeout and
+    exponential backoff. Concurrent requests for the same base currency, sync
+    or async, share one fetch. `base_url` can point at a local stub server
+    (fx_stub.FxStubServer) instead of freecurrencyapi.
+    """
+
+    def __init__(self, fallback_path: str = request_date, base_url: str = FX_API_URL, api_key: str = None,
+                 ttl: float = FX_RATE_TTL, timeout: float = CURRENCY_API_TIMEOUT, max_retries: int = FX_MAX_RETRIES):
+        self.fallback_path = fallback_path
+        self.base_url = base_url
+        self.api_key = api_key
+        self.ttl = ttl
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.fetches = 0
+        self._lock = threading.Lock()
+        self._file_lock = threading.Lock()
+        self._rates = {}  # base -> (fetched at, api response)
+        self._inflight = {}  # base -> Future of the running fetch
+        self._session = requests.Session()
+        self._session.mount("http://", HTTPAdapter(pool_maxsize=TOOL_THREADS))
+        self._session.mount("https://", HTTPAdapter(pool_maxsize=TOOL_THREADS))
+        self._async_clients = weakref.WeakKeyDictionary()
+        self._load_fallback()
+
+    # --- stored rates ---
+
+    def _load_fallback(self) -> None:
+        try:
+            with open(self.fallback_path, "r") as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return
+        if "rates" in payload:
+            entries = payload["rates"].items()
+        else:
+            # single-currency layout written before the provider existed
+            data = payload.get("data") or {}
+            base = payload.get("base_currency") or data.get("base_currency")
+            entries = [(base, {"fetched_at": payload.get("currency_api"), "data": data})] if base and data else []
+        for base, entry in entries:
+            try:
+                fetched_at = datetime.fromisoformat(entry["fetched_at"]).timestamp()
+            except (TypeError, ValueError, KeyError):
+                continue
+            self._rates[base] = (fetched_at, entry["data"])
+        print(f"RateProvider: Loaded stored rates for {sorted(self._rates)}")
+
+    def _write_fallback(self) -> None:
+        """Write all rates to a temporary file and rename it over the old one, so readers never see half a file."""
+        with self._lock:
+            payload = {"rates": {
+                base: {"fetched_at": datetime.fromtimestamp(fetched_at).isoformat(), "data": data}
+                for base, (fetched_at, data) in self._rates.items()
+            }}
+        directory = os.path.dirname(os.path.abspath(self.fallback_path))
+        with self._file_lock:
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".fx_rates_", suffix=".json")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump(payload, f, indent=2)
+                os.replace(tmp_path, self.fallback_path)
+            except Exception:
+                os.unlink(tmp_path)
+                raise
+
+    def cached(self, base: str, max_age: float = None):
+        """Stored response for base if younger than max_age (default ttl) seconds, else None."""
+        entry = self._rates.get(base)
+        max_age = self.ttl if max_age is None else max_age
+        if entry is None or time.time() - entry[0] > max_age:
+            return None
+        return entry[1]
+
+    # --- fetching ---
+
+    def query(self, base: str, **params) -> dict:
+        """Query parameters of a request for base currency rates."""
+        api_key = self.api_key or os.getenv("FREE_CURRENCY_API_KEY")
+        if not api_key:
+            raise RateFetchError("FREE_CURRENCY_API_KEY is not set")
+        return {"apikey": api_key, "currencies": ",".join(FX_CURRENCIES), "base_currency": base, **params}
+
+    def _check(self, status: int, text: str, data):
+        if status in RETRY_STATUSES:
+            raise _Retryable(f"API error: {status}")
+        if status != 200:
+            raise RateFetchError(f"API error: {status} - {text}")
+        if not isinstance(data, dict) or "data" not in data:
+            raise RateFetchError(f"Unexpected API response: {text[:200]}")
+        return data
+
+    def request(self, url: str, params: dict) -> dict:
+        """GET a JSON API response over the pooled session, retrying with backoff."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self._session.get(url, params=params, timeout=self.timeout)
+                return self._check(response.status_code, response.text, response.json() if response.status_code == 200 else None)
+            except (_Retryable, requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.max_retries:
+                    raise RateFetchError(f"Currency API unavailable: {e}")
+                delay = 0.5 * 2 ** attempt
+                print(f"RateProvider: Fetch failed ({e}), retrying in {delay}s...")
+                time.sleep(delay)
+
+    def _fetch(self, base: str) -> dict:
+        return self.request(self.base_url, self.query(base))
+
+    def _async_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(timeout=self.timeout, limits=httpx.Limits(max_connections=TOOL_THREADS))
+            self._async_clients[loop] = client
+        return client
+
+    async def _afetch(self, base: str) -> dict:
+        params = self.query(base)
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await self._async_client().get(self.base_url, params=params)
+                return self._check(response.status_code, response.text, response.json() if response.status_code == 200 else None)
+            except (_Retryable, httpx.TransportError) as e:
+                if attempt == self.max_retries:
+                    raise RateFetchError(f"Currency API unavailable: {e}")
+                delay = 0.5 * 2 ** attempt
+                print(f"RateProvider: Fetch failed ({e}), retrying in {delay}s...")
+                await asyncio.sleep(delay)
+
+    def _claim(self, base: str):
+        """The in-flight fetch of base, and whether the caller has to run it."""
+        with self._lock:
+            future = self._inflight.get(base)
+            if future is not None:
+                return future, False
+            future = Future()
+            data = self.cached(base)
+            if data is not None:
+                # another fetch finished since the caller looked
+                future.set_result(data)
+                return future, False
+            self._inflight[base] = future
+            return future, True
+
+    def _finish(self, base: str, future: Future, data: dict = None, error: Exception = None) -> None:
+        if error is not None:
+            stale = self.cached(base, max_age=float("inf"))
+            if stale is None:
+                future.set_exception(error)
+            else:
+                print(f"RateProvider: {error}; using stored {base} rates")
+                future.set_result(stale)
+        else:
+            with self._lock:
+                self._rates[base] = (time.time(), data)
+            self.fetches += 1
+            try:
+                self._write_fallback()
+            except Exception as e:
+                print(f"RateProvider: Could not store rates in {self.fallback_path}: {e}")
+            future.set_result(data)
+        with self._lock:
+            self._inflight.pop(base, None)
+
+    def get_rates(self, base: str) -> dict:
+        """API response ({'data': {code: rate}}) for base currency; fetched at most once per ttl."""
+        base = getattr(base, "value", base)
+        data = self.cached(base)
+        if data is not None:
+            return data
+        future, owner = self._claim(base)
+        if owner:
+            print(f"RateProvider: Fetching {base} rates...")
+            try:
+                self._finish(base, future, data=self._fetch(base))
+            except Exception as e:
+                self._finish(base, future, error=e)
+        return future.result()
+
+    async def aget_rates(self, base: str) -> dict:
+        """Async get_rates; waits for a fetch already running in another thread or task."""
+        base = getattr(base, "value", base)
+        data = self.cached(base)
+        if data is not None:
+            return data
+        future, owner = self._claim(base)
+        if owner:
+            print(f"RateProvider: Fetching {base} rates...")
+            try:
+                self._finish(base, future, data=await self._afetch(base))
+            except Exception as e:
+                self._finish(base, future, error=e)
+        return await asyncio.wrap_future(future)
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_rate_provider() -> RateProvider:
+    """The process-wide provider shared by all currency tools."""
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = RateProvider()
+        return _provider
@@ -0,0 +1,110 @@
+from datetime import date, timedelta
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# rates from the TRY perspective; other bases are derived from these
+DEFAULT_TRY_RATES = {"TRY": 1.0, "USD": 0.025, "EUR": 0.0215}
+
+
+class FxStubServer:
+    """
+    Local stand-in for the freecurrencyapi /v1/latest and /v1/historical
+    endpoints, for tests and offline runs: RateProvider(base_url=server.url),
+    RateHistory(history_url=server.history_url). `fail_next` answers the next
+    requests with 503, `latency` (seconds) delays every answer and `requests`
+    records the query of each request. Historical rates drift by
+    `daily_drift` per day since 2020-01-01; with skip_weekends no rates are
+    published on Saturdays and Sundays.
+    """
+
+    def __init__(self, try_rates: dict = None, latency: float = 0.0, daily_drift: float = 0.001,
+                 skip_weekends: bool = False):
+        self.try_rates = dict(try_rates or DEFAULT_TRY_RATES)
+        self.latency = latency
+        self.daily_drift = daily_drift
+        self.skip_weekends = skip_weekends
+        self.fail_next = 0
+        self.requests = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/v1/latest"
+
+    @property
+    def history_url(self) -> str:
+        return self.url.replace("/latest", "/historical")
+
+    def rates(self, base: str, currencies: list, day: date = None) -> dict:
+        """Units of each currency per 1 base; on `day` foreign currencies have drifted against TRY."""
+        drift = 1.0 if day is None else 1 + self.daily_drift * (day - date(2020, 1, 1)).days
+
+        def per_try(code):
+            return self.try_rates[code] if code == "TRY" else self.try_rates[code] / drift
+
+        return {code: round(per_try(code) / per_try(base), 10) for code in currencies if code in self.try_rates}
+
+    def history(self, base: str, currencies: list, first: date, last: date) -> dict:
+        days = (first + timedelta(days=offset) for offset in range((last - first).days + 1))
+        return {day.isoformat(): self.rates(base, currencies, day)
+                for day in days if not (self.skip_weekends and day.weekday() >= 5)}
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                query = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+                with stub._lock:
+                    stub.requests.append(query)
+                    failing = stub.fail_next > 0
+                    stub.fail_next -= failing
+                if stub.latency:
+                    time.sleep(stub.latency)
+                if failing:
+                    return self._reply(503, {"message": "Service unavailable"})
+                if not query.get("apikey"):
+                    return self._reply(401, {"message": "Invalid authentication credentials"})
+                base = query.get("base_currency", "USD")
+                if base not in stub.try_rates:
+                    return self._reply(422, {"message": f"Unknown base currency {base}"})
+                currencies = query.get("currencies", ",".join(stub.try_rates)).split(",")
+                if urlparse(self.path).path.endswith("/historical"):
+                    first = date.fromisoformat(query.get("date_from", query.get("date", "")))
+                    last = date.fromisoformat(query.get("date_to", query.get("date", "")))
+                    return self._reply(200, {"data": stub.history(base, currencies, first, last)})
+                self._reply(200, {"data": stub.rates(base, currencies)})
+
+            def _reply(self, status, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "FxStubServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fx-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
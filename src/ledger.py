@@ -0,0 +1,160 @@
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+from src.utils import set_dataset_version
+from src.constants import LEDGER_CACHE_PREFIX
+from src.vector_store import get_file_hash
+
+# Declared schema of the cari hesap hareketleri ledger (see scripts/fake2.py).
+# Repeated code columns are categoricals, so every row holds a small integer
+# code instead of its own Python string object.
+CATEGORY_COLUMNS = ["Cari Kodu", "Cari Adi", "Cari Tipi", "Islem Turu", "Para Birimi", "Odeme Durumu"]
+DATE_COLUMNS = ["Belge Tarihi", "Vade Tarihi"]
+MONEY_COLUMNS = ["Tutar", "Bakiye"]
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+LEDGER_SCHEMA = {
+    "Islem ID": "int64",
+    "Belge No": "string",
+    "Aciklama": "string",
+    **{col: "category" for col in CATEGORY_COLUMNS},
+    **{col: "float64" for col in MONEY_COLUMNS},
+}
+# bumped when the cached column types change, so older copies are not reused;
+# 2: money columns stay float64 (float32 sums drift by whole units on large ledgers)
+CACHE_FORMAT = 2
+
+
+def get_ledger_cache_path(file_path: str) -> str:
+    """Path of the columnar copy for the current version of the file."""
+    return _cache_path(get_file_hash(file_path), "parquet")
+
+
+def _cache_path(file_hash: str, extension: str) -> str:
+    return f"{LEDGER_CACHE_PREFIX}{file_hash}_v{CACHE_FORMAT}.{extension}"
+
+
+def _compact_ids(series: pd.Series) -> pd.Series:
+    return pd.to_numeric(series, downcast="integer")
+
+
+def _csv_options(file_path: str) -> dict:
+    """read_csv arguments for the declared schema, limited to the columns the file has."""
+    header = pd.read_csv(file_path, encoding="utf-8", nrows=0).columns
+    return {
+        "encoding": "utf-8",
+        "dtype": {col: dtype for col, dtype in LEDGER_SCHEMA.items() if col in header},
+        "parse_dates": [col for col in DATE_COLUMNS if col in header],
+        "date_format": DATE_FORMAT,
+    }
+
+
+def read_ledger_csv(file_path: str) -> pd.DataFrame:
+    """
+    Parse the CSV once with the declared schema. Only IDs are downcast; money
+    columns stay float64 so sums over the whole ledger keep cent precision.
+    """
+    df = pd.read_csv(file_path, **_csv_options(file_path))
+    if "Islem ID" in df.columns:
+        df["Islem ID"] = _compact_ids(df["Islem ID"])
+    return df
+
+
+def iter_ledger_chunks(file_path: str, chunk_size: int, columns: list = None):
+    """
+    Yield the ledger as DataFrames of at most chunk_size rows without loading it whole.
+    Reads the row groups of the typed Parquet copy if one exists for the current
+    file version, otherwise parses the CSV chunk by chunk with the declared schema.
+    """
+    cache_path = get_ledger_cache_path(file_path)
+    if os.path.exists(cache_path):
+        parquet = pq.ParquetFile(cache_path)
+        for batch in parquet.iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+        return
+    options = _csv_options(file_path)
+    if columns is not None:
+        options["parse_dates"] = [col for col in options["parse_dates"] if col in columns]
+    with pd.read_csv(file_path, chunksize=chunk_size, usecols=columns, **options) as reader:
+        yield from reader
+
+
+def load_ledger(file_path: str) -> pd.DataFrame:
+    """
+    Load the ledger, reusing the typed Parquet copy if the file did not change.
+    The first load parses the CSV and writes ledger_cache_<hash>_v<format>.parquet next to
+    the chroma_db_<hash> dirs; later loads read the columnar file directly.
+    """
+    file_hash = get_file_hash(file_path)
+    cache_path = _cache_path(file_hash, "parquet")
+
+    if os.path.exists(cache_path):
+        print(f"Ledger: Loading typed cache from {cache_path}")
+        df = pd.read_parquet(cache_path)
+    else:
+        print(f"Ledger: Parsing {file_path}")
+        df = read_ledger_csv(file_path)
+        try:
+            df.to_parquet(cache_path, index=False)
+            print(f"Ledger: Saved typed cache to {cache_path}")
+        except Exception as e:
+            print(f"Ledger: Could not write cache {cache_path}: {e}")
+    set_dataset_version(df, file_hash)
+    return df
+
+
+# Arrow string columns stay Arrow-backed in pandas instead of becoming Python objects
+_ARROW_TYPES = {pa.string(): pd.StringDtype("pyarrow"), pa.large_string(): pd.StringDtype("pyarrow")}
+
+
+def get_shared_ledger_path(file_path: str) -> str:
+    """Path of the memory-mappable Arrow IPC copy for the current version of the file."""
+    return _cache_path(get_file_hash(file_path), "arrow")
+
+
+def write_shared_ledger(df: pd.DataFrame, path: str) -> None:
+    """
+    Write the typed ledger as an uncompressed Arrow IPC (Feather v2) file with a
+    single record batch, so every column maps to one contiguous buffer.
+    Written to a temp file first; concurrent writers just replace each other.
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False).combine_chunks()
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=max(len(table), 1))
+    os.replace(tmp_path, path)
+
+
+def load_shared_ledger(file_path: str) -> pd.DataFrame:
+    """
+    Load the ledger memory-mapped read-only from ledger_cache_<hash>_v<format>.arrow.
+    Numeric and date columns, categorical codes and Arrow strings are views over
+    the mapped file, so every process serving the same ledger shares one copy in
+    the page cache. The file is created from load_ledger on first use.
+    """
+    file_hash = get_file_hash(file_path)
+    path = _cache_path(file_hash, "arrow")
+    if not os.path.exists(path):
+        df = load_ledger(file_path)
+        try:
+            write_shared_ledger(df, path)
+            print(f"Ledger: Saved shared Arrow copy to {path}")
+        except Exception as e:
+            print(f"Ledger: Could not write shared copy {path}: {e}")
+            return df
+
+    return map_shared_ledger(path, file_hash)
+
+
+def map_shared_ledger(path: str, version: str) -> pd.DataFrame:
+    """Memory-map an Arrow copy written by write_shared_ledger; `version` is the source file's hash."""
+    print(f"Ledger: Memory-mapping {path}")
+    table = ipc.open_file(pa.memory_map(path, "r")).read_all()
+    df = table.to_pandas(split_blocks=True, types_mapper=_ARROW_TYPES.get)
+    set_dataset_version(df, version)
+    return df
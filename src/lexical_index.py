@@ -0,0 +1,96 @@
+from collections import defaultdict
+import re
+
+import numpy as np
+import pandas as pd
+
+LEXICAL_COLUMNS = ["Aciklama", "Cari Adi", "Belge No"]
+
+# Turkish dotted/dotless i first, then lowercase, then fold the remaining
+# letters to ASCII so "ÖDENDİ", "Ödendi" and "Odendi" share one token.
+_UPPER_I = str.maketrans({"I": "ı", "İ": "i"})
+_ASCII_FOLD = str.maketrans({"ı": "i", "ş": "s", "ğ": "g", "ö": "o", "ü": "u", "ç": "c", "â": "a", "î": "i", "û": "u"})
+_TOKEN_RE = re.compile(r"\w+(?:[-./]\w+)*")
+
+
+def turkish_fold(text: str) -> str:
+    """Case-fold text with Turkish rules (İ -> i, I -> ı) and strip Turkish diacritics."""
+    return text.translate(_UPPER_I).lower().translate(_ASCII_FOLD)
+
+
+def tokenize(text: str) -> list[str]:
+    """Folded word tokens; compound ids like 'BEL-75900' yield the whole id and its parts."""
+    tokens = []
+    for token in _TOKEN_RE.findall(turkish_fold(text)):
+        tokens.append(token)
+        if not token.isalnum():
+            tokens.extend(part for part in re.split(r"[-./]", token) if part)
+    return tokens
+
+
+class LexicalIndex:
+    """In-memory BM25 inverted index over the free-text columns of the ledger."""
+
+    def __init__(self, df: pd.DataFrame, columns: list[str] = LEXICAL_COLUMNS, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.columns = [col for col in columns if col in df.columns]
+        self.doc_count = len(df)
+
+        postings = defaultdict(lambda: defaultdict(int))
+        lengths = np.zeros(self.doc_count, dtype=np.float32)
+        values = [df[col].astype(str).where(df[col].notna(), "").to_numpy() for col in self.columns]
+        for row, texts in enumerate(zip(*values)):
+            tokens = tokenize(" ".join(texts))
+            lengths[row] = len(tokens)
+            for token in tokens:
+                postings[token][row] += 1
+
+        self.doc_lengths = lengths
+        self.avg_length = float(lengths.mean()) if self.doc_count else 0.0
+        self.postings = {
+            token: (np.fromiter(rows.keys(), dtype=np.int64, count=len(rows)),
+                    np.fromiter(rows.values(), dtype=np.float32, count=len(rows)))
+            for token, rows in postings.items()
+        }
+
+    def __contains__(self, token: str) -> bool:
+        return token in self.postings
+
+    def match_all(self, query: str) -> np.ndarray:
+        """Row positions containing every query token (empty if any token is unknown)."""
+        tokens = set(tokenize(query))
+        if not tokens or any(token not in self.postings for token in tokens):
+            return np.array([], dtype=np.int64)
+        rows = None
+        for token in tokens:
+            token_rows = self.postings[token][0]
+            rows = token_rows if rows is None else np.intersect1d(rows, token_rows, assume_unique=True)
+        return np.sort(rows)
+
+    def search(self, query: str, k: int = 10, candidates: np.ndarray = None) -> list[tuple[int, float]]:
+        """BM25 top-k as (row position, score), optionally restricted to a boolean candidate mask."""
+        scores = np.zeros(self.doc_count, dtype=np.float32)
+        norm = self.k1 * (1 - self.b + self.b * self.doc_lengths / (self.avg_length or 1.0))
+        for token in set(tokenize(query)):
+            if token not in self.postings:
+                continue
+            rows, tf = self.postings[token]
+            idf = np.log(1 + (self.doc_count - len(rows) + 0.5) / (len(rows) + 0.5))
+            scores[rows] += idf * tf * (self.k1 + 1) / (tf + norm[rows])
+        if candidates is not None:
+            scores[~candidates] = 0
+        hits = np.flatnonzero(scores)
+        if len(hits) > k:
+            hits = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        hits = hits[np.argsort(-scores[hits], kind="stable")]
+        return [(int(row), float(scores[row])) for row in hits]
+
+
+def reciprocal_rank_fusion(rankings: list[list[str]], k: int = 60) -> list[str]:
+    """Merge ranked id lists; each id scores sum(1 / (k + rank)) over the lists it appears in."""
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, 1):
+            scores[doc_id] += 1.0 / (k + rank)
+    return sorted(scores, key=lambda doc_id: -scores[doc_id])
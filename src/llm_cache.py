@@ -0,0 +1,126 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+from langchain_core.caches import BaseCache
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration
+
+from src.constants import LLM_CACHE_PATH, LLM_CACHE_TTL, LLM_CACHE_MAX_BYTES
+
+
+class ReplayMiss(LookupError):
+    """A call that was never recorded was made in replay mode."""
+
+
+def _normalize_prompt(prompt: str) -> list:
+    """
+    Messages of a serialized prompt without the parts that change between
+    identical runs: message and tool call ids, metadata, surrounding whitespace.
+    """
+    normalized = []
+    for message in json.loads(prompt):
+        kwargs = message.get("kwargs", {})
+        content = kwargs.get("content")
+        normalized.append({
+            "type": kwargs.get("type", message.get("id", [""])[-1]),
+            "content": content.strip() if isinstance(content, str) else content,
+            "tool_calls": [[call["name"], call["args"]] for call in kwargs.get("tool_calls", [])],
+        })
+    return normalized
+
+
+class LLMResponseCache(BaseCache):
+    """
+    Chat model responses stored in SQLite, so a question asked again against
+    the same ledger is answered without calling the API. Keys hash the model
+    and its parameters (including the bound tool schemas), the normalized
+    messages and the dataset version. Entries expire after `ttl` seconds; above
+    `max_bytes` the least recently used ones are evicted.
+
+    With replay=True nothing expires or is written, and a call that is not in
+    the cache raises ReplayMiss instead of reaching the model: recorded agent
+    runs can then be benchmarked and regression-tested offline.
+    """
+
+    def __init__(self, cache_path: str = LLM_CACHE_PATH, dataset_version: str = "",
+                 ttl: float = LLM_CACHE_TTL, max_bytes: int = LLM_CACHE_MAX_BYTES, replay: bool = False):
+        self.dataset_version = dataset_version
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.replay = replay
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(cache_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_responses ("
+            "key TEXT PRIMARY KEY, created REAL, last_used REAL, size INTEGER, response TEXT)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS llm_responses_last_used ON llm_responses (last_used)")
+        self._conn.commit()
+
+    def _key(self, prompt: str, llm_string: str) -> str:
+        payload = json.dumps([llm_string, _normalize_prompt(prompt), self.dataset_version],
+                             ensure_ascii=False, sort_keys=True)
+        return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str):
+        key = self._key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT created, response FROM llm_responses WHERE key = ?", (key,)).fetchone()
+            if row is not None and not self.replay and now - row[0] > self.ttl:
+                self._conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                if self.replay:
+                    raise ReplayMiss(f"no recorded response for prompt {key}")
+                return None
+            self.hits += 1
+            if not self.replay:
+                self._conn.execute("UPDATE llm_responses SET last_used = ? WHERE key = ?", (now, key))
+                self._conn.commit()
+        return [ChatGeneration(message=message) for message in messages_from_dict(json.loads(row[1]))]
+
+    def update(self, prompt: str, llm_string: str, return_val) -> None:
+        if self.replay:
+            return
+        response = json.dumps([message_to_dict(generation.message) for generation in return_val], ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_responses VALUES (?, ?, ?, ?, ?)",
+                (self._key(prompt, llm_string), now, now, len(response.encode("utf-8")), response),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float) -> None:
+        """Drop expired entries, then the least recently used ones while over max_bytes."""
+        self._conn.execute("DELETE FROM llm_responses WHERE created < ?", (now - self.ttl,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = []
+        for key, size in self._conn.execute("SELECT key, size FROM llm_responses ORDER BY last_used").fetchall():
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM llm_responses WHERE key = ?", evicted)
+        print(f"LLMCache: Evicted {len(evicted)} responses over the size limit")
+
+    def clear(self, **kwargs) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_responses")
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_responses").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": size}
@@ -0,0 +1,121 @@
+import re
+from typing import Any
+
+from langchain.memory.chat_memory import BaseChatMemory
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from src.serialize import count_tokens, serialize_value
+from src.constants import MEMORY_TOKEN_BUDGET, MEMORY_SUMMARY_TOKENS, MEMORY_MAX_MESSAGE_TOKENS
+
+# view/table names as the tools print them ("Saved as view 'view_1'", "saved as table 'table_2'")
+_NAME_PATTERN = re.compile(r"\b(view|table) '([\w.-]+)'", re.IGNORECASE)
+# serializer legend lines ("#Para Birimi: 0=TRY|1=USD"), not markdown headings
+_LEGEND_LINE = re.compile(r"^#\S[^:]*: ")
+# length of the question and answer excerpts kept in the summary
+_EXCERPT_CHARS = 160
+
+
+def _is_table_line(line: str) -> bool:
+    """CSV rows (commas without spaces, unlike prose), markdown table rows, serializer legends and notes."""
+    line = line.strip()
+    if line.startswith("|") and line.endswith("|"):
+        return True
+    if _LEGEND_LINE.match(line) or line.startswith("[truncated:"):
+        return True
+    return "," in line and ", " not in line
+
+
+def _excerpt(text: str) -> str:
+    first = next((line.strip() for line in text.splitlines() if line.strip() and not _is_table_line(line)), "")
+    return first if len(first) <= _EXCERPT_CHARS else first[:_EXCERPT_CHARS - 3] + "..."
+
+
+class BoundedSummaryMemory(BaseChatMemory):
+    """
+    Conversation memory with a flat prompt size for long sessions.
+
+    Recent turns are kept verbatim while they fit in `max_tokens`; older turns
+    are folded into a running summary (one line per turn, the oldest lines are
+    dropped past `summary_max_tokens`). A message larger than
+    `max_message_tokens` has its tables replaced by a reference to the
+    workspace view or table holding the data, which tools can still read by
+    name. Summaries are extractive, so pruning costs no model call.
+    """
+    memory_key: str = "chat_history"
+    return_messages: bool = True
+    workspace: Any = None
+    max_tokens: int = MEMORY_TOKEN_BUDGET
+    summary_max_tokens: int = MEMORY_SUMMARY_TOKENS
+    max_message_tokens: int = MEMORY_MAX_MESSAGE_TOKENS
+    summary_lines: list = []
+
+    @property
+    def memory_variables(self) -> list[str]:
+        return [self.memory_key]
+
+    @property
+    def summary(self) -> str:
+        return "\n".join(self.summary_lines)
+
+    def load_memory_variables(self, inputs: dict[str, Any]) -> dict[str, Any]:
+        messages = list(self.chat_memory.messages)
+        if self.summary_lines:
+            messages.insert(0, SystemMessage(content=f"Summary of the earlier conversation:\n{self.summary}"))
+        return {self.memory_key: messages}
+
+    def _references(self, text: str) -> list[str]:
+        """Views and tables named in the text that still exist, else the active view."""
+        names = []
+        for kind, name in _NAME_PATTERN.findall(text):
+            if self.workspace is not None and not (self.workspace.has_view(name) or self.workspace.has_table(name)):
+                continue
+            reference = f"{kind.lower()} '{name}'"
+            if reference not in names:
+                names.append(reference)
+        if not names and self.workspace is not None:
+            names.append(f"view '{self.workspace.active}'")
+        return names
+
+    def compact(self, text: str) -> str:
+        """The text itself if small, otherwise with its tables replaced by workspace references."""
+        if count_tokens(text) <= self.max_message_tokens:
+            return text
+        references = self._references(text)
+        where = " and ".join(references) if references else "the workspace"
+        lines, run = [], 0
+        for line in text.splitlines() + [""]:
+            if _is_table_line(line):
+                run += 1
+                continue
+            if run:
+                lines.append(f"[{run} table lines omitted; the data is in {where}]")
+                run = 0
+            lines.append(line)
+        return serialize_value("\n".join(lines).rstrip(), self.max_message_tokens)
+
+    def save_context(self, inputs: dict[str, Any], outputs: dict[str, str]) -> None:
+        input_str, output_str = self._get_input_output(inputs, outputs)
+        self.chat_memory.add_messages([HumanMessage(content=self.compact(input_str)),
+                                       AIMessage(content=self.compact(output_str))])
+        self._prune()
+
+    def _prune(self) -> None:
+        messages = list(self.chat_memory.messages)
+        tokens = [count_tokens(str(message.content)) for message in messages]
+        pruned = []
+        # always keep the last turn verbatim
+        while len(messages) > 2 and sum(tokens) > self.max_tokens:
+            pruned.extend(messages[:2])
+            del messages[:2], tokens[:2]
+        if not pruned:
+            return
+        for question, answer in zip(pruned[::2], pruned[1::2]):
+            self.summary_lines.append(f"- Q: {_excerpt(str(question.content))} -> A: {_excerpt(str(answer.content))}")
+        while len(self.summary_lines) > 1 and count_tokens(self.summary) > self.summary_max_tokens:
+            self.summary_lines.pop(0)
+        self.chat_memory.clear()
+        self.chat_memory.add_messages(messages)
+
+    def clear(self) -> None:
+        super().clear()
+        self.summary_lines = []
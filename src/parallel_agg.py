@@ -0,0 +1,179 @@
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from src.constants import PARALLEL_AGG_MIN_ROWS, PARALLEL_AGG_WORKERS
+
+# functions that merge from per-partition (sum, count, min, max) partials
+PARALLEL_FUNCTIONS = ["sum", "count", "min", "max", "mean"]
+
+_pool = None
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Process pool kept for the life of the process; re-created if the size changes.
+    Workers are started by a forkserver (spawned where there is none), not
+    forked from a process whose tool threads may hold locks; they only attach
+    to shared memory, so they need nothing else from the parent.
+    """
+    global _pool
+    if _pool is None or _pool._max_workers != workers:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method))
+    return _pool
+
+
+def measure_columns(frame: pd.DataFrame, group_columns: list, function: str):
+    """
+    Columns the serial groupby(...).agg(function) would return, or None if the
+    parallel path cannot reproduce them. The serial path retries with
+    numeric_only=True when a column type does not support the function, which
+    an unordered categorical (every code column of the ledger) always triggers.
+    """
+    others = [col for col in frame.columns if col not in group_columns]
+    if function == "count":
+        return others
+    numeric = [
+        col for col in others
+        if isinstance(frame[col].dtype, np.dtype) and frame[col].dtype.kind in "biuf"
+    ]
+    if len(numeric) == len(others):
+        return numeric
+    unordered = any(isinstance(frame[col].dtype, pd.CategoricalDtype) and not frame[col].cat.ordered for col in others)
+    if unordered and numeric:
+        return numeric
+    return None
+
+
+def widen_floats(frame: pd.DataFrame) -> pd.DataFrame:
+    """float32 columns as float64, so sums and means are accumulated and returned in float64."""
+    narrow = {col: "float64" for col, dtype in frame.dtypes.items() if isinstance(dtype, np.dtype) and dtype == np.float32}
+    return frame.astype(narrow) if narrow else frame
+
+
+def _share(array: np.ndarray):
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+    return block, (block.name, array.shape, array.dtype.str)
+
+
+def _attach(spec):
+    name, shape, dtype = spec
+    block = shared_memory.SharedMemory(name=name)
+    return block, np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+
+
+def partial_aggregate(grouped, function: str) -> pd.DataFrame:
+    """Mergeable partial aggregates of one row partition (mean is kept as sum and count)."""
+    if function == "count":
+        return grouped.count()
+    if function == "sum":
+        return grouped.sum()
+    if function == "mean":
+        return pd.concat({"sum": grouped.sum(), "count": grouped.count()}, axis=1)
+    return getattr(grouped, function)()
+
+
+def merge_partials(partials: list, function: str) -> pd.DataFrame:
+    """Merge partials of several partitions into one partial of the same form."""
+    stacked = pd.concat(partials)
+    by_key = stacked.groupby(level=list(range(stacked.index.nlevels)), observed=True)
+    if function in ("min", "max"):
+        return getattr(by_key, function)()
+    return by_key.sum()
+
+
+def finalize_partial(merged: pd.DataFrame, function: str) -> pd.DataFrame:
+    if function == "mean":
+        return merged["sum"] / merged["count"].replace(0, np.nan)
+    return merged
+
+
+def _partial(codes_spec, measure_specs: dict, start: int, stop: int, function: str) -> pd.DataFrame:
+    """Partial aggregates of rows [start, stop) by group code; runs in a worker process."""
+    blocks = []
+    try:
+        block, codes = _attach(codes_spec)
+        blocks.append(block)
+        columns = {}
+        for col, spec in measure_specs.items():
+            block, values = _attach(spec)
+            blocks.append(block)
+            columns[col] = values[start:stop]
+        part = pd.DataFrame(columns, copy=True)
+        return partial_aggregate(part.groupby(codes[start:stop].copy()), function)
+    finally:
+        for block in blocks:
+            block.close()
+
+
+def parallel_aggregate(grouped, group_columns: list, function, workers: int = PARALLEL_AGG_WORKERS,
+                       min_rows: int = PARALLEL_AGG_MIN_ROWS):
+    """
+    Aggregate a groupby over row partitions in a process pool.
+    The group codes and measure columns are placed in shared memory once; each
+    worker aggregates its row range to mergeable partials (sum, count, min, max,
+    mean as sum/count) that are then combined here. Returns None when the frame
+    is below min_rows or the function/columns are not handled, so the caller
+    keeps the serial path.
+    """
+    frame = grouped.obj
+    if not isinstance(function, str) or function not in PARALLEL_FUNCTIONS:
+        return None
+    if len(frame) < max(min_rows, 2) or workers < 2:
+        return None
+    columns = measure_columns(frame, group_columns, function)
+    if not columns:
+        return None
+
+    # rows with a missing key get code -1 and are dropped after combining, as in the serial groupby
+    codes = grouped.ngroup().fillna(-1).to_numpy(dtype=np.int64)
+    index = grouped.size().index
+
+    blocks = []
+    try:
+        block, codes_spec = _share(codes)
+        blocks.append(block)
+        measure_specs = {}
+        for col in columns:
+            series = frame[col]
+            if function == "count" and not (isinstance(series.dtype, np.dtype) and series.dtype.kind in "biuf"):
+                # only missing/non-missing matters for counting
+                values = np.where(series.notna().to_numpy(), 0.0, np.nan)
+            elif function in ("sum", "mean") and series.dtype.kind == "f":
+                values = series.to_numpy(dtype=np.float64)
+            else:
+                values = series.to_numpy()
+            block, measure_specs[col] = _share(values)
+            blocks.append(block)
+
+        bounds = np.linspace(0, len(frame), workers + 1, dtype=np.int64)
+        pool = _get_pool(workers)
+        futures = [
+            pool.submit(_partial, codes_spec, measure_specs, int(start), int(stop), function)
+            for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start
+        ]
+        partials = [future.result() for future in futures]
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    result = finalize_partial(merge_partials(partials, function), function).drop(index=-1, errors="ignore")
+    result = result.reindex(np.arange(len(index)))
+    result.index = index
+    for col in columns:
+        dtype = frame[col].dtype
+        if function in ("min", "max") and dtype.kind == "f":
+            # sums and means stay float64, as in the serial, rollup and chunked paths
+            result[col] = result[col].astype(dtype)
+        elif function in ("sum", "min", "max") and dtype.kind in "iu":
+            result[col] = result[col].astype(np.int64 if function == "sum" else dtype)
+    print(f"ParallelAgg: {function} of {len(frame)} rows in {len(partials)} partitions")
+    return result[columns]
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+
+from src.utils import dataset_version
+
+# Derived dimension: month of Belge Tarihi as "YYYY-MM"
+MONTH_COLUMN = "Belge Ayi"
+MONTH_SOURCE = "Belge Tarihi"
+
+CUBE_DIMENSIONS = ["Cari Kodu", "Cari Tipi", "Para Birimi", "Odeme Durumu", "Islem Turu", MONTH_COLUMN]
+CUBE_MEASURES = ["Tutar", "Bakiye"]
+
+# functions answerable from (count, sum, min, max, sum of squares) partials
+CUBE_FUNCTIONS = ["sum", "count", "min", "max", "mean", "var", "std", "size"]
+
+
+def month_of(dates: pd.Series) -> pd.Series:
+    """Month dimension values for a date column."""
+    dates = pd.to_datetime(dates, errors="coerce")
+    return dates.dt.to_period("M").astype(str).where(dates.notna()).rename(MONTH_COLUMN)
+
+
+def groupers(df: pd.DataFrame, columns: list) -> list:
+    """Group key Series for groupby, computing the month dimension if it is requested."""
+    keys = []
+    for col in columns:
+        if col == MONTH_COLUMN and col not in df.columns and MONTH_SOURCE in df.columns:
+            keys.append(month_of(df[MONTH_SOURCE]))
+        else:
+            keys.append(df[col])
+    return keys
+
+
+class RollupCube:
+    """
+    Mergeable partial aggregates of the measures for every combination of the
+    dimensions present in the ledger. Any group-by over a subset of those dimensions
+    is answered by rolling the cube up instead of scanning the rows.
+    """
+
+    def __init__(self, df: pd.DataFrame, dimensions: list = CUBE_DIMENSIONS, measures: list = CUBE_MEASURES):
+        self.dimensions = [
+            col for col in dimensions
+            if col in df.columns or (col == MONTH_COLUMN and MONTH_SOURCE in df.columns)
+        ]
+        self.measures = [col for col in measures if col in df.columns and pd.api.types.is_numeric_dtype(df[col])]
+        self.version = dataset_version(df)
+
+        keys = groupers(df, self.dimensions)
+        values = pd.DataFrame({col: df[col].astype("float64") for col in self.measures}, index=df.index)
+        for col in self.measures:
+            values[f"{col}__sq"] = values[col] ** 2
+        grouped = values.groupby(keys, observed=True, dropna=False)
+
+        parts = {("", "size"): grouped.size()}
+        for col in self.measures:
+            parts[(col, "count")] = grouped[col].count()
+            parts[(col, "sum")] = grouped[col].sum()
+            parts[(col, "min")] = grouped[col].min()
+            parts[(col, "max")] = grouped[col].max()
+            parts[(col, "sumsq")] = grouped[f"{col}__sq"].sum()
+        self.cells = pd.DataFrame(parts).reset_index()
+        print(f"RollupCube: {len(self.cells)} cells over {self.dimensions}")
+
+    def covers(self, group_by: list, function) -> bool:
+        return (
+            isinstance(function, str)
+            and function in CUBE_FUNCTIONS
+            and bool(self.measures)
+            and all(col in self.dimensions for col in group_by)
+        )
+
+    def rollup(self, group_by: list, function: str) -> pd.DataFrame:
+        """Aggregate of every measure by the given dimensions, computed from the cube cells."""
+        if not self.covers(group_by, function):
+            raise ValueError(f"The cube cannot answer {function} by {group_by}")
+        merged = self.cells.groupby(group_by, observed=True).agg(
+            **{"size": (("", "size"), "sum")},
+            **{f"{col}|{part}": ((col, part), "sum" if part in ("count", "sum", "sumsq") else part)
+               for col in self.measures for part in ("count", "sum", "min", "max", "sumsq")},
+        )
+        if function == "size":
+            return merged["size"].rename("size")
+
+        result = {}
+        for col in self.measures:
+            count = merged[f"{col}|count"]
+            total = merged[f"{col}|sum"]
+            if function in ("sum", "min", "max", "count"):
+                result[col] = merged[f"{col}|{function}"]
+            elif function == "mean":
+                result[col] = total / count.replace(0, np.nan)
+            else:
+                var = (merged[f"{col}|sumsq"] - total ** 2 / count) / (count - 1).where(count > 1)
+                var = var.clip(lower=0)
+                result[col] = var if function == "var" else np.sqrt(var)
+        return pd.DataFrame(result)
@@ -0,0 +1,164 @@
+import csv
+import io
+import json
+
+import numpy as np
+import pandas as pd
+
+from src.constants import TOKENIZER_ENCODING, TOOL_OUTPUT_TOKEN_BUDGET
+
+# Rows formatted before fitting to the budget; more never fit a tool output anyway
+MAX_CANDIDATE_ROWS = 1000
+
+_encoder = None
+
+
+def _get_encoder():
+    """tiktoken encoder of the model, or False if tiktoken or its data is unavailable (offline)."""
+    global _encoder
+    if _encoder is None:
+        try:
+            import tiktoken
+            _encoder = tiktoken.get_encoding(TOKENIZER_ENCODING)
+        except Exception as e:
+            print(f"Serialize: tiktoken unavailable ({type(e).__name__}), estimating tokens from length")
+            _encoder = False
+    return _encoder
+
+
+def count_tokens(text: str) -> int:
+    """Prompt tokens of a text; about one token per three characters without tiktoken."""
+    encoder = _get_encoder()
+    if encoder:
+        return len(encoder.encode(text, disallowed_special=()))
+    return (len(text) + 2) // 3
+
+
+def _format_float(values: pd.Series) -> pd.Series:
+    """Money-like columns to cents, small magnitudes to 4 significant digits, integral values without decimals."""
+    finite = values[np.isfinite(values)]
+    if len(finite) and (finite == finite.round()).all():
+        return values.map(lambda x: "" if pd.isna(x) else str(int(x)))
+    if len(finite) and finite.abs().median() >= 1:
+        return values.map(lambda x: "" if pd.isna(x) else f"{x:.2f}".rstrip("0").rstrip("."))
+    return values.map(lambda x: "" if pd.isna(x) else f"{x:.4g}")
+
+
+def _format_dates(values: pd.Series) -> pd.Series:
+    dates = pd.to_datetime(values)
+    present = dates.dropna()
+    fmt = "%Y-%m-%d" if (present == present.dt.normalize()).all() else "%Y-%m-%d %H:%M"
+    return dates.dt.strftime(fmt).fillna("")
+
+
+def format_column(values: pd.Series) -> pd.Series:
+    """Compact, dtype-aware text of a column; missing values become empty cells."""
+    dtype = values.dtype
+    if pd.api.types.is_bool_dtype(dtype):
+        return values.map(lambda x: "" if pd.isna(x) else str(bool(x)))
+    if pd.api.types.is_float_dtype(dtype):
+        return _format_float(values.astype("float64"))
+    if pd.api.types.is_integer_dtype(dtype):
+        return values.map(lambda x: "" if pd.isna(x) else str(int(x)))
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return _format_dates(values)
+    return values.map(lambda x: "" if pd.isna(x) else str(x))
+
+
+def _dictionary_encode(cells: pd.Series):
+    """
+    Replace repeated strings by short codes if that saves characters.
+    Returns (cells, legend) where legend lists the values in code order, or None.
+    """
+    if len(cells) < 2:
+        return cells, None
+    codes, uniques = pd.factorize(cells)
+    if len(uniques) == len(cells):
+        return cells, None
+    plain = int(cells.str.len().sum())
+    code_cells = [str(code) for code in codes]
+    encoded = sum(len(code) for code in code_cells) + sum(len(str(value)) + len(str(code)) + 2 for code, value in enumerate(uniques))
+    if encoded >= plain:
+        return cells, None
+    return pd.Series(code_cells, index=cells.index), list(uniques)
+
+
+def _csv_line(values) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="").writerow(values)
+    return buffer.getvalue()
+
+
+def serialize_frame(df: pd.DataFrame, max_tokens: int = TOOL_OUTPUT_TOKEN_BUDGET, total_rows: int = None,
+                    index: bool = None) -> str:
+    """
+    Compact text of a DataFrame for the model: a CSV header and rows with
+    dtype-aware rounding, repeated strings dictionary-encoded (legend lines
+    `#col: 0=value|1=value`), cut to at most max_tokens tokens. If rows are left
+    out the text ends with a note saying how many of how many are shown.
+    total_rows is the size of the full result when df is already a head of it.
+    index defaults to True for labelled (non-range) indexes, e.g. group keys.
+    """
+    total_rows = len(df) if total_rows is None else total_rows
+    if index is None:
+        index = not isinstance(df.index, pd.RangeIndex)
+    frame = df.head(MAX_CANDIDATE_ROWS)
+    if index:
+        frame = frame.reset_index()
+    frame.columns = [" / ".join(map(str, col)) if isinstance(col, tuple) else str(col) for col in frame.columns]
+
+    columns = {}
+    legends = {}
+    for position, col in enumerate(frame.columns):
+        cells = format_column(frame.iloc[:, position])
+        if not (pd.api.types.is_numeric_dtype(frame.iloc[:, position]) or pd.api.types.is_datetime64_any_dtype(frame.iloc[:, position])):
+            cells, legend = _dictionary_encode(cells)
+            if legend is not None:
+                legends[col] = legend
+        columns[col] = cells.tolist()
+
+    header = _csv_line(frame.columns)
+    lines = [header]
+    used = count_tokens(header) + 1
+    # room for the legend of every encoded column and the truncation note
+    reserve = sum(count_tokens(_legend_line(col, legend)) + 1 for col, legend in legends.items()) + 30
+    rows = list(zip(*columns.values())) if columns else []
+    shown = 0
+    for row in rows:
+        line = _csv_line(row)
+        cost = count_tokens(line) + 1
+        if used + cost + reserve > max_tokens and shown > 0:
+            break
+        lines.append(line)
+        used += cost
+        shown += 1
+
+    legend_lines = []
+    for col, legend in legends.items():
+        codes_used = {int(code) for code in columns[col][:shown] if code != ""}
+        legend_lines.append(_legend_line(col, [legend[code] if code in codes_used else None for code in range(len(legend))]))
+    text = "\n".join(legend_lines + lines)
+    if shown < total_rows:
+        text += f"\n[truncated: {shown} of {total_rows} rows shown to fit {max_tokens} tokens; filter, group or select fewer rows to see more]"
+    return text
+
+
+def _legend_line(col: str, legend: list) -> str:
+    return f"#{col}: " + "|".join(f"{code}={value}" for code, value in enumerate(legend) if value is not None)
+
+
+def serialize_value(value, max_tokens: int = TOOL_OUTPUT_TOKEN_BUDGET) -> str:
+    """Any tool result as compact text: frames and series as CSV, other values as JSON or str."""
+    if isinstance(value, pd.DataFrame):
+        return serialize_frame(value, max_tokens)
+    if isinstance(value, pd.Series):
+        return serialize_frame(value.to_frame(value.name if value.name is not None else "value"), max_tokens)
+    if isinstance(value, (dict, list)):
+        text = json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+    else:
+        text = str(value)
+    if count_tokens(text) <= max_tokens:
+        return text
+    # cut by characters, proportionally to the overshoot
+    keep = int(len(text) * max_tokens / count_tokens(text) * 0.9)
+    return text[:keep] + f"\n[truncated to fit {max_tokens} tokens]"
@@ -0,0 +1,104 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+
+from src.agent import SharedResources, create_agent_executor
+from src.constants import SERVER_MAX_CONCURRENCY, SERVER_MAX_SESSIONS
+
+
+class AgentServer:
+    """
+    Serves many analyst sessions concurrently over JSON lines on a TCP socket.
+
+    Request:  {"session": "ali", "input": "...", "id": 1}
+              {"session": "ali", "command": "history" | "close"}
+    Response: {"session": "ali", "id": 1, "output": "...", "elapsed": 0.42}
+              or {"session": ..., "id": ..., "error": "..."}
+
+    Every session has its own agent executor, tools, workspace and memory; the
+    ledger, rollup cube, indexes and vector store in `resources` are shared
+    read-only. Turns of one session run one after another, at most
+    `max_concurrency` turns run at once over all sessions.
+    """
+
+    def __init__(self, resources: SharedResources, llm, max_concurrency: int = SERVER_MAX_CONCURRENCY,
+                 max_sessions: int = SERVER_MAX_SESSIONS, verbose: bool = False):
+        self.resources = resources
+        self.llm = llm
+        self.max_sessions = max_sessions
+        self.verbose = verbose
+        self._sessions = OrderedDict()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    def _session(self, session_id: str) -> dict:
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = {
+                "executor": create_agent_executor(self.resources, self.llm, verbose=self.verbose),
+                "lock": asyncio.Lock(),
+            }
+            self._sessions[session_id] = session
+            if len(self._sessions) > self.max_sessions:
+                dropped, _ = self._sessions.popitem(last=False)
+                print(f"AgentServer: Dropped least recently used session {dropped}")
+        self._sessions.move_to_end(session_id)
+        return session
+
+    async def handle(self, request: dict) -> dict:
+        """Answer one request; errors are returned in the response, never raised."""
+        session_id = str(request.get("session", "default"))
+        response = {"session": session_id}
+        if "id" in request:
+            response["id"] = request["id"]
+        try:
+            command = request.get("command")
+            if command == "close":
+                self._sessions.pop(session_id, None)
+                response["output"] = "closed"
+                return response
+
+            session = self._session(session_id)
+            if command == "history":
+                memory = session["executor"].memory
+                response["output"] = [str(message) for message in memory.chat_memory.messages]
+                return response
+
+            start = time.perf_counter()
+            async with session["lock"], self._semaphore:
+                result = await session["executor"].ainvoke({"input": request["input"]})
+            response["output"] = result["output"]
+            response["elapsed"] = round(time.perf_counter() - start, 4)
+        except Exception as e:
+            response["error"] = f"{type(e).__name__}: {e}"
+        return response
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        write_lock = asyncio.Lock()
+        tasks = set()
+
+        async def answer(line: bytes):
+            try:
+                response = await self.handle(json.loads(line))
+            except ValueError as e:
+                response = {"error": f"Invalid JSON: {e}"}
+            async with write_lock:
+                writer.write((json.dumps(response, ensure_ascii=False) + "\n").encode())
+                await writer.drain()
+
+        try:
+            # requests on one connection are answered as they finish, not in order
+            while line := await reader.readline():
+                if line.strip():
+                    task = asyncio.create_task(answer(line))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            writer.close()
+
+    async def start(self, host: str, port: int) -> asyncio.AbstractServer:
+        server = await asyncio.start_server(self._handle_connection, host, port, limit=2**20)
+        print(f"AgentServer: Listening on {host}:{server.sockets[0].getsockname()[1]}")
+        return server
@@ -0,0 +1,67 @@
+import asyncio
+import itertools
+import json
+import time
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+# tool call made for free-text questions, so every turn exercises a real tool
+DEFAULT_TOOL_CALL = {
+    "name": "dataframe_aggregator",
+    "tool_input": {"action": "apply_aggregation", "params": {"group_by": ["Para Birimi"], "aggregation": "sum"}},
+}
+
+_call_ids = itertools.count(1)
+
+
+class StubChatModel(BaseChatModel):
+    """
+    Offline stand-in for ChatOpenAI, used for load tests and tests of the server.
+    A turn is one tool call followed by a final answer that quotes the tool output.
+    If the human message is JSON like {"tool": name, "tool_input": {...}} that tool
+    is called, otherwise DEFAULT_TOOL_CALL. `latency` (seconds) simulates the API round trip.
+    """
+    latency: float = 0.0
+    default_tool_call: dict = DEFAULT_TOOL_CALL
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def _respond(self, messages: List[BaseMessage], tools: Optional[list]) -> AIMessage:
+        last = messages[-1]
+        if isinstance(last, ToolMessage):
+            return AIMessage(content=f"Sonuç:\n{last.content}")
+
+        human = next((m for m in reversed(messages) if isinstance(m, HumanMessage)), None)
+        try:
+            request = json.loads(human.content) if human is not None else {}
+            call = {"name": request["tool"], "tool_input": request["tool_input"]}
+        except (ValueError, TypeError, KeyError):
+            call = self.default_tool_call
+
+        available = {tool["function"]["name"] for tool in tools or []}
+        if call["name"] not in available:
+            return AIMessage(content=f"Araç bulunamadı: {call['name']}")
+        tool_input = call["tool_input"]
+        if not isinstance(tool_input, str):
+            tool_input = json.dumps(tool_input, ensure_ascii=False)
+        return AIMessage(
+            content="",
+            tool_calls=[{"name": call["name"], "args": {"tool_input": tool_input}, "id": f"call_{next(_call_ids)}"}],
+        )
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages, kwargs.get("tools")))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages, kwargs.get("tools")))])
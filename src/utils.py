@@ -1,4 +1,19 @@
-def check_shrink_df(df, max_rows, std_condition=None):
+import itertools
+import threading
+import weakref
+
+from src.serialize import serialize_frame
+from src.constants import TOOL_OUTPUT_TOKEN_BUDGET
+
+_version_counter = itertools.count(1)
+# id(frame) -> (weak reference to the frame, version); the reference tells a
+# live frame from a new object that reused the id of a collected one
+_versions = {}
+# reentrant: a weakref callback may run during garbage collection while the lock is held
+_versions_lock = threading.RLock()
+
+
+def check_shrink_df(df, max_rows, std_condition=None, max_tokens=TOOL_OUTPUT_TOKEN_BUDGET):
     """Check DataFrame size and show sample if necessary."""
     row_count, col_count = df.shape
     if row_count > max_rows:
@@ -6,11 +21,58 @@ def check_shrink_df(df, max_rows, std_condition=None):
         info = (
             f"DataFrame filtered by standardized condition '{std_condition}'.\n"
             f"Result has {row_count} rows and {col_count} cols. \n"
-            f"{df.to_string()}"
+            f"{serialize_frame(df, max_tokens, total_rows=row_count)}"
         )
     else:
         info = (
             f"DataFrame filtered by standardized condition '{std_condition}'.\n"
-            f"{df.to_string()}"
+            f"{serialize_frame(df, max_tokens)}"
         )
     return df, info
+
+
+def _forget(key: int, ref) -> None:
+    with _versions_lock:
+        if _versions.get(key, (None,))[0] is ref:
+            del _versions[key]
+
+
+def set_dataset_version(df, version: str) -> None:
+    """
+    Tag a loaded frame with a content version (ledger.load_ledger uses the file
+    hash). Only this object carries it: copies derived from it (sorted,
+    assigned, converted) are different objects and get their own tags.
+    """
+    key = id(df)
+    with _versions_lock:
+        _versions[key] = (weakref.ref(df, lambda ref: _forget(key, ref)), version)
+
+
+def dataset_version(df) -> str:
+    """
+    Version tag of a DataFrame object, used as part of cache keys. Frames not
+    tagged by a loader get a process-unique tag the first time they are seen.
+    The frame itself is not modified; cached results assume it is not changed
+    in place afterwards.
+    """
+    with _versions_lock:
+        entry = _versions.get(id(df))
+        if entry is not None and entry[0]() is df:
+            return entry[1]
+        version = f"mem-{next(_version_counter)}"
+        set_dataset_version(df, version)
+        return version
+
+
+def preview_view(workspace, view, max_rows, header, max_tokens=TOOL_OUTPUT_TOKEN_BUDGET):
+    """Text sent to the agent for a workspace view; only the first max_rows rows are gathered."""
+    row_count = workspace.size(view)
+    col_count = len(workspace.columns(view))
+    head = workspace.frame(view, limit=max_rows)
+    if row_count > max_rows:
+        return (
+            f"{header}\n"
+            f"Result has {row_count} rows and {col_count} cols. \n"
+            f"{serialize_frame(head, max_tokens, total_rows=row_count, index=False)}"
+        )
+    return f"{header}\n{serialize_frame(head, max_tokens, index=False)}"
@@ -1,67 +1,243 @@
-from langchain_community.document_loaders import CSVLoader
 from langchain_chroma import Chroma
+from langchain_core.documents import Document
 from langchain_openai import OpenAIEmbeddings
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+from itertools import repeat
+import glob
 import hashlib
+import json
 import os
+import shutil
+import tempfile
 
-def get_file_hash(file_path: str) -> str:
-    """Generate a hash for the file to detect changes."""
-    print(f"VectorStore: Generating hash for {file_path}")
-    with open(file_path, "rb") as f:
-        return hashlib.md5(f.read()).hexdigest()
-
-def get_vectorstore(file_path: str, embeddings: OpenAIEmbeddings) -> Chroma:
+import pandas as pd
 
-    """Load existing or create new Chroma DB for a file."""
-    print(f"VectorStore: Loading vectorstore for {file_path}")
-    file_hash = get_file_hash(file_path)
+from src.constants import FILE_MANIFEST_PATH, HASH_CHUNK_SIZE, VECTOR_STORE_DIR, SYNC_CHECKPOINT_SIZE
 
-    persist_dir = f"./chroma_db_{file_hash}"  # Unique dir per file
+# bytes before the previous end of file that must still match for an append-only update
+APPEND_CHECK_SIZE = 64 * 1024
 
 
-    if os.path.exists(persist_dir):
+class IndexWarming(Exception):
+    """The vector store is still being built or loaded in the background."""
 
-        # Load existing embeddings
 
-        print(f"VectorStore: Loading cached embeddings from {persist_dir}")
+def _new_hasher():
+    return hashlib.blake2b(digest_size=16)
 
-        return Chroma(
 
-            persist_directory=persist_dir,
+def _hash_range(f, start: int, end: int, hasher=None):
+    """Stream bytes [start, end) of an open file through the hasher in fixed-size chunks."""
+    hasher = hasher or _new_hasher()
+    f.seek(start)
+    remaining = end - start
+    while remaining > 0:
+        chunk = f.read(min(HASH_CHUNK_SIZE, remaining))
+        if not chunk:
+            break
+        hasher.update(chunk)
+        remaining -= len(chunk)
+    return hasher
 
-            embedding_function=embeddings
 
-        )
+def load_manifest(manifest_path: str = None) -> dict:
+    manifest_path = manifest_path or FILE_MANIFEST_PATH
+    if not os.path.exists(manifest_path):
+        return {}
+    try:
+        with open(manifest_path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
 
-    else:
 
-        # Create new embeddings
+def _write_json(path: str, data: dict) -> None:
+    """Replace path with the JSON of data through a uniquely named temporary file next to it."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}_", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
 
-        print(f"VectorStore: Creating new embeddings for {file_path}")
-        loader = CSVLoader(file_path)
-        docs = loader.load()
-        
-        # Split text if needed (e.g., large cells)
-        splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-        chunks = splitter.split_documents(docs)
 
-        print(f"VectorStore: Saving to Chroma {persist_dir}")
+def write_manifest(manifest: dict, manifest_path: str = None) -> None:
+    """Write the manifest atomically so a crash never leaves a half-written file."""
+    _write_json(manifest_path or FILE_MANIFEST_PATH, manifest)
 
-        # Save to Chroma
-        vectorstore = Chroma.from_documents(
 
-            chunks,
+def get_file_hash(file_path: str, append_only: bool = False, manifest_path: str = None) -> str:
+    """
+    Generate a hash for the file to detect changes.
+    The file is hashed in chunks, and size/mtime/hash are kept in a manifest so an
+    unchanged file is not read at all. With append_only=True a file that only grew
+    is hashed from its previous end: the new hash chains the old hash with the tail bytes.
+    """
+    stat = os.stat(file_path)
+    key = os.path.abspath(file_path)
+    manifest = load_manifest(manifest_path)
+    entry = manifest.get(key)
 
-            embeddings,
+    if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+        return entry["hash"]
 
-            persist_directory=persist_dir  # Auto-saves to disk
+    with open(file_path, "rb") as f:
+        old_size = entry["size"] if entry else 0
+        check_start = max(0, old_size - APPEND_CHECK_SIZE)
+        if (
+            append_only
+            and entry
+            and stat.st_size > old_size
+            and entry.get("check_hash") == _hash_range(f, check_start, old_size).hexdigest()
+        ):
+            print(f"VectorStore: Hashing appended bytes of {file_path}")
+            hasher = _new_hasher()
+            hasher.update(bytes.fromhex(entry["hash"]))
+            file_hash = _hash_range(f, old_size, stat.st_size, hasher).hexdigest()
+        else:
+            print(f"VectorStore: Generating hash for {file_path}")
+            file_hash = _hash_range(f, 0, stat.st_size).hexdigest()
+        check_hash = _hash_range(f, max(0, stat.st_size - APPEND_CHECK_SIZE), stat.st_size).hexdigest()
+
+    manifest[key] = {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "hash": file_hash,
+        "check_hash": check_hash,
+    }
+    write_manifest(manifest, manifest_path)
+    return file_hash
+
+ID_COLUMN = "Islem ID"
+# embedded free text vs. filterable metadata of each row document
+TEXT_COLUMNS = ["Cari Adi", "Aciklama"]
+METADATA_COLUMNS = ["Cari Kodu", "Cari Tipi", "Islem Turu", "Para Birimi", "Odeme Durumu", "Belge Tarihi", "Vade Tarihi"]
+DATE_METADATA_COLUMNS = ["Belge Tarihi", "Vade Tarihi"]
+SYNC_STATE_FILE = "sync_state.json"
+
+
+def _row_hash(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _date_key(values: pd.Series) -> pd.Series:
+    """Dates as YYYYMMDD integers, so Chroma can range-filter them ($gte/$lte)."""
+    dates = pd.to_datetime(values, errors="coerce")
+    return dates.dt.strftime("%Y%m%d").fillna("")
+
+
+def build_row_documents(file_path: str) -> dict[str, Document]:
+    """
+    One document per ledger row, keyed by Islem ID.
+    Only the free-text columns are embedded; codes and dates go to the metadata
+    so similarity search can be narrowed with a Chroma `where` filter.
+    """
+    df = pd.read_csv(file_path, encoding="utf-8", dtype=str, keep_default_na=False)
+    ids = df[ID_COLUMN] if ID_COLUMN in df.columns else df.index.astype(str)
+    text_columns = [col for col in TEXT_COLUMNS if col in df.columns] or list(df.columns)
+    metadata_columns = [col for col in METADATA_COLUMNS if col in df.columns]
+    for col in DATE_METADATA_COLUMNS:
+        if col in df.columns:
+            df[col] = _date_key(df[col])
+
+    metadata_rows = df[metadata_columns].itertuples(index=False, name=None) if metadata_columns else repeat(())
+
+    docs = {}
+    for row_id, text_values, metadata_values in zip(
+        ids, df[text_columns].itertuples(index=False, name=None), metadata_rows
+    ):
+        text = "\n".join(f"{col}: {value}" for col, value in zip(text_columns, text_values))
+        metadata = {"source": file_path, ID_COLUMN: row_id}
+        for col, value in zip(metadata_columns, metadata_values):
+            if value == "":
+                continue
+            metadata[col] = int(value) if col in DATE_METADATA_COLUMNS else value
+        metadata["row_hash"] = _row_hash(text + json.dumps(metadata, sort_keys=True, ensure_ascii=False))
+        docs[row_id] = Document(page_content=text, metadata=metadata)
+    return docs
+
+
+def _stored_row_hashes(vectorstore: Chroma, page_size: int = 10000) -> dict[str, str]:
+    """Read id -> row_hash of everything already in the store, page by page."""
+    stored = {}
+    offset = 0
+    while True:
+        page = vectorstore.get(include=["metadatas"], limit=page_size, offset=offset)
+        for doc_id, metadata in zip(page["ids"], page["metadatas"]):
+            stored[doc_id] = (metadata or {}).get("row_hash")
+        if len(page["ids"]) < page_size:
+            return stored
+        offset += page_size
+
+
+def sync_vectorstore(vectorstore: Chroma, file_path: str, persist_dir: str = VECTOR_STORE_DIR) -> dict:
+    """
+    Embed only new or changed rows and delete rows that left the file.
+    Rows are written in checkpoints; an interrupted sync resumes where it stopped,
+    because rows already in the store with a matching row_hash are skipped (the
+    store itself is the progress record).
+    """
+    docs = build_row_documents(file_path)
+    stored = _stored_row_hashes(vectorstore)
+
+    changed = [doc_id for doc_id, doc in docs.items() if stored.get(doc_id) != doc.metadata["row_hash"]]
+    removed = [doc_id for doc_id in stored if doc_id not in docs]
+
+    print(f"VectorStore: {len(changed)} new/changed rows, {len(removed)} removed rows")
+    for start in range(0, len(changed), SYNC_CHECKPOINT_SIZE):
+        batch = changed[start:start + SYNC_CHECKPOINT_SIZE]
+        vectorstore.add_documents([docs[doc_id] for doc_id in batch], ids=batch)
+        print(f"VectorStore: {start + len(batch)}/{len(changed)} rows written")
+    for start in range(0, len(removed), SYNC_CHECKPOINT_SIZE):
+        vectorstore.delete(ids=removed[start:start + SYNC_CHECKPOINT_SIZE])
+
+    return {"upserted": len(changed), "deleted": len(removed), "total": len(docs)}
+
+
+def _load_sync_state(persist_dir: str) -> dict:
+    path = os.path.join(persist_dir, SYNC_STATE_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def remove_stale_stores(persist_dir: str = VECTOR_STORE_DIR) -> list[str]:
+    """Delete the old per-hash chroma_db_<hash> directories."""
+    parent = os.path.dirname(os.path.abspath(persist_dir))
+    removed = []
+    for path in glob.glob(os.path.join(parent, "chroma_db_*")):
+        if os.path.isdir(path) and os.path.abspath(path) != os.path.abspath(persist_dir):
+            print(f"VectorStore: Removing stale store {path}")
+            shutil.rmtree(path, ignore_errors=True)
+            removed.append(path)
+    return removed
+
+
+def get_vectorstore(file_path: str, embeddings: OpenAIEmbeddings, append_only: bool = False,
+                    persist_dir: str = VECTOR_STORE_DIR) -> Chroma:
+    """
+    Load the persistent Chroma DB and bring it up to date with the file.
+    Rows are keyed by Islem ID; only new or changed rows are embedded.
+    """
+    print(f"VectorStore: Loading vectorstore for {file_path}")
+    file_hash = get_file_hash(file_path, append_only=append_only)
+    # Chroma shares clients by path string; a relative path would reuse the client of another cwd
+    persist_dir = os.path.abspath(persist_dir)
 
-        )
+    vectorstore = Chroma(persist_directory=persist_dir, embedding_function=embeddings)
 
+    state = _load_sync_state(persist_dir)
+    if state.get("source") == os.path.abspath(file_path) and state.get("source_hash") == file_hash:
+        print(f"VectorStore: Loading cached embeddings from {persist_dir}")
         return vectorstore
-    
-
 
- 
\ No newline at end of file
+    print(f"VectorStore: Syncing {persist_dir} with {file_path}")
+    stats = sync_vectorstore(vectorstore, file_path, persist_dir)
+    _write_json(os.path.join(persist_dir, SYNC_STATE_FILE),
+                {"source": os.path.abspath(file_path), "source_hash": file_hash, **stats})
+    remove_stale_stores(persist_dir)
+    return vectorstore
@@ -0,0 +1,199 @@
+import hashlib
+import threading
+
+import numpy as np
+import pandas as pd
+
+from src.utils import dataset_version
+from src.constants import REPORT_CHUNK_ROWS
+
+BASE_VIEW = "base"
+
+
+class Workspace:
+    """
+    Session state shared by all tools: one base DataFrame and named views over it.
+    A view stores the base row positions it selects (None for every row) and any
+    derived columns computed on it, so tools chain on views without copying the base.
+    Result tables (e.g. aggregations) are kept by name next to the views.
+    """
+
+    def __init__(self, base):
+        # base is the DataFrame, or a function returning it, called on first use
+        self._base = None if callable(base) else base
+        self._load_base = base if callable(base) else None
+        self.active = BASE_VIEW
+        self._views = {BASE_VIEW: {"rows": None, "parent": None, "description": "full dataset", "columns": {}, "key": BASE_VIEW}}
+        self._tables = {}
+        self._counter = 0
+        self.lock = threading.RLock()
+
+    def _next_name(self, prefix: str) -> str:
+        self._counter += 1
+        return f"{prefix}_{self._counter}"
+
+    @property
+    def base(self) -> pd.DataFrame:
+        if self._base is None and self._load_base is not None:
+            self._base = self._load_base()
+        return self._base
+
+    @property
+    def version(self) -> str:
+        return dataset_version(self.base)
+
+    def has_view(self, name: str) -> bool:
+        return name in self._views
+
+    def has_table(self, name: str) -> bool:
+        return name in self._tables
+
+    def _view(self, name: str = None) -> dict:
+        name = name or self.active
+        if name not in self._views:
+            raise KeyError(f"View '{name}' not found. Available views: {list(self._views)}")
+        return self._views[name]
+
+    def add_view(self, rows: np.ndarray, parent: str = BASE_VIEW, description: str = "", name: str = None) -> str:
+        """
+        Register base row positions as a new view and make it the active one.
+        Derived columns of the parent (e.g. currency conversions) are carried
+        over for the selected rows; rows outside the parent get NaN.
+        """
+        parent_view = self._view(parent)
+        name = name or self._next_name("view")
+        rows = np.asarray(rows)
+        digest = hashlib.blake2b(rows.astype(np.int64).tobytes(), digest_size=16)
+        columns = {}
+        if parent_view["columns"]:
+            parent_rows = parent_view["rows"]
+            positions = rows if parent_rows is None else pd.Index(parent_rows).get_indexer(rows)
+            index = self.base.index.take(rows)
+            for col, series in parent_view["columns"].items():
+                values = pd.api.extensions.take(series.to_numpy(), positions, allow_fill=True)
+                columns[col] = pd.Series(values, index=index, name=col)
+            # the parent's key covers the content of its derived columns
+            digest.update(parent_view["key"].encode())
+        self._views[name] = {"rows": rows, "parent": parent, "description": description, "columns": columns,
+                             "key": digest.hexdigest()}
+        self.active = name
+        return name
+
+    def view_key(self, name: str = None) -> str:
+        """
+        Content key of a view: the same rows and derived columns give the same key,
+        whichever session or name created them. Used in cache keys.
+        """
+        return self._view(name)["key"]
+
+    def set_active(self, name: str) -> None:
+        self._view(name)
+        self.active = name
+
+    def rows(self, name: str = None):
+        """Base row positions of a view, or None if it covers the whole base frame."""
+        return self._view(name)["rows"]
+
+    def size(self, name: str = None) -> int:
+        rows = self.rows(name)
+        return len(self.base) if rows is None else len(rows)
+
+    def columns(self, name: str = None) -> list:
+        return list(self.base.columns) + [col for col in self._view(name)["columns"] if col not in self.base.columns]
+
+    def derived_columns(self, name: str = None) -> list:
+        """Columns computed on a view (add_column) rather than read from the base frame."""
+        return list(self._view(name)["columns"])
+
+    def column(self, col: str, name: str = None) -> pd.Series:
+        """One column of a view; only this column is gathered."""
+        view = self._view(name)
+        if col in view["columns"]:
+            return view["columns"][col]
+        if col not in self.base.columns:
+            raise KeyError(f"Column '{col}' not found. Available columns: {self.columns(name)}")
+        series = self.base[col]
+        return series if view["rows"] is None else series.take(view["rows"])
+
+    def add_column(self, col: str, values, name: str = None) -> None:
+        """Attach a derived column to a view; the base frame is never modified."""
+        view = self._view(name)
+        rows = view["rows"]
+        index = self.base.index if rows is None else self.base.index.take(rows)
+        values = np.asarray(values)
+        view["columns"][col] = pd.Series(values, index=index, name=col)
+        digest = hashlib.blake2b(view["key"].encode(), digest_size=16)
+        digest.update(col.encode())
+        digest.update(np.ascontiguousarray(values).tobytes() if values.dtype != object else repr(values.tolist()).encode())
+        view["key"] = digest.hexdigest()
+
+    def frame(self, name: str = None, columns: list = None, limit: int = None) -> pd.DataFrame:
+        """
+        Materialize a view, restricted to the given columns and/or first `limit` rows.
+        The unrestricted base view is returned as is, without a copy.
+        """
+        view = self._view(name)
+        rows = view["rows"]
+        derived = view["columns"]
+        wanted = columns if columns is not None else self.columns(name)
+        if rows is None and limit is None and not derived and columns is None:
+            return self.base
+
+        positions = rows if rows is not None else None
+        if limit is not None:
+            positions = (positions if positions is not None else np.arange(len(self.base)))[:limit]
+        base_cols = [col for col in wanted if col in self.base.columns and col not in derived]
+        result = self.base[base_cols] if positions is None else self.base[base_cols].take(positions)
+        # assign returns a new frame, so the slice of the base frame is never written to
+        result = result.assign(**{
+            col: derived[col].to_numpy() if limit is None else derived[col].to_numpy()[:limit]
+            for col in wanted if col in derived
+        })
+        return result[[col for col in wanted if col in result.columns]]
+
+    def iter_frame(self, name: str = None, columns: list = None, chunk_rows: int = REPORT_CHUNK_ROWS):
+        """A view or table in frames of at most chunk_rows rows, without materializing it whole."""
+        if name in self._tables:
+            table = self._tables[name]["table"]
+            if isinstance(table, pd.Series):
+                table = table.to_frame()
+            if not isinstance(table.index, pd.RangeIndex):
+                table = table.reset_index()
+            table = table if columns is None else table[columns]
+            for start in range(0, len(table), chunk_rows):
+                yield table.iloc[start:start + chunk_rows]
+            return
+        view = self._view(name)
+        rows = view["rows"]
+        derived = view["columns"]
+        wanted = columns if columns is not None else self.columns(name)
+        base_cols = [col for col in wanted if col in self.base.columns and col not in derived]
+        size = self.size(name)
+        for start in range(0, size, chunk_rows):
+            stop = min(size, start + chunk_rows)
+            part = self.base[base_cols].iloc[start:stop] if rows is None else self.base[base_cols].take(rows[start:stop])
+            part = part.assign(**{col: derived[col].to_numpy()[start:stop] for col in wanted if col in derived})
+            yield part[[col for col in wanted if col in part.columns]]
+
+    def add_table(self, table: pd.DataFrame, description: str = "", name: str = None) -> str:
+        """Keep a result table (e.g. an aggregation) under a name other tools can reference."""
+        name = name or self._next_name("table")
+        self._tables[name] = {"table": table, "description": description}
+        return name
+
+    def table(self, name: str) -> pd.DataFrame:
+        if name in self._tables:
+            return self._tables[name]["table"]
+        if name in self._views:
+            return self.frame(name)
+        raise KeyError(f"'{name}' not found. Available views: {list(self._views)}, tables: {list(self._tables)}")
+
+    def describe(self) -> str:
+        lines = [f"Active view: {self.active}"]
+        for name, view in self._views.items():
+            extra = f", derived columns {list(view['columns'])}" if view["columns"] else ""
+            parent = f" from '{view['parent']}'" if view["parent"] else ""
+            lines.append(f"- view '{name}'{parent}: {self.size(name)} rows, {view['description']}{extra}")
+        for name, entry in self._tables.items():
+            lines.append(f"- table '{name}': {len(entry['table'])} rows, {entry['description']}")
+        return "\n".join(lines)
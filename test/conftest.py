@@ -0,0 +1,11 @@
+import pytest
+
+import src.vector_store as vector_store
+
+
+@pytest.fixture(autouse=True)
+def file_manifest(tmp_path, monkeypatch):
+    """Keep the file hash manifest of every test in its tmp_path, not in the working directory."""
+    path = tmp_path / "file_manifest.json"
+    monkeypatch.setattr(vector_store, "FILE_MANIFEST_PATH", str(path))
+    return path
@@ -0,0 +1,76 @@
+import json
+
+import pandas as pd
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from src.Tools.analyze import DataFrameAnalysisTool
+from src.vector_store import build_row_documents, get_vectorstore
+
+
+@pytest.fixture
+def ledger_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / "ledger.csv"
+    pd.DataFrame({
+        "Islem ID": [1, 2, 3, 4],
+        "Cari Kodu": ["MUS-001", "MUS-001", "TED-002", "TED-003"],
+        "Cari Adi": ["Acme A.Ş.", "Acme A.Ş.", "Beta Tedarik", "Gama Tedarik"],
+        "Belge Tarihi": ["2024-01-05 10:00:00", "2024-03-10 11:30:00", "2024-03-15 09:15:00", "2024-06-01 08:00:00"],
+        "Tutar": [100.0, 200.0, 300.0, 400.0],
+        "Para Birimi": ["TRY", "USD", "USD", "EUR"],
+        "Aciklama": ["kira", "kira", "hammadde", "nakliye"],
+        "Odeme Durumu": ["Odendi", "Bekliyor", "Odendi", "Gecikmis"],
+    }).to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.fixture
+def tool(ledger_file, tmp_path):
+    store = get_vectorstore(ledger_file, DeterministicFakeEmbedding(size=8), persist_dir=str(tmp_path / "chroma_db"))
+    return DataFrameAnalysisTool(df=pd.read_csv(ledger_file), vectorstore=store)
+
+
+def test_one_document_per_row_with_metadata(ledger_file):
+    docs = build_row_documents(ledger_file)
+    assert list(docs) == ["1", "2", "3", "4"]
+    doc = docs["3"]
+    assert doc.page_content == "Cari Adi: Beta Tedarik\nAciklama: hammadde"
+    assert doc.metadata["Cari Kodu"] == "TED-002"
+    assert doc.metadata["Belge Tarihi"] == 20240315
+    assert "Tutar" not in doc.page_content
+
+
+def test_similarity_search_with_filters(tool):
+    params = {"query": "kira", "k": 10, "filters": {"Para Birimi": "USD"}, "mode": "vector"}
+    result = tool._run(json.dumps({"action": "similarity_search", "params": params}))
+    assert "Islem ID: 2" in result and "Islem ID: 3" in result
+    assert "Islem ID: 1" not in result and "Islem ID: 4" not in result
+
+    params["filters"] = {"Para Birimi": ["USD", "EUR"], "Belge Tarihi": {"from": "2024-03-12"}}
+    result = tool._run(json.dumps({"action": "similarity_search", "params": params}))
+    assert "Islem ID: 3" in result and "Islem ID: 4" in result
+    assert "Islem ID: 2" not in result
+
+
+def test_similarity_search_rejects_unknown_filter(tool):
+    params = {"query": "kira", "filters": {"Tutar": 100}}
+    result = tool._run(json.dumps({"action": "similarity_search", "params": params}))
+    assert "Cannot filter on 'Tutar'" in result
+
+
+def test_exact_keyword_query_skips_embedder(tool, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("vector search should not run")
+
+    monkeypatch.setattr(tool.vectorstore, "similarity_search", fail)
+    result = tool._run(json.dumps({"action": "similarity_search", "params": {"query": "BETA TEDARİK"}}))
+    assert result.startswith("Islem ID: 3")
+    assert "Islem ID: 1" not in result
+
+
+def test_mixed_query_fuses_keyword_and_vector_results(tool):
+    params = {"query": "nakliye firmasi", "k": 4}
+    result = tool._run(json.dumps({"action": "similarity_search", "params": params}))
+    assert result.count("Islem ID:") == 4
+    assert result.startswith("Islem ID: 4")
@@ -0,0 +1,104 @@
+import asyncio
+import json
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.Tools.aggregate import DataFrameAggregateTool
+from src.Tools.currency import CurrencyEnum, CurrencyTool
+from src.Tools.filter import DataFrameFilterTool
+from src.Tools.output import ReportGeneratorTool
+from src.fx_rates import RateProvider
+from src.fx_stub import FxStubServer
+from src.workspace import Workspace
+
+
+@pytest.fixture
+def workspace():
+    return Workspace(pd.DataFrame({
+        "currency": ["USD", "EUR", "TRY"] * 20,
+        "amount": np.arange(60, dtype=float),
+    }))
+
+
+def test_tools_run_off_the_event_loop(workspace, monkeypatch):
+    threads = []
+    original = DataFrameFilterTool._run
+
+    def recording_run(self, tool_input):
+        threads.append(threading.current_thread().name)
+        return original(self, tool_input)
+
+    monkeypatch.setattr(DataFrameFilterTool, "_run", recording_run)
+    tool = DataFrameFilterTool(workspace=workspace)
+    result = asyncio.run(tool.ainvoke(json.dumps({"action": "filter_data", "params": {"condition": "amount > 10"}})))
+    assert "Saved as view 'view_1'" in result
+    assert threads and threads[0].startswith("tool")
+
+
+def test_event_loop_stays_responsive(workspace, monkeypatch):
+    def slow_run(self, tool_input):
+        threading.Event().wait(0.2)
+        return "done"
+
+    monkeypatch.setattr(DataFrameAggregateTool, "_run", slow_run)
+    tool = DataFrameAggregateTool(workspace=workspace)
+
+    async def run():
+        ticks = 0
+
+        async def heartbeat():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        beat = asyncio.create_task(heartbeat())
+        result = await tool.ainvoke("{}")
+        beat.cancel()
+        return result, ticks
+
+    result, ticks = asyncio.run(run())
+    assert result == "done"
+    assert ticks >= 10
+
+
+def test_report_tool_runs_async(tmp_path):
+    tool = ReportGeneratorTool(report_dir=str(tmp_path))
+    result = asyncio.run(tool.ainvoke(json.dumps({"title": "Rapor", "summary": "Özet", "output_format": "executive"})))
+    assert "Rapor" in result
+
+
+@pytest.fixture
+def request_file(tmp_path):
+    return tmp_path / "api_req_date.json"
+
+
+def _write_request_file(path, when, data):
+    path.write_text(json.dumps({"currency_api": when.isoformat(), "base_currency": "USD", "data": data}))
+
+
+def test_async_merge_uses_stored_rates(workspace, request_file):
+    _write_request_file(request_file, datetime.today(), {"data": {"USD": 1.0, "EUR": 0.5, "TRY": 40.0}})
+    provider = RateProvider(str(request_file), base_url="http://127.0.0.1:9/unreachable", api_key="test-key")
+    tool = CurrencyTool(workspace=workspace, rate_provider=provider)
+    result = asyncio.run(tool._arun("merge_currencies", CurrencyEnum.USD, "currency", ["amount"]))
+    lines = [line for line in result.splitlines() if not line.startswith("#")]
+    column = lines[0].split(",").index("amount_in_USD")
+    assert [line.split(",")[column] for line in lines[1:4]] == ["0", "2", "0.05"]
+    assert provider.fetches == 0
+
+
+def test_async_fetch_goes_through_async_client(workspace, request_file, monkeypatch):
+    _write_request_file(request_file, datetime.today() - timedelta(days=2), {"data": {"USD": 1.0}})
+    with FxStubServer() as stub:
+        provider = RateProvider(str(request_file), base_url=stub.url, api_key="test-key")
+        monkeypatch.setattr(provider._session, "get", lambda *args, **kwargs: pytest.fail("blocking client used"))
+        tool = CurrencyTool(workspace=workspace, rate_provider=provider)
+        result = json.loads(asyncio.run(tool._arun("get_currency_data", CurrencyEnum.USD)))
+    assert result == {"data": stub.rates("USD", ["EUR", "USD", "TRY"])}
+    assert len(stub.requests) == 1 and stub.requests[0]["base_currency"] == "USD"
+    assert json.loads(request_file.read_text())["rates"]["USD"]["data"] == result
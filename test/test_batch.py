@@ -0,0 +1,116 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.ledger as ledger
+from src.batch import BatchSpec, partition_slug, read_progress, run_batch
+from src.fx_history import RateHistory
+from src.fx_rates import RateProvider
+from src.fx_stub import FxStubServer
+
+
+@pytest.fixture
+def ledger_csv(tmp_path, monkeypatch):
+    monkeypatch.setattr(ledger, "LEDGER_CACHE_PREFIX", str(tmp_path / "ledger_cache_"))
+    rng = np.random.default_rng(0)
+    n = 300
+    path = tmp_path / "ledger.csv"
+    pd.DataFrame({
+        "Islem ID": np.arange(n),
+        "Cari Kodu": [f"MUS-{i % 5:03d}" if i % 3 else f"TED-{i % 2:03d}" for i in range(n)],
+        "Cari Adi": ["Acme A.Ş."] * n,
+        "Cari Tipi": ["Musteri" if i % 3 else "Tedarikci" for i in range(n)],
+        "Belge No": [f"BEL-{i}" for i in range(n)],
+        "Belge Tarihi": (pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 90, n), unit="D")).strftime("%Y-%m-%d %H:%M:%S"),
+        "Vade Tarihi": ["2024-06-01 00:00:00"] * n,
+        "Islem Turu": ["Satis Faturasi"] * n,
+        "Tutar": rng.uniform(100, 1000, n).round(2),
+        "Para Birimi": rng.choice(["TRY", "USD", "EUR"], n),
+        "Aciklama": ["-"] * n,
+        "Odeme Durumu": rng.choice(["Odendi", "Bekliyor"], n),
+        "Bakiye": rng.uniform(-500, 500, n).round(2),
+    }).to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.fixture
+def spec():
+    return BatchSpec(title="Cari Ekstresi - {partition}", summary="Ay sonu ekstresi", group_by=["Para Birimi"])
+
+
+def test_one_report_per_partition(ledger_csv, spec, tmp_path):
+    out_dir = tmp_path / "out"
+    summary = run_batch(ledger_csv, spec, key="Cari Kodu", out_dir=str(out_dir), workers=2)
+    assert summary["partitions"] == summary["done"] == 7 and summary["failed"] == 0
+
+    text = (out_dir / "MUS-001.md").read_text(encoding="utf-8")
+    assert text.startswith("# 📋 Cari Ekstresi - MUS-001")
+    csv = pd.read_csv(ledger_csv)
+    rows = csv[csv["Cari Kodu"] == "MUS-001"]
+    assert f"- Total Records: {len(rows)}" in text
+    # every row of the partition is in the statement, and no row of another partition
+    assert text.count("| MUS-001 | Acme") == len(rows)
+    assert "| MUS-002 | Acme" not in text
+
+    progress = read_progress(str(out_dir / "progress.jsonl"))
+    assert set(progress) == set(csv["Cari Kodu"])
+    record = progress["MUS-001"]
+    assert record["status"] == "done" and record["rows"] == len(rows)
+    assert set(record["stages"]) == {"filter", "aggregate", "report"}
+
+
+def test_rerun_skips_finished_partitions(ledger_csv, spec, tmp_path):
+    out_dir = tmp_path / "out"
+    run_batch(ledger_csv, spec, key="Cari Tipi", out_dir=str(out_dir), workers=2)
+    assert run_batch(ledger_csv, spec, key="Cari Tipi", out_dir=str(out_dir), workers=2)["skipped"] == 2
+
+    # a deleted report is rendered again, and a changed spec renders every partition
+    os.remove(out_dir / "Musteri.md")
+    assert run_batch(ledger_csv, spec, key="Cari Tipi", out_dir=str(out_dir))["done"] == 1
+    changed = spec.model_copy(update={"aggregation": "mean"})
+    assert run_batch(ledger_csv, changed, key="Cari Tipi", out_dir=str(out_dir))["done"] == 2
+
+
+def test_failed_partitions_are_retried(ledger_csv, spec, tmp_path):
+    out_dir = tmp_path / "out"
+    broken = spec.model_copy(update={"group_by": ["Eksik Kolon"]})
+    summary = run_batch(ledger_csv, broken, key="Cari Tipi", out_dir=str(out_dir), workers=2)
+    assert summary["failed"] == 2
+    assert "Eksik Kolon" in read_progress(str(out_dir / "progress.jsonl"))["Musteri"]["error"]
+    assert run_batch(ledger_csv, broken, key="Cari Tipi", out_dir=str(out_dir))["skipped"] == 0
+
+
+def test_partitions_without_rows_are_recorded(ledger_csv, spec, tmp_path):
+    out_dir = tmp_path / "out"
+    tedarikci = spec.model_copy(update={"filter": "Cari Tipi == 'Tedarikci'"})
+    summary = run_batch(ledger_csv, tedarikci, key="Cari Kodu", out_dir=str(out_dir), workers=2)
+    assert summary["done"] == 2 and summary["empty"] == 5
+    assert not (out_dir / "MUS-001.md").exists()
+    assert run_batch(ledger_csv, tedarikci, key="Cari Kodu", out_dir=str(out_dir))["skipped"] == 7
+
+
+def test_currency_step_uses_rates_fetched_once(ledger_csv, tmp_path):
+    spec = BatchSpec(title="{partition}", group_by=["Para Birimi"],
+                     currency={"base_currency": "TRY", "money_columns": ["Tutar"], "date_column": "Belge Tarihi"})
+    with FxStubServer() as stub:
+        provider = RateProvider(str(tmp_path / "api_req_date.json"), base_url=stub.url, api_key="test-key")
+        history = RateHistory(str(tmp_path / "fx_history.parquet"), provider=provider, history_url=stub.history_url)
+        summary = run_batch(ledger_csv, spec, key="Cari Tipi", out_dir=str(tmp_path / "out"), workers=2,
+                            rate_history=history)
+        # the parent backfilled the whole date range; the workers made no requests
+        assert summary["done"] == 2 and len(stub.requests) == history.requests == 1
+    text = (tmp_path / "out" / "Tedarikci.md").read_text(encoding="utf-8")
+    assert "Tutar_in_TRY" in text
+
+
+def test_partition_slug():
+    assert partition_slug("MUS-001") == "MUS-001"
+    assert partition_slug("A/B") != partition_slug("A_B")
+    assert partition_slug("A/B").startswith("A_B-")
+
+
+def test_unknown_key_is_reported(ledger_csv, spec, tmp_path):
+    with pytest.raises(ValueError, match="Cari Grubu"):
+        run_batch(ledger_csv, spec, key="Cari Grubu", out_dir=str(tmp_path / "out"))
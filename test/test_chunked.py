@@ -0,0 +1,107 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.agent as agent
+import src.ledger as ledger
+from src.agent import SharedResources, create_tools
+from src.chunked import ChunkedWorkspace
+from src.ledger import load_ledger
+from src.rollup import groupers
+from src.Tools.aggregate import DataFrameAggregateTool
+from src.Tools.filter import DataFrameFilterTool
+
+
+@pytest.fixture
+def ledger_csv(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(ledger, "LEDGER_CACHE_PREFIX", str(tmp_path / "ledger_cache_"))
+    rng = np.random.default_rng(2)
+    n = 1000
+    path = tmp_path / "ledger.csv"
+    pd.DataFrame({
+        "Islem ID": np.arange(1, n + 1),
+        "Cari Kodu": rng.choice(["MUS-001", "MUS-002", "TED-001"], n),
+        "Cari Tipi": rng.choice(["Musteri", "Tedarikci"], n),
+        "Belge Tarihi": (pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365, n), unit="D")).strftime("%Y-%m-%d %H:%M:%S"),
+        "Tutar": rng.uniform(100, 10000, n).round(2),
+        "Para Birimi": rng.choice(["TRY", "USD", "EUR"], n),
+        "Aciklama": rng.choice(["Fatura", "Tahsilat"], n),
+        "Bakiye": rng.uniform(-10000, 10000, n).round(2),
+    }).to_csv(path, index=False)
+    return str(path)
+
+
+def _expected(df, condition, group_by, function):
+    df = df[df.eval(condition)].astype({"Tutar": "float64", "Bakiye": "float64"})
+    grouped = df.groupby(groupers(df, group_by), observed=True)
+    return grouped[["Islem ID", "Tutar", "Bakiye"]].agg(function).astype("float64")
+
+
+@pytest.mark.parametrize("parquet", [False, True])
+@pytest.mark.parametrize("function", ["sum", "count", "mean", "max"])
+def test_streamed_aggregation_matches_in_memory(ledger_csv, parquet, function):
+    df = ledger.read_ledger_csv(ledger_csv)
+    if parquet:
+        load_ledger(ledger_csv)
+    workspace = ChunkedWorkspace(ledger_csv, chunk_size=128)
+    workspace.add_view("`Tutar` > 2000")
+    result = workspace.aggregate(["Para Birimi", "Belge Ayi"], function)
+    expected = _expected(df, "`Tutar` > 2000", ["Para Birimi", "Belge Ayi"], function)
+    assert [tuple(map(str, key)) for key in result.index] == [tuple(map(str, key)) for key in expected.index]
+    np.testing.assert_allclose(result[expected.columns].to_numpy(dtype=float), expected.to_numpy(dtype=float), rtol=1e-6)
+
+
+def test_tools_work_on_streaming_workspace(ledger_csv):
+    df = ledger.read_ledger_csv(ledger_csv)
+    workspace = ChunkedWorkspace(ledger_csv, chunk_size=100)
+    filter_tool = DataFrameFilterTool(workspace=workspace)
+    aggregate_tool = DataFrameAggregateTool(workspace=workspace)
+
+    result = filter_tool._run(json.dumps({"action": "filter_data", "params": {"condition": "Cari Tipi == 'Musteri'"}}))
+    expected_rows = int((df["Cari Tipi"] == "Musteri").sum())
+    assert "Saved as view 'view_1'" in result
+    assert f"Result has {expected_rows} rows" in result
+
+    result = aggregate_tool._run(json.dumps({"action": "apply_aggregation", "params": {"group_by": ["Cari Kodu"], "aggregation": "count"}}))
+    name = result.split("saved as table '")[1].split("'")[0]
+    table = workspace.table(name)
+    expected = df[df["Cari Tipi"] == "Musteri"].groupby("Cari Kodu", observed=True)["Tutar"].count()
+    assert table["Tutar"].tolist() == expected.tolist()
+
+    result = aggregate_tool._run(json.dumps({"action": "apply_aggregation", "params": {"group_by": ["Cari Kodu"], "aggregation": "median"}}))
+    assert "not 'median'" in result
+
+
+def test_streaming_workspace_never_materializes_whole_view(ledger_csv):
+    workspace = ChunkedWorkspace(ledger_csv, chunk_size=100)
+    assert len(workspace.frame(limit=250)) == 250
+    with pytest.raises(ValueError):
+        workspace.frame()
+
+
+def test_every_tool_is_registered_in_streaming_mode(ledger_csv, monkeypatch, tmp_path):
+    monkeypatch.setattr(agent, "STREAMING_FILE_BYTES", 0)
+    tools = {tool.name: tool for tool in create_tools(SharedResources(ledger_csv, embedding_backend="fake"))}
+    assert len(tools) == 6 and all(isinstance(tool.workspace, ChunkedWorkspace) for tool in tools.values())
+    df = ledger.read_ledger_csv(ledger_csv)
+
+    tools["dataframe_transformer"]._run(json.dumps({"action": "filter_data", "params": {"condition": "Cari Tipi == 'Musteri'"}}))
+    counts = tools["dataframe_inspector"]._run(json.dumps({"action": "get_value_counts", "params": {"column": "Cari Kodu"}}))
+    for code, count in df[df["Cari Tipi"] == "Musteri"]["Cari Kodu"].value_counts().items():
+        assert f"{code},{count}" in counts
+
+    path = tmp_path / "report.md"
+    tools["report_generator"].report_dir = str(tmp_path)
+    result = tools["report_generator"]._run(json.dumps(
+        {"title": "Rapor", "summary": "Özet", "tables": ["view_1"], "max_table_rows": 0, "file_name": path.name}))
+    assert result.startswith("Report saved to")
+    rows = [line for line in path.read_text(encoding="utf-8").splitlines() if line.startswith("| ") and "Musteri" in line]
+    assert len(rows) == (df["Cari Tipi"] == "Musteri").sum()
+
+    # actions that need the whole ledger in memory explain why instead of failing
+    assert "streaming mode" in tools["dataframe_inspector"]._run(json.dumps({"action": "get_info", "params": {}}))
+    assert "streaming mode" in tools["dataframe_analyzer"]._run(json.dumps({"action": "similarity_search", "params": {"query": "kira"}}))
+    assert "streaming mode" in tools["currency_tool"]._run("merge_currencies", "TRY", "Para Birimi", ["Tutar"])
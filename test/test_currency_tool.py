@@ -31,9 +31,9 @@ def test_merge_currencies(dummy_df, mock_api_data):
         return
     assert 'amount_in_USD' in result.columns
     # Check conversion
-    assert result.loc[0, 'amount_in_USD'] == 100 * 1.0
-    assert result.loc[1, 'amount_in_USD'] == 200 * 0.9
-    assert result.loc[2, 'amount_in_USD'] == 300 * 30.0
+    assert result.loc[0, 'amount_in_USD'] == 100 / 1.0
+    assert result.loc[1, 'amount_in_USD'] == 200 / 0.9
+    assert result.loc[2, 'amount_in_USD'] == 300 / 30.0
 
 def test_run_merge_action(dummy_df, mock_api_data):
     tool = CurrencyTool(df=dummy_df.copy(), base_currency=CurrencyEnum.USD, api_data=mock_api_data)
@@ -43,9 +43,39 @@ def test_run_merge_action(dummy_df, mock_api_data):
         currency_column='currency',
         money_columns=['amount']
     )
-    if not isinstance(result, pd.DataFrame):
+    if 'amount_in_USD' not in result:
         pytest.skip(f"Tool returned error: {result}")
         return
-    assert 'amount_in_USD' in result.columns
+    header = next(line for line in result.splitlines() if not line.startswith('#'))
+    assert 'amount_in_USD' in header.split(',')
+
+def test_all_targets_in_one_call(dummy_df, mock_api_data):
+    dummy_df['fee'] = [1.0, 2.0, 3.0]
+    tool = CurrencyTool(df=dummy_df.copy(), base_currency=CurrencyEnum.USD, api_data=mock_api_data)
+    result = tool._merge_currencies(mock_api_data, 'currency', ['amount', 'fee'], target_currencies=['EUR', 'USD', 'TRY'])
+    assert [col for col in result.columns if '_in_' in col] == [
+        'amount_in_EUR', 'amount_in_USD', 'amount_in_TRY', 'fee_in_EUR', 'fee_in_USD', 'fee_in_TRY']
+    # 200 EUR -> USD -> TRY, 300 TRY -> EUR
+    assert result.loc[1, 'amount_in_TRY'] == pytest.approx(200 / 0.9 * 30.0)
+    assert result.loc[2, 'amount_in_EUR'] == pytest.approx(300 / 30.0 * 0.9)
+    assert result['fee_in_USD'].tolist() == pytest.approx([1.0, 2.0 / 0.9, 3.0 / 30.0])
+    assert 'amount_in_TRY' not in tool.workspace.base.columns
+
+def test_currency_column_per_money_column(mock_api_data):
+    df = pd.DataFrame({'cur_a': ['EUR', 'XXX'], 'cur_b': ['TRY', 'USD'], 'a': [9.0, 1.0], 'b': [30.0, 5.0]})
+    tool = CurrencyTool(df=df, base_currency=CurrencyEnum.USD, api_data=mock_api_data)
+    result = tool._merge_currencies(mock_api_data, ['cur_a', 'cur_b'], ['a', 'b'])
+    assert result.loc[0, 'a_in_USD'] == pytest.approx(10.0)
+    assert pd.isna(result.loc[1, 'a_in_USD'])  # unknown currency code
+    assert result['b_in_USD'].tolist() == pytest.approx([1.0, 5.0])
+    assert 'one column per money column' in tool._merge_currencies(mock_api_data, ['cur_a'], ['a', 'b'])
+
+def test_currency_data_is_serialized_within_budget(mock_api_data):
+    rates = {'data': {f'C{i:03d}': float(i) for i in range(500)}}
+    tool = CurrencyTool(api_data=rates, token_budget=50)
+    result = tool._run(action='get_currency_data', base_currency=CurrencyEnum.USD)
+    assert result.startswith('{"data":{"C000":0.0') and result.endswith('[truncated to fit 50 tokens]')
+    assert CurrencyTool(api_data=mock_api_data)._run(action='get_currency_data', base_currency=CurrencyEnum.USD) == \
+        '{"data":{"USD":1.0,"EUR":0.9,"TRY":30.0}}'
 
 # Optionally, you can mock _get_currency_data for get_currency_data action if needed 
\ No newline at end of file
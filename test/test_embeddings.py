@@ -0,0 +1,48 @@
+import pytest
+
+from src.embeddings import CachedEmbeddings, LocalFakeEmbeddings
+
+
+class FlakyEmbeddings(LocalFakeEmbeddings):
+    calls: list = []
+    failures: int = 0
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("rate limited")
+        return super().embed_documents(texts)
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "cache.sqlite")
+
+
+def test_identical_texts_are_embedded_once(cache_path):
+    inner = FlakyEmbeddings(size=8, calls=[])
+    embeddings = CachedEmbeddings(inner, cache_path=cache_path, batch_size=2)
+    vectors = embeddings.embed_documents(["a", "b", "a", "c"])
+    assert vectors[0] == vectors[2]
+    assert sorted(text for call in inner.calls for text in call) == ["a", "b", "c"]
+    assert len(inner.calls) == 2
+
+
+def test_cache_survives_restart(cache_path):
+    first = CachedEmbeddings(FlakyEmbeddings(size=8, calls=[]), cache_path=cache_path)
+    expected = first.embed_documents(["kira odemesi"])
+
+    inner = FlakyEmbeddings(size=8, calls=[])
+    second = CachedEmbeddings(inner, cache_path=cache_path)
+    assert second.embed_documents(["kira odemesi"])[0] == pytest.approx(expected[0], rel=1e-6)
+    assert inner.calls == []
+    assert second.hits == 1
+
+
+def test_failed_batch_is_retried(cache_path, monkeypatch):
+    monkeypatch.setattr("src.embeddings.time.sleep", lambda _: None)
+    inner = FlakyEmbeddings(size=8, calls=[], failures=2)
+    embeddings = CachedEmbeddings(inner, cache_path=cache_path, max_retries=3)
+    assert len(embeddings.embed_documents(["x"])) == 1
+    assert len(inner.calls) == 3
@@ -0,0 +1,58 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.filter_engine import FilterEngine, UnsupportedCondition, get_engine
+
+
+@pytest.fixture
+def ledger_df():
+    return pd.DataFrame({
+        "Cari Kodu": pd.Categorical(["MUS-001", "TED-002", "MUS-001", "TED-003", "MUS-004"]),
+        "Cari Adi": ["Acme A.Ş.", "Işık Tedarik", "Acme A.Ş.", "Gama Tedarik", "Delta Ltd."],
+        "Belge Tarihi": pd.to_datetime(["2024-01-05", "2024-02-10", "2024-03-01", None, "2024-05-20"]),
+        "Tutar": np.array([100.25, 2500.5, 999.99, 10.0, np.nan], dtype="float32"),
+        "Para Birimi": pd.Categorical(["TRY", "USD", "EUR", "USD", "TRY"]),
+    })
+
+
+@pytest.mark.parametrize("condition", [
+    "`Tutar` > 500",
+    "`Tutar` >= 999.99",
+    "`Tutar` <= 100.25 or `Para Birimi` == 'EUR'",
+    "`Belge Tarihi` >= '2024-02-10' and `Belge Tarihi` < '2024-05-01'",
+    "`Cari Kodu` == 'MUS-001' and not `Para Birimi` == 'TRY'",
+    "`Para Birimi` in ['USD', 'EUR']",
+    "`Para Birimi` != 'USD'",
+    "`Cari Adi`.str.contains('Tedarik')",
+    "`Tutar`.between(10, 1000)",
+    "(`Tutar` > 50) & (`Cari Kodu` == 'TED-002')",
+])
+def test_engine_matches_pandas(ledger_df, condition):
+    expected = ledger_df.eval(condition).to_numpy(dtype=bool, na_value=False)
+    assert FilterEngine(ledger_df).evaluate(condition).tolist() == expected.tolist()
+
+
+def test_contains_keyword_is_turkish_case_insensitive(ledger_df):
+    mask = FilterEngine(ledger_df).evaluate("`Cari Adi` contains 'ışık'")
+    assert np.flatnonzero(mask).tolist() == [1]
+    mask = FilterEngine(ledger_df).evaluate("`Cari Adi`.str.contains('ISIK', case=False)")
+    assert np.flatnonzero(mask).tolist() == [1]
+
+
+@pytest.mark.parametrize("condition", [
+    "`Cari Adi`.str.contains('A.Ş')",
+    "`Tutar` * 2 > 100",
+    "`Missing` == 1",
+])
+def test_unsupported_conditions_are_reported(ledger_df, condition):
+    with pytest.raises(UnsupportedCondition):
+        FilterEngine(ledger_df).evaluate(condition)
+
+
+def test_concurrent_callers_share_one_engine(ledger_df):
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        engines = list(pool.map(lambda _: get_engine(ledger_df), range(32)))
+    assert all(engine is engines[0] for engine in engines)
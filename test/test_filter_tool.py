@@ -1,6 +1,6 @@
 import pandas as pd
 import pytest
-from src.Tools.filter import DataFrameFilterTool
+from src.Tools.filter import DataFrameFilterTool, FILTER_CACHE, standardize_condition
 
 @pytest.fixture
 def sample_dataframe():
@@ -81,3 +81,33 @@ def test_run_invalid_json_input(sample_dataframe):
     tool_input = '{"action": "filter_data", "params": {"condition": "Age > 30"' # Malformed JSON
     result = tool._run(tool_input)
     assert "Error processing input" in result
+
+def test_standardize_condition_backticks_columns():
+    columns = ['Cari Kodu', 'Tutar', 'Cari Adi']
+    assert standardize_condition("Cari Kodu  ==   'Cari Kodu' and Tutar>5", columns) == "`Cari Kodu` == 'Cari Kodu' and `Tutar`>5"
+    assert standardize_condition("`Tutar` > 5", columns) == "`Tutar` > 5"
+    assert standardize_condition("Cari Adi.str.contains('x')", columns) == "`Cari Adi`.str.contains('x')"
+
+def test_repeated_filter_is_served_from_cache(sample_dataframe, monkeypatch):
+    tool = DataFrameFilterTool(df=sample_dataframe)
+    tool._filter_data("Age > 30")
+    hits = FILTER_CACHE.hits
+
+    def fail(*args, **kwargs):
+        raise AssertionError("condition should not be evaluated again")
+
+    monkeypatch.setattr(pd.DataFrame, "eval", fail)
+    other_tool = DataFrameFilterTool(df=sample_dataframe)
+    result = other_tool._filter_data("Age   >   30")
+    assert FILTER_CACHE.hits == hits + 1
+    assert len(other_tool.df) == 4
+    assert "Error" not in result
+
+def test_derived_frames_do_not_share_cached_rows():
+    df = pd.DataFrame({'Tutar': [5.0, 1.0, 3.0]})
+    DataFrameFilterTool(df=df)._filter_data("Tutar > 2")
+    # same length, same attrs, different row order
+    tool = DataFrameFilterTool(df=df.sort_values("Tutar"))
+    tool._filter_data("Tutar > 2")
+    assert sorted(tool.df["Tutar"]) == [3.0, 5.0]
+    assert "version" not in df.attrs
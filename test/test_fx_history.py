@@ -0,0 +1,107 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.Tools.currency import CurrencyEnum, CurrencyTool
+from src.fx_history import RateHistory, _missing_ranges
+from src.fx_rates import RateProvider
+from src.fx_stub import FxStubServer
+from src.workspace import Workspace
+
+
+@pytest.fixture
+def stub():
+    with FxStubServer(skip_weekends=True) as server:
+        yield server
+
+
+@pytest.fixture
+def history(stub, tmp_path):
+    provider = RateProvider(str(tmp_path / "api_req_date.json"), base_url=stub.url, api_key="test-key")
+    return RateHistory(str(tmp_path / "fx_history.parquet"), provider=provider, history_url=stub.history_url, max_days=60)
+
+
+@pytest.fixture
+def ledger():
+    rng = np.random.default_rng(0)
+    n = 500
+    return pd.DataFrame({
+        "Belge Tarihi": pd.Timestamp("2023-01-01") + pd.to_timedelta(rng.integers(0, 365, n), unit="D")
+        + pd.to_timedelta(rng.integers(0, 24, n), unit="h"),
+        "Para Birimi": pd.Categorical(rng.choice(["TRY", "USD", "EUR"], n)),
+        "Tutar": rng.uniform(100, 10000, n).round(2),
+    })
+
+
+def _expected_rate(stub, code, when):
+    day = when.date()
+    while stub.skip_weekends and day.weekday() >= 5:
+        day = date.fromordinal(day.toordinal() - 1)
+    return stub.rates("TRY", [code], day)[code]
+
+
+def test_rows_use_the_rate_of_their_date(stub, history, ledger):
+    rates = history.rates("TRY", ledger["Para Birimi"], ledger["Belge Tarihi"])
+    expected = [_expected_rate(stub, code, when) for code, when in zip(ledger["Para Birimi"], ledger["Belge Tarihi"])]
+    np.testing.assert_allclose(rates, expected)
+    # a year of days in 60-day range requests, not one request per date
+    assert history.requests == len(stub.requests) <= 8
+
+
+def test_days_are_fetched_once(stub, history, ledger, tmp_path):
+    history.rates("TRY", ledger["Para Birimi"], ledger["Belge Tarihi"])
+    requests = len(stub.requests)
+    history.rates("TRY", ledger["Para Birimi"], ledger["Belge Tarihi"])
+
+    reloaded = RateHistory(history.path, provider=history.provider, history_url=stub.history_url)
+    rates = reloaded.rates("TRY", ledger["Para Birimi"], ledger["Belge Tarihi"])
+    assert len(stub.requests) == requests
+    assert not np.isnan(rates).any()
+
+    # only the new days are requested when the range grows
+    later = pd.Series(pd.to_datetime(["2024-01-10"]))
+    reloaded.rates("TRY", pd.Series(["USD"]), later)
+    assert len(stub.requests) == requests + 1
+    assert stub.requests[-1]["date_to"] == "2024-01-10"
+
+
+def test_unknown_codes_and_dates_are_nan(history):
+    rates = history.rates("TRY", pd.Series(["USD", "GBP", "USD"]), pd.Series(pd.to_datetime(["2023-05-02", "2023-05-02", None])))
+    assert not np.isnan(rates[0]) and np.isnan(rates[1:]).all()
+
+
+def test_missing_ranges_split_runs():
+    needed = pd.date_range("2024-01-01", "2024-01-10")
+    stored = pd.DatetimeIndex(["2024-01-03", "2024-01-04"])
+    assert _missing_ranges(needed, stored, max_days=4) == [
+        (pd.Timestamp("2024-01-01"), pd.Timestamp("2024-01-02")),
+        (pd.Timestamp("2024-01-05"), pd.Timestamp("2024-01-08")),
+        (pd.Timestamp("2024-01-09"), pd.Timestamp("2024-01-10")),
+    ]
+
+
+def test_tool_converts_at_document_dates(stub, history, ledger):
+    workspace = Workspace(ledger)
+    tool = CurrencyTool(workspace=workspace, rate_history=history,
+                        rate_provider=RateProvider(history.provider.fallback_path, base_url="http://127.0.0.1:9/unreachable"))
+    result = tool._run("merge_currencies", CurrencyEnum.TRY, "Para Birimi", ["Tutar"], date_column="Belge Tarihi")
+    assert "Tutar_in_TRY" in result
+    converted = workspace.column("Tutar_in_TRY").to_numpy()
+    row = ledger.iloc[0]
+    assert converted[0] == pytest.approx(row["Tutar"] / _expected_rate(stub, row["Para Birimi"], row["Belge Tarihi"]))
+    # the base ledger is not modified
+    assert "Tutar_in_TRY" not in ledger.columns
+
+
+def test_tool_converts_into_every_target_at_document_dates(stub, history, ledger):
+    workspace = Workspace(ledger)
+    tool = CurrencyTool(workspace=workspace, rate_history=history)
+    tool._run("merge_currencies", CurrencyEnum.TRY, "Para Birimi", ["Tutar"], date_column="Belge Tarihi",
+              target_currencies=["TRY", "USD", "EUR"])
+    for i in range(5):
+        row = ledger.iloc[i]
+        in_try = row["Tutar"] / _expected_rate(stub, row["Para Birimi"], row["Belge Tarihi"])
+        assert workspace.column("Tutar_in_TRY").iloc[i] == pytest.approx(in_try)
+        assert workspace.column("Tutar_in_USD").iloc[i] == pytest.approx(in_try * _expected_rate(stub, "USD", row["Belge Tarihi"]))
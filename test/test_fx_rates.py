@@ -0,0 +1,114 @@
+import asyncio
+import json
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+import src.fx_rates as fx_rates
+from src.fx_rates import RateFetchError, RateProvider
+from src.fx_stub import FxStubServer
+
+
+@pytest.fixture
+def stub():
+    with FxStubServer(latency=0.05) as server:
+        yield server
+
+
+@pytest.fixture
+def fallback_path(tmp_path):
+    return str(tmp_path / "api_req_date.json")
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(fx_rates.time, "sleep", lambda _: None)
+
+    async def no_sleep(_):
+        pass
+    monkeypatch.setattr(fx_rates.asyncio, "sleep", no_sleep)
+
+
+def _provider(stub, fallback_path, **kwargs):
+    return RateProvider(fallback_path, base_url=stub.url, api_key="test-key", **kwargs)
+
+
+def test_rates_are_cached_in_memory_and_on_disk(stub, fallback_path):
+    provider = _provider(stub, fallback_path)
+    rates = provider.get_rates("USD")
+    assert rates == {"data": stub.rates("USD", ["EUR", "USD", "TRY"])}
+    assert provider.get_rates("USD") == rates
+    assert len(stub.requests) == 1
+
+    # a restart reads the stored copy instead of fetching again
+    assert _provider(stub, fallback_path).get_rates("USD") == rates
+    assert len(stub.requests) == 1
+    assert json.loads(open(fallback_path).read())["rates"]["USD"]["data"] == rates
+
+
+def test_concurrent_requests_share_one_fetch(stub, fallback_path):
+    provider = _provider(stub, fallback_path)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(provider.get_rates("EUR"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+
+    async def async_callers():
+        return await asyncio.gather(*(provider.aget_rates("EUR") for _ in range(8)))
+
+    results.extend(asyncio.run(async_callers()))
+    for thread in threads:
+        thread.join()
+    assert len(results) == 16 and all(result == results[0] for result in results)
+    assert [request["base_currency"] for request in stub.requests] == ["EUR"]
+
+
+def test_failed_requests_are_retried(stub, fallback_path):
+    stub.fail_next = 2
+    provider = _provider(stub, fallback_path, max_retries=3)
+    assert "data" in provider.get_rates("TRY")
+    assert len(stub.requests) == 3
+
+    stub.fail_next = 2
+    assert "data" in asyncio.run(_provider(stub, fallback_path, ttl=0).aget_rates("TRY"))
+    assert len(stub.requests) == 6
+
+
+def test_outage_falls_back_to_stored_rates(stub, fallback_path):
+    stale = {"data": {"USD": 1.0, "EUR": 0.8, "TRY": 35.0}}
+    with open(fallback_path, "w") as f:
+        json.dump({"rates": {"USD": {"fetched_at": (datetime.now() - timedelta(days=3)).isoformat(), "data": stale}}}, f)
+    stub.fail_next = 10
+    provider = _provider(stub, fallback_path, max_retries=1)
+    assert provider.get_rates("USD") == stale
+    with pytest.raises(RateFetchError):
+        provider.get_rates("EUR")
+
+
+def test_expired_rates_are_fetched_again(stub, fallback_path, monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(fx_rates.time, "time", lambda: now[0])
+    provider = _provider(stub, fallback_path, ttl=60)
+    provider.get_rates("USD")
+    now[0] += 30
+    provider.get_rates("USD")
+    now[0] += 31
+    provider.get_rates("USD")
+    assert len(stub.requests) == 2
+
+
+def test_reads_single_currency_file_layout(fallback_path):
+    with open(fallback_path, "w") as f:
+        json.dump({"currency_api": datetime.now().isoformat(),
+                   "data": {"base_currency": "TRY", "data": {"EUR": 0.02, "TRY": 1, "USD": 0.025}}}, f)
+    provider = RateProvider(fallback_path, base_url="http://127.0.0.1:9/unreachable", api_key="test-key")
+    assert provider.get_rates("TRY")["data"]["USD"] == 0.025
+
+
+def test_missing_api_key_is_reported(stub, fallback_path, monkeypatch):
+    monkeypatch.delenv("FREE_CURRENCY_API_KEY", raising=False)
+    provider = RateProvider(fallback_path, base_url=stub.url)
+    with pytest.raises(RateFetchError, match="FREE_CURRENCY_API_KEY"):
+        provider.get_rates("USD")
+    assert stub.requests == []
@@ -0,0 +1,76 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+import src.ledger as ledger
+from src.ledger import load_ledger, load_shared_ledger, read_ledger_csv
+from src.Tools.filter import DataFrameFilterTool
+from src.utils import dataset_version
+from src.vector_store import get_file_hash
+
+
+@pytest.fixture
+def ledger_csv(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(ledger, "LEDGER_CACHE_PREFIX", str(tmp_path / "ledger_cache_"))
+    path = tmp_path / "ledger.csv"
+    pd.DataFrame({
+        "Islem ID": [1, 2, 3],
+        "Cari Kodu": ["MUS-001", "TED-002", "MUS-001"],
+        "Cari Adi": ["Acme A.Ş.", "Beta Tedarik", "Acme A.Ş."],
+        "Cari Tipi": ["Musteri", "Tedarikci", "Musteri"],
+        "Belge No": ["BEL-1", "BEL-2", "BEL-3"],
+        "Belge Tarihi": ["2024-01-05 10:00:00", "2024-02-10 11:30:00", "2024-03-01 09:15:00"],
+        "Vade Tarihi": ["2024-02-05 10:00:00", "2024-03-10 11:30:00", "2024-04-01 09:15:00"],
+        "Islem Turu": ["Satis Faturasi", "Odeme", "Tahsilat"],
+        "Tutar": [100.25, 2500.5, 999.99],
+        "Para Birimi": ["TRY", "USD", "EUR"],
+        "Aciklama": ["a", "b", "c"],
+        "Odeme Durumu": ["Odendi", "Bekliyor", "Gecikmis"],
+        "Bakiye": [100.25, -2500.5, -999.99],
+    }).to_csv(path, index=False)
+    return str(path)
+
+
+def test_read_ledger_csv_applies_schema(ledger_csv):
+    df = read_ledger_csv(ledger_csv)
+    assert isinstance(df["Cari Kodu"].dtype, pd.CategoricalDtype)
+    assert isinstance(df["Para Birimi"].dtype, pd.CategoricalDtype)
+    assert pd.api.types.is_datetime64_any_dtype(df["Belge Tarihi"])
+    # money stays float64: float32 values round-trip per cent but their sums drift
+    assert df["Tutar"].dtype == "float64"
+    assert df["Islem ID"].dtype == "int8"
+    assert df["Tutar"].tolist() == [100.25, 2500.5, 999.99]
+
+
+def test_load_ledger_writes_and_reuses_cache(ledger_csv):
+    first = load_ledger(ledger_csv)
+    cache_path = ledger.get_ledger_cache_path(ledger_csv)
+    assert os.path.exists(cache_path)
+
+    second = load_ledger(ledger_csv)
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_shared_ledger_is_memory_mapped(ledger_csv):
+    expected = load_ledger(ledger_csv)
+    shared = load_shared_ledger(ledger_csv)
+    assert os.path.exists(ledger.get_shared_ledger_path(ledger_csv))
+    assert dataset_version(shared) == dataset_version(expected) == get_file_hash(ledger_csv)
+
+    # columns are read-only views over the mapped file, not private copies
+    for col in ["Islem ID", "Tutar", "Belge Tarihi"]:
+        assert not shared[col].to_numpy().flags.writeable
+    assert not shared["Cari Kodu"].cat.codes.to_numpy().flags.writeable
+    assert isinstance(shared["Cari Kodu"].dtype, pd.CategoricalDtype)
+
+    pd.testing.assert_frame_equal(shared, expected, check_dtype=False)
+
+
+def test_filter_tool_on_shared_ledger(ledger_csv):
+    shared = load_shared_ledger(ledger_csv)
+    tool = DataFrameFilterTool(df=shared)
+    result = tool._run(json.dumps({"action": "filter_data", "params": {"condition": "Aciklama == 'b' or `Cari Adi` contains 'acme'"}}))
+    assert "BEL-1" in result and "BEL-2" in result and "BEL-3" in result
@@ -0,0 +1,31 @@
+import pandas as pd
+
+from src.lexical_index import LexicalIndex, reciprocal_rank_fusion, tokenize, turkish_fold
+
+
+def test_turkish_fold():
+    assert turkish_fold("İSTANBUL") == "istanbul"
+    assert turkish_fold("ISPARTA") == turkish_fold("ısparta") == "isparta"
+    assert turkish_fold("ÖDEME ŞUBAT ÇİĞ") == "odeme subat cig"
+
+
+def test_tokenize_keeps_compound_ids():
+    assert tokenize("Fatura BEL-75900") == ["fatura", "bel-75900", "bel", "75900"]
+
+
+def test_bm25_ranks_and_matches():
+    df = pd.DataFrame({
+        "Aciklama": ["kira ödemesi", "kira", "hammadde alımı"],
+        "Cari Adi": ["Acme A.Ş.", "Işık Ltd.", "Beta Tedarik"],
+        "Belge No": ["BEL-1", "BEL-2", "BEL-3"],
+    })
+    index = LexicalIndex(df)
+    assert index.match_all("bel-3").tolist() == [2]
+    assert index.match_all("KIRA odemesi").tolist() == [0]
+    assert index.match_all("kira yok").tolist() == []
+    assert [row for row, _ in index.search("kira", k=5)] == [1, 0]
+    assert [row for row, _ in index.search("ışık")] == [1]
+
+
+def test_reciprocal_rank_fusion():
+    assert reciprocal_rank_fusion([["a", "b", "c"], ["c", "a"]]) == ["a", "c", "b"]
@@ -0,0 +1,111 @@
+import json
+
+import pandas as pd
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration
+
+import src.llm_cache as llm_cache
+from src.agent import SharedResources, create_agent_executor
+from src.llm_cache import LLMResponseCache, ReplayMiss
+from src.stub_llm import StubChatModel
+
+
+class CountingStub(StubChatModel):
+    calls: int = 0
+
+    def _respond(self, messages, tools):
+        self.calls += 1
+        return super()._respond(messages, tools)
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "llm_cache.sqlite")
+
+
+@pytest.fixture
+def resources(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / "ledger.csv"
+    pd.DataFrame({
+        "Islem ID": [1, 2, 3],
+        "Cari Adi": ["Acme A.Ş.", "Beta Tedarik", "Gama Tedarik"],
+        "Tutar": [100.0, 200.0, 300.0],
+        "Para Birimi": ["TRY", "USD", "USD"],
+        "Aciklama": ["kira", "hammadde", "nakliye"],
+    }).to_csv(path, index=False)
+    return SharedResources(str(path), embedding_backend="fake")
+
+
+def _run(resources, llm, question="Para birimine göre toplam tutar nedir?"):
+    return create_agent_executor(resources, llm, verbose=False).invoke({"input": question})["output"]
+
+
+def test_repeated_question_is_answered_from_cache(resources, cache_path):
+    llm = CountingStub(cache=LLMResponseCache(cache_path, dataset_version="v1"))
+    first = _run(resources, llm)
+    assert llm.calls == 2  # tool call, then final answer
+    assert _run(resources, llm) == first
+    assert llm.calls == 2
+    assert llm.cache.stats()["hits"] == 2
+
+
+def test_replay_serves_recorded_run_offline(resources, cache_path):
+    expected = _run(resources, CountingStub(cache=LLMResponseCache(cache_path, dataset_version="v1")))
+
+    llm = CountingStub(cache=LLMResponseCache(cache_path, dataset_version="v1", replay=True))
+    assert _run(resources, llm) == expected
+    assert llm.calls == 0
+    with pytest.raises(ReplayMiss):
+        _run(resources, llm, "Başka bir soru")
+
+
+def test_key_covers_dataset_version_but_not_message_ids(cache_path):
+    recorded = LLMResponseCache(cache_path, dataset_version="v1")
+    llm = CountingStub(cache=recorded)
+    llm.invoke([HumanMessage("merhaba", id="a")])
+    llm.invoke([HumanMessage(" merhaba ", id="b")])
+    assert llm.calls == 1
+
+    llm = CountingStub(cache=LLMResponseCache(cache_path, dataset_version="v2"))
+    llm.invoke([HumanMessage("merhaba")])
+    assert llm.calls == 1
+
+
+def test_expired_entries_are_refreshed(cache_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now[0])
+    llm = CountingStub(cache=LLMResponseCache(cache_path, ttl=60))
+    llm.invoke("merhaba")
+    now[0] += 30
+    llm.invoke("merhaba")
+    assert llm.calls == 1
+    now[0] += 61
+    llm.invoke("merhaba")
+    assert llm.calls == 2
+
+
+def test_least_recently_used_entries_are_evicted(cache_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now[0])
+    cache = LLMResponseCache(cache_path)
+    llm_string = "model"
+    response = [ChatGeneration(message=AIMessage(content="x" * 300))]
+
+    def prompt(text):
+        return json.dumps([{"kwargs": {"type": "human", "content": text}}])
+
+    for text in ["a", "b", "c"]:
+        now[0] += 1
+        cache.update(prompt(text), llm_string, response)
+    # room for three responses
+    cache.max_bytes = cache.stats()["bytes"]
+    now[0] += 1
+    assert cache.lookup(prompt("a"), llm_string) is not None  # "a" is now the most recently used
+    now[0] += 1
+    cache.update(prompt("d"), llm_string, response)
+
+    assert cache.lookup(prompt("b"), llm_string) is None
+    assert all(cache.lookup(prompt(text), llm_string) is not None for text in ["a", "c", "d"])
+    assert cache.stats()["entries"] == 3
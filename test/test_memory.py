@@ -0,0 +1,73 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.agent import SharedResources, create_agent_executor
+from src.memory import BoundedSummaryMemory
+from src.serialize import count_tokens
+from src.stub_llm import StubChatModel
+from src.workspace import Workspace
+
+
+@pytest.fixture
+def workspace():
+    workspace = Workspace(pd.DataFrame({"Tutar": np.arange(100, dtype=float)}))
+    workspace.add_table(pd.DataFrame({"Tutar": [1.0]}), name="table_1")
+    return workspace
+
+
+def _big_answer(rows=200):
+    table = "\n".join(f"MUS-{i:03d},{i * 10.5},TRY" for i in range(rows))
+    return f"Aggregation result (sum), saved as table 'table_1':\nCari Kodu,Tutar,Para Birimi\n{table}\nToplam tutar arttı, detaylar tabloda."
+
+
+def test_large_tables_become_view_references(workspace):
+    memory = BoundedSummaryMemory(workspace=workspace)
+    compacted = memory.compact(_big_answer())
+    assert "[201 table lines omitted; the data is in table 'table_1']" in compacted
+    assert "Toplam tutar arttı, detaylar tabloda." in compacted
+    assert "MUS-005" not in compacted
+    assert memory.compact("kısa cevap") == "kısa cevap"
+
+
+def test_unknown_names_fall_back_to_active_view(workspace):
+    workspace.add_view(np.arange(10))
+    memory = BoundedSummaryMemory(workspace=workspace)
+    compacted = memory.compact(_big_answer().replace("table_1", "table_9"))
+    assert "the data is in view 'view_1'" in compacted
+
+
+def test_old_turns_are_summarized_and_prompt_stays_flat(workspace):
+    memory = BoundedSummaryMemory(workspace=workspace, max_tokens=300, summary_max_tokens=120, max_message_tokens=100)
+    sizes = []
+    for turn in range(40):
+        memory.save_context({"input": f"Soru {turn}: müşteri bakiyeleri nedir?"}, {"output": _big_answer()})
+        history = memory.load_memory_variables({})["chat_history"]
+        sizes.append(sum(count_tokens(str(message.content)) for message in history))
+    assert max(sizes) <= 300 + 120 + 20
+    assert max(sizes[20:]) - min(sizes[20:]) < 60
+    summary = memory.load_memory_variables({})["chat_history"][0].content
+    assert summary.startswith("Summary of the earlier conversation:")
+    assert "Soru 0:" not in summary and "müşteri bakiyeleri" in summary
+    assert memory.chat_memory.messages[-2].content == "Soru 39: müşteri bakiyeleri nedir?"
+
+
+def test_agent_sessions_keep_bounded_history(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / "ledger.csv"
+    pd.DataFrame({
+        "Cari Kodu": [f"MUS-{i:03d}" for i in range(300)],
+        "Tutar": np.arange(300) * 1.5,
+        "Para Birimi": ["TRY", "USD", "EUR"] * 100,
+    }).to_csv(path, index=False)
+    executor = create_agent_executor(SharedResources(str(path), embedding_backend="fake"), StubChatModel(), verbose=False)
+    executor.memory.max_message_tokens = 60
+    question = json.dumps({"tool": "dataframe_aggregator", "tool_input": {
+        "action": "apply_aggregation", "params": {"group_by": ["Cari Kodu"], "aggregation": "sum"}}})
+    for _ in range(5):
+        executor.invoke({"input": question})
+    messages = executor.memory.chat_memory.messages
+    assert all(count_tokens(str(message.content)) <= executor.memory.max_message_tokens for message in messages)
+    assert "the data is in table 'table_" in messages[-1].content
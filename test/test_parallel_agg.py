@@ -0,0 +1,75 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.Tools.aggregate as aggregate
+from src.Tools.aggregate import DataFrameAggregateTool
+from src.parallel_agg import parallel_aggregate
+from src.rollup import groupers
+
+
+@pytest.fixture
+def ledger_df():
+    rng = np.random.default_rng(1)
+    n = 5000
+    tutar = rng.uniform(100, 10000, n).round(2)
+    tutar[::17] = np.nan
+    return pd.DataFrame({
+        "Islem ID": np.arange(n),
+        "Cari Kodu": pd.Categorical(rng.choice(["MUS-001", "MUS-002", "TED-001", None], n)),
+        "Para Birimi": pd.Categorical(rng.choice(["TRY", "USD", "EUR"], n)),
+        "Aciklama": pd.array(rng.choice(["Fatura", "Tahsilat", None], n), dtype="string"),
+        "Belge Tarihi": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365, n), unit="D"),
+        "Tutar": tutar.astype("float32"),
+        "Bakiye": rng.uniform(-10000, 10000, n).round(2),
+    })
+
+
+def serial(grouped, function):
+    try:
+        return grouped.agg(function)
+    except TypeError:
+        return grouped.agg(function, numeric_only=True)
+
+
+@pytest.mark.parametrize("group_by", [["Para Birimi"], ["Cari Kodu", "Belge Ayi"]])
+@pytest.mark.parametrize("function", ["sum", "count", "min", "max", "mean"])
+def test_parallel_matches_serial(ledger_df, group_by, function):
+    grouped = ledger_df.groupby(groupers(ledger_df, group_by), observed=True)
+    expected = serial(grouped, function)
+    result = parallel_aggregate(grouped, group_by, function, workers=3, min_rows=0)
+
+    assert result is not None
+    assert list(result.columns) == list(expected.columns)
+    assert result.index.equals(expected.index)
+    # sums and means of float32 columns are float64, like the rollup and chunked paths
+    widened = {col: np.dtype("float64") if function in ("sum", "mean") and dtype.kind == "f" else dtype
+               for col, dtype in expected.dtypes.items()}
+    assert dict(result.dtypes) == widened
+    for col in expected.columns:
+        if function in ("sum", "mean") and expected[col].dtype.kind == "f":
+            np.testing.assert_allclose(result[col], expected[col], rtol=1e-6 if expected[col].dtype == np.float32 else 1e-12)
+        else:
+            pd.testing.assert_series_equal(result[col], expected[col])
+
+
+def test_small_frames_stay_serial(ledger_df):
+    grouped = ledger_df.groupby(groupers(ledger_df, ["Para Birimi"]), observed=True)
+    assert parallel_aggregate(grouped, ["Para Birimi"], "sum", workers=3, min_rows=len(ledger_df) + 1) is None
+    assert parallel_aggregate(grouped, ["Para Birimi"], "median", workers=3, min_rows=0) is None
+
+
+@pytest.mark.parametrize("parallel", [False, True])
+def test_float32_sums_are_float64_on_every_path(ledger_df, monkeypatch, parallel):
+    if parallel:
+        monkeypatch.setattr(aggregate, "parallel_aggregate",
+                            lambda *args: parallel_aggregate(*args, workers=3, min_rows=0))
+    df = ledger_df.assign(Tutar=(ledger_df["Tutar"] * 1000).astype("float32"))
+    tool = DataFrameAggregateTool(df=df)
+    result = tool._run(json.dumps({"action": "apply_aggregation", "params": {"group_by": ["Para Birimi"], "aggregation": "sum"}}))
+    table = tool.workspace.table(result.split("'")[1])
+    expected = df.astype({"Tutar": "float64"}).groupby("Para Birimi", observed=True)["Tutar"].sum()
+    assert table["Tutar"].dtype == np.float64
+    np.testing.assert_allclose(table["Tutar"], expected, rtol=1e-12)
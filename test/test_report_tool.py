@@ -0,0 +1,73 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.Tools.aggregate import DataFrameAggregateTool
+from src.Tools.filter import DataFrameFilterTool
+from src.Tools.output import ReportGeneratorTool
+from src.workspace import Workspace
+
+
+@pytest.fixture
+def workspace():
+    n = 25_000
+    return Workspace(pd.DataFrame({
+        "Cari Kodu": pd.Categorical([f"MUS-{i % 40:03d}" for i in range(n)]),
+        "Para Birimi": pd.Categorical(["TRY", "USD", "EUR", "TRY"] * (n // 4)),
+        "Tutar": np.arange(n) * 1.25,
+    }))
+
+
+def _report(tool, **config):
+    return tool._run(json.dumps({"title": "Aylık Rapor", "summary": "Özet", **config}))
+
+
+def test_report_pulls_rows_from_views_and_tables(workspace, tmp_path):
+    DataFrameFilterTool(workspace=workspace)._filter_data("Tutar < 100")
+    DataFrameAggregateTool(workspace=workspace)._run(json.dumps(
+        {"action": "apply_aggregation", "params": {"group_by": ["Para Birimi"], "aggregation": "sum", "view": "base"}}))
+    path = tmp_path / "report.md"
+    tool = ReportGeneratorTool(workspace=workspace, report_dir=str(tmp_path))
+    result = _report(tool, tables=["view_1", "table_2"], file_name="report.md")
+    assert result.startswith(f"Report saved to '{path}'.")
+
+    text = path.read_text(encoding="utf-8")
+    assert "**Dataset Overview (`view_1`):**\n- Total Records: 80" in text
+    assert "| Cari Kodu | Para Birimi | Tutar |" in text
+    assert "| MUS-001 | USD | 1.25 |" in text
+    assert "*Showing first 10 rows of 80 total records*" in text
+    total = workspace.table("table_2").loc["TRY", "Tutar"]
+    assert f"| TRY | {total:.2f}".rstrip("0").rstrip(".") in text
+
+
+def test_large_tables_are_streamed_to_the_file(workspace, tmp_path):
+    tool = ReportGeneratorTool(workspace=workspace, report_dir=str(tmp_path), token_budget=200)
+    result = _report(tool, tables=["base"], max_table_rows=0, output_format="dashboard")
+    path = result.split("'")[1]
+    lines = open(path, encoding="utf-8").read().splitlines()
+    # header, separator and every row, written in several chunks
+    assert sum(line.startswith("| MUS-") for line in lines) == 25_000
+    assert lines.count("| Cari Kodu | Para Birimi | Tutar |") == 1
+    # the reply stays within the tool's token budget
+    assert "[truncated to fit 200 tokens]" in result and len(result) < 2000
+
+
+def test_unknown_names_are_reported(workspace, tmp_path):
+    result = _report(ReportGeneratorTool(workspace=workspace, report_dir=str(tmp_path)), tables=["view_9"])
+    assert "Unknown views/tables ['view_9']" in result and "Active view: base" in result
+    assert not list(tmp_path.iterdir())
+
+
+@pytest.mark.parametrize("file_name", ["../../src/agent.py", "/tmp/report.md", "sub/report.md", ".."])
+def test_file_name_stays_in_report_dir(workspace, tmp_path, file_name):
+    result = _report(ReportGeneratorTool(workspace=workspace, report_dir=str(tmp_path / "reports")), file_name=file_name)
+    assert result.startswith("❌ **Error**") and "plain file name" in result
+    assert not list(tmp_path.iterdir())
+
+
+def test_data_sample_still_rendered(tmp_path):
+    tool = ReportGeneratorTool(report_dir=str(tmp_path))
+    result = _report(tool, data_sample=[{"Urun": "A", "Satis": 5000}, {"Urun": "B", "Satis": 3000}])
+    assert "- Total Records: 2" in result and "| A | 5000 |" in result
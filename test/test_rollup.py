@@ -0,0 +1,136 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.Tools.aggregate import AGGREGATION_CACHE, DataFrameAggregateTool
+from src.rollup import RollupCube, groupers
+from src.workspace import Workspace
+
+
+@pytest.fixture
+def ledger_df():
+    rng = np.random.default_rng(0)
+    n = 300
+    return pd.DataFrame({
+        "Cari Kodu": pd.Categorical(rng.choice(["MUS-001", "MUS-002", "TED-001"], n)),
+        "Cari Tipi": pd.Categorical(rng.choice(["Musteri", "Tedarikci"], n)),
+        "Para Birimi": pd.Categorical(rng.choice(["TRY", "USD", "EUR"], n)),
+        "Odeme Durumu": pd.Categorical(rng.choice(["Odendi", "Bekliyor"], n)),
+        "Islem Turu": pd.Categorical(rng.choice(["Satis Faturasi", "Tahsilat"], n)),
+        "Belge Tarihi": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365, n), unit="D"),
+        "Tutar": rng.uniform(100, 10000, n).round(2),
+        "Bakiye": rng.uniform(-10000, 10000, n).round(2),
+    })
+
+
+@pytest.mark.parametrize("group_by", [["Para Birimi"], ["Cari Tipi", "Belge Ayi"], ["Cari Kodu", "Odeme Durumu", "Islem Turu"]])
+@pytest.mark.parametrize("function", ["sum", "count", "min", "max", "mean", "std"])
+def test_rollup_matches_groupby(ledger_df, group_by, function):
+    expected = ledger_df.groupby(groupers(ledger_df, group_by), observed=True)[["Tutar", "Bakiye"]].agg(function)
+    result = RollupCube(ledger_df).rollup(group_by, function)
+    assert list(result.index) == list(expected.index)
+    np.testing.assert_allclose(result.to_numpy(dtype=float), expected.to_numpy(dtype=float), rtol=1e-9)
+
+
+def test_aggregate_tool_uses_cube_for_base_view(ledger_df, monkeypatch):
+    workspace = Workspace(ledger_df)
+    tool = DataFrameAggregateTool(workspace=workspace, cube=RollupCube(ledger_df))
+
+    def fail(*args, **kwargs):
+        raise AssertionError("raw groupby should not run")
+
+    monkeypatch.setattr(DataFrameAggregateTool, "_group_by", fail)
+    result = tool._run(json.dumps({"action": "apply_aggregation", "params": {"group_by": ["Para Birimi"], "aggregation": "sum"}}))
+    assert "Aggregation result (sum)" in result and "USD" in result
+
+
+def test_aggregate_tool_falls_back_outside_cube(ledger_df):
+    workspace = Workspace(ledger_df)
+    tool = DataFrameAggregateTool(workspace=workspace, cube=RollupCube(ledger_df))
+    workspace.add_view(np.arange(10))
+    result = tool._run(json.dumps({"action": "apply_aggregation", "params": {"group_by": ["Para Birimi"], "aggregation": "sum"}}))
+    expected = ledger_df.head(10).groupby("Para Birimi", observed=True)["Tutar"].sum()
+    assert f"{expected.iloc[0]:.2f}"[:6] in result
+    assert tool.grouped_data is not None
+
+
+def _aggregate(tool, group_by, aggregation, **params):
+    return tool._run(json.dumps({"action": "apply_aggregation", "params": {"group_by": group_by, "aggregation": aggregation, **params}}))
+
+
+def test_repeated_aggregation_is_served_from_cache(ledger_df):
+    AGGREGATION_CACHE.clear()
+    workspace = Workspace(ledger_df)
+    tool = DataFrameAggregateTool(workspace=workspace)
+    workspace.add_view(np.arange(50))
+
+    first = _aggregate(tool, ["Para Birimi"], "sum")
+    hits = AGGREGATION_CACHE.hits
+    second = _aggregate(tool, ["Para Birimi"], "sum")
+    assert AGGREGATION_CACHE.hits == hits + 1
+    assert first.split(":", 1)[1] == second.split(":", 1)[1]
+
+
+def test_grouping_is_reused_across_functions(ledger_df):
+    AGGREGATION_CACHE.clear()
+    workspace = Workspace(ledger_df)
+    tool = DataFrameAggregateTool(workspace=workspace)
+    workspace.add_view(np.arange(50))
+
+    _aggregate(tool, ["Para Birimi"], "sum")
+    _aggregate(tool, ["Para Birimi"], "mean")
+    assert tool.cache_stats()["grouping_reuses"] == 1
+    expected = ledger_df.head(50).groupby("Para Birimi", observed=True)["Tutar"].mean()
+    assert f"{expected.iloc[0]:.2f}"[:6] in _aggregate(tool, ["Para Birimi"], "mean")
+
+
+def test_cache_key_follows_view(ledger_df):
+    AGGREGATION_CACHE.clear()
+    workspace = Workspace(ledger_df)
+    tool = DataFrameAggregateTool(workspace=workspace)
+    workspace.add_view(np.arange(50))
+    _aggregate(tool, ["Para Birimi"], "sum")
+
+    workspace.add_view(np.arange(10))
+    result = _aggregate(tool, ["Para Birimi"], "sum")
+    expected = ledger_df.head(10).groupby("Para Birimi", observed=True)["Tutar"].sum()
+    assert f"{expected.iloc[0]:.2f}"[:6] in result
+    assert tool.cache_stats()["grouping_reuses"] == 0
+
+
+def test_cold_call_looks_up_the_cache_once(ledger_df):
+    AGGREGATION_CACHE.clear()
+    workspace = Workspace(ledger_df)
+    tool = DataFrameAggregateTool(workspace=workspace)
+    workspace.add_view(np.arange(50))
+    hits, misses = AGGREGATION_CACHE.hits, AGGREGATION_CACHE.misses
+
+    _aggregate(tool, ["Para Birimi"], "sum")
+    assert (AGGREGATION_CACHE.hits - hits, AGGREGATION_CACHE.misses - misses) == (0, 1)
+    _aggregate(tool, ["Para Birimi"], "sum")
+    assert (AGGREGATION_CACHE.hits - hits, AGGREGATION_CACHE.misses - misses) == (1, 1)
+
+
+def test_reused_grouping_does_not_rebuild_the_frame(ledger_df, monkeypatch):
+    AGGREGATION_CACHE.clear()
+    workspace = Workspace(ledger_df)
+    tool = DataFrameAggregateTool(workspace=workspace)
+    workspace.add_view(np.arange(50))
+    _aggregate(tool, ["Para Birimi"], "sum")
+
+    def fail(*args, **kwargs):
+        raise AssertionError("the view should not be materialized again")
+
+    monkeypatch.setattr(workspace, "frame", fail)
+    assert "Aggregation result (mean)" in _aggregate(tool, ["Para Birimi"], "mean")
+    assert tool.cache_stats()["grouping_reuses"] == 1
+
+
+def test_aggregation_without_group_skips_categoricals(ledger_df):
+    AGGREGATION_CACHE.clear()
+    tool = DataFrameAggregateTool(workspace=Workspace(ledger_df))
+    result = _aggregate(tool, [], "sum")
+    assert result.startswith("Aggregation result (no group)")
+    assert f"{ledger_df['Tutar'].sum():.2f}"[:6] in result
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import serialize
+from src.serialize import count_tokens, format_column, serialize_frame, serialize_value
+
+
+@pytest.fixture
+def ledger_df():
+    n = 400
+    return pd.DataFrame({
+        "Cari Kodu": pd.Categorical([f"MUS-{i % 3:03d}" for i in range(n)]),
+        "Belge Tarihi": pd.Timestamp("2024-01-01") + pd.to_timedelta(np.arange(n) % 30, unit="D"),
+        "Tutar": np.arange(n) * 10.255,
+    })
+
+
+def test_floats_rounded_by_magnitude():
+    assert format_column(pd.Series([1250.5, 3.0, np.nan])).tolist() == ["1250.5", "3", ""]
+    assert format_column(pd.Series([1.0, 2.0])).tolist() == ["1", "2"]
+    assert format_column(pd.Series([0.000123456, 0.5])).tolist() == ["0.0001235", "0.5"]
+
+
+def test_dates_without_time():
+    dates = pd.Series(pd.to_datetime(["2024-01-05", None]))
+    assert format_column(dates).tolist() == ["2024-01-05", ""]
+    assert format_column(pd.Series(pd.to_datetime(["2024-01-05 13:30"]))).tolist() == ["2024-01-05 13:30"]
+
+
+def test_repeated_strings_get_a_legend(ledger_df):
+    text = serialize_frame(ledger_df.head(6))
+    lines = text.splitlines()
+    assert lines[0] == "#Cari Kodu: 0=MUS-000|1=MUS-001|2=MUS-002"
+    assert lines[1] == "Cari Kodu,Belge Tarihi,Tutar"
+    assert lines[3] == "1,2024-01-02,10.26"
+
+
+def test_budget_truncates_with_note(ledger_df):
+    text = serialize_frame(ledger_df, max_tokens=200)
+    assert count_tokens(text) <= 200
+    shown = len([line for line in text.splitlines() if not line.startswith(("#", "["))]) - 1
+    assert 0 < shown < len(ledger_df)
+    assert text.endswith(f"[truncated: {shown} of {len(ledger_df)} rows shown to fit 200 tokens; "
+                         "filter, group or select fewer rows to see more]")
+
+
+def test_total_rows_of_a_head(ledger_df):
+    text = serialize_frame(ledger_df.head(3), total_rows=len(ledger_df), index=False)
+    assert f"3 of {len(ledger_df)} rows" in text
+
+
+def test_group_index_is_kept():
+    result = pd.DataFrame({"Tutar": [1.5, 2.5]}, index=pd.Index(["EUR", "USD"], name="Para Birimi"))
+    assert serialize_frame(result).splitlines() == ["Para Birimi,Tutar", "EUR,1.5", "USD,2.5"]
+
+
+def test_serialize_value_json_and_truncation():
+    assert serialize_value({"a": 1, "b": [1, 2]}) == '{"a":1,"b":[1,2]}'
+    text = serialize_value("x" * 10_000, max_tokens=100)
+    assert text.endswith("[truncated to fit 100 tokens]")
+    assert count_tokens(text) <= 100
+
+
+def test_count_tokens_without_tiktoken(monkeypatch):
+    monkeypatch.setattr(serialize, "_encoder", False)
+    assert count_tokens("abcdef") == 2
@@ -0,0 +1,103 @@
+import asyncio
+import json
+from typing import ClassVar
+
+import pandas as pd
+import pytest
+
+from src.agent import SharedResources
+from src.server import AgentServer
+from src.stub_llm import StubChatModel
+
+
+@pytest.fixture(scope="module")
+def resources(tmp_path_factory):
+    tmp_path = tmp_path_factory.mktemp("server")
+    monkeypatch = pytest.MonkeyPatch()
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / "ledger.csv"
+    pd.DataFrame({
+        "Islem ID": [1, 2, 3, 4],
+        "Cari Kodu": ["MUS-001", "MUS-001", "TED-002", "TED-003"],
+        "Cari Adi": ["Acme A.Ş.", "Acme A.Ş.", "Beta Tedarik", "Gama Tedarik"],
+        "Belge Tarihi": ["2024-01-05 10:00:00", "2024-03-10 11:30:00", "2024-03-15 09:15:00", "2024-06-01 08:00:00"],
+        "Tutar": [100.0, 200.0, 300.0, 400.0],
+        "Para Birimi": ["TRY", "USD", "USD", "EUR"],
+        "Aciklama": ["kira", "kira", "hammadde", "nakliye"],
+        "Odeme Durumu": ["Odendi", "Bekliyor", "Odendi", "Gecikmis"],
+    }).to_csv(path, index=False)
+    resources = SharedResources(str(path), embedding_backend="fake")
+    resources.wait_until_warm()
+    yield resources
+    monkeypatch.undo()
+
+
+def _tool_request(session, tool, tool_input):
+    return {"session": session, "input": json.dumps({"tool": tool, "tool_input": tool_input})}
+
+
+def _workspace(server, session):
+    return server._sessions[session]["executor"].tools[0].workspace
+
+
+def test_sessions_have_isolated_workspaces(resources):
+    async def run():
+        server = AgentServer(resources, StubChatModel())
+        return server, await asyncio.gather(
+            server.handle(_tool_request("a", "dataframe_transformer", {"action": "filter_data", "params": {"condition": "Tutar > 150"}})),
+            server.handle({"session": "b", "input": "Para birimine göre toplam tutar nedir?"}),
+        )
+
+    server, (a, b) = asyncio.run(run())
+    assert "Saved as view 'view_1'" in a["output"]
+    assert "Aggregation result (sum)" in b["output"] and "EUR" in b["output"]
+    assert _workspace(server, "a").active == "view_1"
+    assert _workspace(server, "b").active == "base"
+    # the ledger itself is shared, not copied per session
+    assert _workspace(server, "a").base is _workspace(server, "b").base is resources.ledger()
+
+
+class CountingStub(StubChatModel):
+    """Stub model recording how many model calls overlap."""
+    in_flight: ClassVar[int] = 0
+    peak: ClassVar[int] = 0
+
+    async def _agenerate(self, *args, **kwargs):
+        CountingStub.in_flight += 1
+        CountingStub.peak = max(CountingStub.peak, CountingStub.in_flight)
+        try:
+            return await super()._agenerate(*args, **kwargs)
+        finally:
+            CountingStub.in_flight -= 1
+
+
+@pytest.mark.parametrize("limit", [1, 3])
+def test_concurrency_limit(resources, limit):
+    async def run():
+        server = AgentServer(resources, CountingStub(latency=0.02), max_concurrency=limit)
+        return await asyncio.gather(*(server.handle({"session": str(i), "input": "toplam"}) for i in range(6)))
+
+    CountingStub.peak = 0
+    responses = asyncio.run(run())
+    assert all("Aggregation result" in response["output"] for response in responses)
+    assert CountingStub.peak == limit
+
+
+def test_json_lines_over_tcp(resources):
+    async def run():
+        server = await AgentServer(resources, StubChatModel()).start("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(json.dumps({"session": "a", "input": "toplam", "id": 1}).encode() + b"\n")
+            writer.write(json.dumps({"session": "a", "command": "history", "id": 2}).encode() + b"\n")
+            writer.write(b"not json\n")
+            await writer.drain()
+            responses = [json.loads(await reader.readline()) for _ in range(3)]
+            writer.close()
+        return responses
+
+    responses = asyncio.run(run())
+    by_id = {response.get("id"): response for response in responses}
+    assert "Aggregation result" in by_id[1]["output"]
+    assert "error" in by_id[None]
@@ -0,0 +1,53 @@
+import json
+import threading
+
+import pandas as pd
+import pytest
+
+import src.agent as agent
+from src.agent import SharedResources, create_tools
+
+
+@pytest.fixture
+def ledger_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / "ledger.csv"
+    pd.DataFrame({
+        "Islem ID": [1, 2, 3],
+        "Cari Adi": ["Acme A.Ş.", "Beta Tedarik", "Gama Tedarik"],
+        "Tutar": [100.0, 200.0, 300.0],
+        "Para Birimi": ["TRY", "USD", "EUR"],
+        "Aciklama": ["kira", "hammadde", "nakliye"],
+    }).to_csv(path, index=False)
+    return str(path)
+
+
+def test_tools_are_created_without_loading_anything(ledger_file, monkeypatch):
+    monkeypatch.setattr(agent, "load_shared_ledger", lambda path: pytest.fail("ledger loaded eagerly"))
+    monkeypatch.setattr(SharedResources, "_build_vectorstore", lambda self: pytest.fail("vector store built eagerly"))
+    tools = create_tools(SharedResources(ledger_file, embedding_backend="fake"))
+    assert {tool.name for tool in tools} >= {"dataframe_analyzer", "dataframe_transformer", "dataframe_aggregator"}
+
+
+def test_analyzer_reports_index_warming(ledger_file, monkeypatch):
+    release = threading.Event()
+    build = SharedResources._build_vectorstore
+
+    def slow_build(self):
+        release.wait(5)
+        return build(self)
+
+    monkeypatch.setattr(SharedResources, "_build_vectorstore", slow_build)
+    resources = SharedResources(ledger_file, embedding_backend="fake")
+    resources.warm_up()
+    analyzer = create_tools(resources)[0]
+
+    request = {"action": "similarity_search", "params": {"query": "kira", "mode": "vector"}}
+    assert "Semantic index warming" in analyzer._run(json.dumps(request))
+    request["params"]["mode"] = "hybrid"
+    result = analyzer._run(json.dumps(request))
+    assert "keyword results only" in result and "Islem ID: 1" in result
+
+    release.set()
+    resources.wait_until_warm(timeout=30)
+    assert "warming" not in analyzer._run(json.dumps(request))
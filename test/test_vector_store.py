@@ -0,0 +1,128 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+import src.vector_store as vector_store
+from src.vector_store import get_file_hash, get_vectorstore, load_manifest, write_manifest
+
+
+@pytest.fixture
+def manifest_path(tmp_path):
+    return str(tmp_path / "manifest.json")
+
+
+@pytest.fixture
+def ledger_file(tmp_path):
+    path = tmp_path / "ledger.csv"
+    path.write_text("Islem ID,Tutar\n1,10.0\n2,20.0\n")
+    return str(path)
+
+
+def test_hash_changes_with_content(ledger_file, manifest_path):
+    first = get_file_hash(ledger_file, manifest_path=manifest_path)
+    with open(ledger_file, "w") as f:
+        f.write("Islem ID,Tutar\n1,10.0\n2,25.0\n")
+    os.utime(ledger_file, ns=(0, 1))
+    assert get_file_hash(ledger_file, manifest_path=manifest_path) != first
+
+
+def test_unchanged_file_is_not_read(ledger_file, manifest_path, monkeypatch):
+    first = get_file_hash(ledger_file, manifest_path=manifest_path)
+    assert load_manifest(manifest_path)[os.path.abspath(ledger_file)]["hash"] == first
+
+    def fail(*args, **kwargs):
+        raise AssertionError("file should not be hashed again")
+
+    monkeypatch.setattr(vector_store, "_hash_range", fail)
+    assert get_file_hash(ledger_file, manifest_path=manifest_path) == first
+
+
+def test_append_only_hashes_tail(ledger_file, manifest_path, monkeypatch):
+    monkeypatch.setattr(vector_store, "APPEND_CHECK_SIZE", 4)
+    first = get_file_hash(ledger_file, append_only=True, manifest_path=manifest_path)
+    old_size = os.path.getsize(ledger_file)
+    with open(ledger_file, "a") as f:
+        f.write("3,30.0\n")
+
+    ranges = []
+    original = vector_store._hash_range
+
+    def record(f, start, end, hasher=None):
+        ranges.append((start, end))
+        return original(f, start, end, hasher)
+
+    monkeypatch.setattr(vector_store, "_hash_range", record)
+    second = get_file_hash(ledger_file, append_only=True, manifest_path=manifest_path)
+    assert second != first
+    assert (0, os.path.getsize(ledger_file)) not in ranges
+    assert (old_size, os.path.getsize(ledger_file)) in ranges
+
+
+def test_concurrent_manifest_writes_use_their_own_temp_files(manifest_path, tmp_path):
+    manifests = [{f"file_{i}": {"hash": str(i)}} for i in range(32)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda manifest: write_manifest(manifest, manifest_path), manifests))
+    assert load_manifest(manifest_path) in manifests
+    assert os.listdir(tmp_path) == ["manifest.json"]
+
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+    embedded: list = []
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return super().embed_documents(texts)
+
+
+def write_rows(path, rows):
+    lines = ["Islem ID,Aciklama,Tutar"] + [f"{i},{text},{amount}" for i, text, amount in rows]
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def test_get_vectorstore_embeds_only_changed_rows(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("chroma_db_oldhash")
+    path = str(tmp_path / "ledger.csv")
+    persist_dir = str(tmp_path / "chroma_db")
+    embeddings = CountingEmbeddings(size=8, embedded=[])
+
+    write_rows(path, [(1, "kira", 10.0), (2, "maas", 20.0), (3, "fatura", 30.0)])
+    store = get_vectorstore(path, embeddings, persist_dir=persist_dir)
+    assert len(embeddings.embedded) == 3
+    assert not os.path.exists("chroma_db_oldhash")
+
+    write_rows(path, [(1, "kira", 10.0), (2, "maas odemesi", 20.0), (4, "yeni", 40.0)])
+    os.utime(path, ns=(0, 1))
+    embeddings.embedded.clear()
+    store = get_vectorstore(path, embeddings, persist_dir=persist_dir)
+    assert len(embeddings.embedded) == 2
+    assert sorted(store.get()["ids"]) == ["1", "2", "4"]
+
+    embeddings.embedded.clear()
+    get_vectorstore(path, embeddings, persist_dir=persist_dir)
+    assert embeddings.embedded == []
+
+
+def test_interrupted_sync_resumes_after_last_checkpoint(tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_store, "SYNC_CHECKPOINT_SIZE", 2)
+    path = str(tmp_path / "ledger.csv")
+    persist_dir = str(tmp_path / "chroma_db")
+    write_rows(path, [(i, f"satir {i}", 10.0 * i) for i in range(1, 6)])
+
+    class FailingEmbeddings(CountingEmbeddings):
+        def embed_documents(self, texts):
+            if len(self.embedded) >= 2:
+                raise RuntimeError("connection lost")
+            return super().embed_documents(texts)
+
+    with pytest.raises(RuntimeError):
+        get_vectorstore(path, FailingEmbeddings(size=8, embedded=[]), persist_dir=persist_dir)
+
+    # the first checkpoint is in the store; only the other three rows are embedded
+    embeddings = CountingEmbeddings(size=8, embedded=[])
+    store = get_vectorstore(path, embeddings, persist_dir=persist_dir)
+    assert len(embeddings.embedded) == 3
+    assert sorted(store.get()["ids"]) == ["1", "2", "3", "4", "5"]
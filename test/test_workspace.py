@@ -0,0 +1,112 @@
+import json
+import warnings
+
+import pandas as pd
+import pytest
+
+from src.Tools.aggregate import DataFrameAggregateTool
+from src.Tools.currency import CurrencyTool, CurrencyEnum
+from src.Tools.filter import DataFrameFilterTool
+from src.Tools.inspect import DataFrameInspectTool
+from src.workspace import Workspace
+
+
+@pytest.fixture
+def workspace():
+    return Workspace(pd.DataFrame({
+        "Cari Kodu": ["MUS-001", "MUS-002", "MUS-001", "TED-001"] * 5,
+        "Para Birimi": ["USD", "EUR", "TRY", "USD"] * 5,
+        "Tutar": [float(i) for i in range(20)],
+    }))
+
+
+def test_tools_share_filtered_view(workspace):
+    filter_tool = DataFrameFilterTool(workspace=workspace)
+    aggregate_tool = DataFrameAggregateTool(workspace=workspace)
+    inspect_tool = DataFrameInspectTool(workspace=workspace)
+
+    result = filter_tool._run(json.dumps({"action": "filter_data", "params": {"condition": "Tutar >= 4", "name": "big"}}))
+    assert "Saved as view 'big'" in result
+    assert "Result has 16 rows" in result
+    assert workspace.active == "big"
+    assert len(filter_tool.df) == 16
+
+    result = aggregate_tool._run(json.dumps({"action": "apply_aggregation", "params": {"group_by": ["Cari Kodu"], "aggregation": "count"}}))
+    assert "MUS-001" in result and "8" in result
+
+    result = inspect_tool._run(json.dumps({"action": "get_value_counts", "params": {"column": "Para Birimi", "view": "base"}}))
+    assert "10" in result
+
+
+def test_filter_chains_on_a_view(workspace):
+    tool = DataFrameFilterTool(workspace=workspace)
+    tool._filter_data("`Cari Kodu` == 'MUS-001'", name="mus")
+    tool._filter_data("Tutar > 10", view="mus", name="mus_big")
+    assert workspace.rows("mus_big").tolist() == [12, 14, 16, 18]
+    assert workspace.size("base") == 20
+
+
+def test_currency_conversion_does_not_touch_base(workspace):
+    base_columns = list(workspace.base.columns)
+    DataFrameFilterTool(workspace=workspace)._filter_data("Tutar < 4")
+    tool = CurrencyTool(workspace=workspace, base_currency=CurrencyEnum.USD)
+    result = tool._merge_currencies({"data": {"USD": 1.0, "EUR": 2.0, "TRY": 0.5}}, "Para Birimi", ["Tutar"])
+    assert result["Tutar_in_USD"].tolist() == [0.0, 0.5, 4.0, 3.0]
+    assert list(workspace.base.columns) == base_columns
+    assert "Tutar_in_USD" in workspace.columns()
+    assert "Tutar_in_USD" not in workspace.columns("base")
+
+
+def test_refined_view_keeps_derived_columns(workspace):
+    filter_tool = DataFrameFilterTool(workspace=workspace)
+    filter_tool._filter_data("Tutar < 8", name="small")
+    tool = CurrencyTool(workspace=workspace, base_currency=CurrencyEnum.USD)
+    tool._merge_currencies({"data": {"USD": 1.0, "EUR": 2.0, "TRY": 0.5}}, "Para Birimi", ["Tutar"], view="small")
+
+    # a condition on base columns keeps the converted column for the selected rows
+    filter_tool._filter_data("`Cari Kodu` == 'MUS-001'", view="small", name="mus")
+    assert workspace.frame("mus")["Tutar_in_USD"].tolist() == [0.0, 4.0, 4.0, 12.0]
+
+    # a condition on the converted column is evaluated on the view's rows
+    result = filter_tool._filter_data("Tutar_in_USD > 3", view="small", name="converted")
+    assert "Error" not in result
+    assert workspace.rows("converted").tolist() == [2, 4, 6, 7]
+    assert workspace.frame("converted")["Tutar_in_USD"].tolist() == [4.0, 4.0, 12.0, 7.0]
+    assert workspace.view_key("converted") != workspace.view_key("small")
+
+
+def test_base_frame_is_not_copied(workspace):
+    assert workspace.frame("base") is workspace.base
+
+
+def test_derived_columns_are_assigned_without_warnings(workspace):
+    workspace.add_column("Tutar_x2", workspace.base["Tutar"] * 2, "base")
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        assert workspace.frame("base", limit=3)["Tutar_x2"].tolist() == [0.0, 2.0, 4.0]
+        parts = list(workspace.iter_frame("base", chunk_rows=8))
+    assert [len(part) for part in parts] == [8, 8, 4]
+    assert parts[1]["Tutar_x2"].tolist() == [float(2 * i) for i in range(8, 16)]
+    assert "Tutar_x2" not in workspace.base.columns
+
+
+def test_tools_expose_direct_calls(workspace):
+    view = DataFrameFilterTool(workspace=workspace).filter_view("Tutar >= 4", name="big")
+    assert view == "big" and workspace.size("big") == 16
+    aggregate_tool = DataFrameAggregateTool(workspace=workspace)
+    table = aggregate_tool.aggregate_view(["Cari Kodu"], "count", view)
+    assert workspace.table(table).loc["MUS-001", "Tutar"] == 8
+    with pytest.raises(ValueError, match="Eksik"):
+        aggregate_tool.aggregate_view(["Eksik"], "sum", view)
+
+
+def test_inspector_outputs_are_serialized_within_budget(workspace):
+    tool = DataFrameInspectTool(workspace=workspace)
+
+    def inspect(action, **params):
+        return tool._run(json.dumps({"action": action, "params": params}))
+
+    assert inspect("get_column_names") == '["Cari Kodu","Para Birimi","Tutar"]'
+    assert "RangeIndex: 20 entries" in inspect("get_info")
+    assert inspect("get_info", max_tokens=10).endswith("[truncated to fit 10 tokens]")
+    assert inspect("list_views", max_tokens=5).endswith("[truncated to fit 5 tokens]")